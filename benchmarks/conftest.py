@@ -0,0 +1,199 @@
+"""
+Benchmarks of the text search pipeline. They are not run with the unit tests, run them
+with ``pytest benchmarks``.
+
+Every benchmark reports how many rows per second it processed, the peak memory
+allocated while it ran and, on Linux, how much it grew the resident set size of the
+process at its peak, measured from the start of the benchmark. If a baseline
+file exists, a benchmark fails when its rows per second drop more than the tolerance
+below the baseline. Save a baseline before making a change with
+``pytest benchmarks --benchmark-save``, then run ``pytest benchmarks`` after it.
+"""
+
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pytest
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = "100,10000,100000"
+DEFAULT_TOLERANCE = 0.25
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    rows: int
+    seconds: float
+    peak_allocated_bytes: int
+    peak_rss_growth_bytes: Optional[int]
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+_results: List[BenchmarkResult] = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption(
+        "--benchmark-sizes",
+        default=DEFAULT_SIZES,
+        help=(
+            "Comma separated numbers of search hits to run every benchmark with "
+            f"(default: {DEFAULT_SIZES}), e.g. 100,10000,1000000"
+        ),
+    )
+    group.addoption(
+        "--benchmark-baseline",
+        default=str(DEFAULT_BASELINE_PATH),
+        help="Path of the baseline results to compare with",
+    )
+    group.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="Save the results as the new baseline instead of comparing with it",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=(
+            "Fraction of the baseline rows per second a benchmark may lose before "
+            f"failing (default: {DEFAULT_TOLERANCE})"
+        ),
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        sizes = [
+            int(size)
+            for size in metafunc.config.getoption("--benchmark-sizes").split(",")
+        ]
+        metafunc.parametrize("size", sizes, ids=[f"{size}_hits" for size in sizes])
+
+
+def _reset_peak_rss() -> Optional[int]:
+    """
+    Resets the peak resident set size of the process to its current value, so the peak
+    reached by one benchmark isn't hidden by the peak of an earlier one.
+
+    :return: Current resident set size in bytes, or None if the peak can't be reset,
+      which is only possible on Linux
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def _peak_rss_bytes() -> int:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux, in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _load_baseline(path: Path) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+@pytest.fixture
+def benchmark(request) -> Callable[[Callable[[], int]], BenchmarkResult]:
+    """
+    Runs a function once to time it and measure how much it grows the resident set
+    size, then once more with tracemalloc to measure the memory it allocates, and
+    compares its rows per second with the baseline.
+
+    The function must return the number of rows it processed.
+    """
+    config = request.config
+
+    def run(function: Callable[[], int]) -> BenchmarkResult:
+        gc.collect()
+        rss_bytes = _reset_peak_rss()
+        started_at = time.perf_counter()
+        rows = function()
+        seconds = time.perf_counter() - started_at
+        peak_rss_growth_bytes = (
+            # Freed memory returned to the system can leave the peak below the start
+            max(_peak_rss_bytes() - rss_bytes, 0)
+            if rss_bytes is not None
+            else None
+        )
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            _, peak_allocated_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = BenchmarkResult(
+            name=request.node.name,
+            rows=rows,
+            seconds=seconds,
+            peak_allocated_bytes=peak_allocated_bytes,
+            peak_rss_growth_bytes=peak_rss_growth_bytes,
+        )
+        _results.append(result)
+
+        if not config.getoption("--benchmark-save"):
+            baseline = _load_baseline(Path(config.getoption("--benchmark-baseline")))
+            expected = baseline.get(result.name)
+            tolerance = config.getoption("--benchmark-tolerance")
+            if expected and result.rows_per_second < expected * (1 - tolerance):
+                pytest.fail(
+                    f"{result.name} processed {result.rows_per_second:,.0f} rows/s, "
+                    f"more than {tolerance:.0%} below the baseline of "
+                    f"{expected:,.0f} rows/s."
+                )
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session):
+    if _results and session.config.getoption("--benchmark-save"):
+        path = Path(session.config.getoption("--benchmark-baseline"))
+        baseline = _load_baseline(path)
+        baseline.update({result.name: result.rows_per_second for result in _results})
+        path.write_text(json.dumps(baseline, indent=4, sort_keys=True) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("benchmark results")
+    name_width = max(len(result.name) for result in _results)
+    terminalreporter.write_line(
+        f"{'benchmark':<{name_width}}  {'rows':>9}  {'seconds':>8}  {'rows/s':>12}  "
+        f"{'peak alloc MiB':>14}  {'peak RSS growth MiB':>19}"
+    )
+    for result in _results:
+        peak_rss = (
+            f"{result.peak_rss_growth_bytes / 2**20:19.1f}"
+            if result.peak_rss_growth_bytes is not None
+            else f"{'n/a':>19}"
+        )
+        terminalreporter.write_line(
+            f"{result.name:<{name_width}}  {result.rows:>9}  {result.seconds:>8.3f}  "
+            f"{result.rows_per_second:>12,.0f}  "
+            f"{result.peak_allocated_bytes / 2**20:>14.1f}  {peak_rss}"
+        )
@@ -0,0 +1,50 @@
+import json
+import time
+from pathlib import Path
+
+from edgar_tool.filing_hit import FilingHit
+from edgar_tool.text_search import _parse_row
+
+RESPONSES_DIR = Path(__file__).parent.parent / "tests" / "responses"
+# Rows parsed when comparing the two ways of parsing, enough to time them reliably
+MIN_COMPARED_ROWS = 10_000
+
+
+def _load_hits():
+    # Real hits, whose entity names have tickers and multiple companies
+    return [
+        hit
+        for response_file in sorted(RESPONSES_DIR.glob("*_hit*.json"))
+        for hit in json.loads(response_file.read_text())["hits"]["hits"]
+    ]
+
+
+def test_parse_row(benchmark, size):
+    hits = _load_hits()
+
+    def parse_rows():
+        for index in range(size):
+            _parse_row(hits[index % len(hits)])
+        return size
+
+    benchmark(parse_rows)
+
+
+def test_parse_row_does_not_build_records(size):
+    """Parsing rows to dictionaries, the default, must not pay for compact records."""
+    hits = _load_hits()
+    rows = max(size, MIN_COMPARED_ROWS)
+
+    def best_seconds(parse):
+        timings = []
+        for _ in range(3):
+            started_at = time.perf_counter()
+            for index in range(rows):
+                parse(hits[index % len(hits)])
+            timings.append(time.perf_counter() - started_at)
+        return min(timings)
+
+    dict_seconds = best_seconds(_parse_row)
+    record_seconds = best_seconds(lambda hit: FilingHit.from_hit(hit).to_dict())
+
+    assert dict_seconds < record_seconds
@@ -0,0 +1,108 @@
+import functools
+from datetime import date, timedelta
+from unittest.mock import patch
+from urllib import parse
+
+import pytest
+
+from edgar_tool.constants import TEXT_SEARCH_CSV_FIELDS_NAMES
+from edgar_tool.efts_server import SearchIndex, generate_synthetic_hits
+from edgar_tool.io import write_results_to_file
+from edgar_tool.search_params import SearchParams
+from edgar_tool.text_search import (
+    MAX_RESULTS_PER_PAGE,
+    _parse_table_rows,
+    generate_search_urls,
+)
+from edgar_tool.url_generator import generate_search_url_for_kwargs
+
+START_DATE = date(2024, 1, 1)
+END_DATE = date(2024, 12, 31)
+SEARCH_URL = "https://efts.sec.gov/LATEST/search-index?q=benchmark"
+
+
+@functools.lru_cache(maxsize=1)
+def _hits(size):
+    return generate_synthetic_hits(size, START_DATE, END_DATE)
+
+
+@functools.lru_cache(maxsize=1)
+def _pages(size):
+    hits = _hits(size)
+    return [
+        {"hits": {"hits": hits[offset : offset + MAX_RESULTS_PER_PAGE]}}
+        for offset in range(0, len(hits), MAX_RESULTS_PER_PAGE)
+    ]
+
+
+@functools.lru_cache(maxsize=1)
+def _rows(size):
+    return [row for page in _pages(size) for row in _parse_table_rows(SEARCH_URL, page)]
+
+
+def test_url_generation(benchmark, size):
+    # One search per day of the year, with and without filters, like the planner
+    search_params = [
+        SearchParams(
+            keywords=["benchmark", "text"],
+            start_date=START_DATE + timedelta(days=day),
+            end_date=START_DATE + timedelta(days=day),
+            single_forms=["8-K", "10-Q"] if day % 2 else None,
+            peo_in="NY" if day % 3 else None,
+        )
+        for day in range(min(size, 366))
+    ]
+
+    def generate_urls():
+        for index in range(size):
+            generate_search_url_for_kwargs(search_params[index % len(search_params)])
+        return size
+
+    benchmark(generate_urls)
+
+
+def test_planning(benchmark, size):
+    index = SearchIndex(_hits(size))
+    search_params = SearchParams(
+        keywords=["benchmark"], start_date=START_DATE, end_date=END_DATE
+    )
+
+    def fake_fetch_page(url, transport=None):
+        return index.search(parse.parse_qs(parse.urlsplit(str(url)).query))[1]
+
+    def plan():
+        with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+            for _ in generate_search_urls(search_params):
+                pass
+        # Every hit is covered by the planned pages
+        return size
+
+    benchmark(plan)
+
+
+def test_parsing(benchmark, size):
+    pages = _pages(size)
+
+    def parse_pages():
+        return sum(len(_parse_table_rows(SEARCH_URL, page)) for page in pages)
+
+    benchmark(parse_pages)
+
+
+@pytest.mark.parametrize(
+    "extension",
+    ["csv", "jsonl", "json", "parquet", "arrow", "csv.gz", "jsonl.zst", "sqlite"],
+)
+def test_writing(benchmark, size, extension, tmp_path):
+    if extension in ("parquet", "arrow"):
+        pytest.importorskip("pyarrow")
+    if extension.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    rows = _rows(size)
+    output = str(tmp_path / f"results.{extension}")
+
+    def write():
+        write_results_to_file(iter(rows), output, TEXT_SEARCH_CSV_FIELDS_NAMES)
+        return len(rows)
+
+    benchmark(write)
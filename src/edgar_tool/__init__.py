@@ -1,6 +1,18 @@
 from edgar_tool.cli import app
 from edgar_tool.constants import Location
+from edgar_tool.filing_hit import FilingHit
 from edgar_tool.search_params import SearchParams
-from edgar_tool.text_search import search
+from edgar_tool.text_search import aiter_search, async_search, iter_search, search
+from edgar_tool.transport import Transport
 
-__all__ = ["app", "SearchParams", "search", "Location"]
+__all__ = [
+    "app",
+    "SearchParams",
+    "search",
+    "iter_search",
+    "async_search",
+    "aiter_search",
+    "Location",
+    "Transport",
+    "FilingHit",
+]
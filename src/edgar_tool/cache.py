@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+from urllib import parse
+
+# Maximum total size of the cached responses on disk, in bytes
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+# Filings are rarely added to or removed from past dates, so responses for date ranges
+# that ended before today can be kept for a long time
+HISTORICAL_RESPONSE_TTL = timedelta(days=30)
+# Filings for today keep arriving, so responses for date ranges that include today
+# quickly go stale
+RECENT_RESPONSE_TTL = timedelta(hours=1)
+CACHE_FILE_SUFFIX = ".json"
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that equivalent URLs share the same cache entry: the scheme and
+    host are lowercased, the query parameters are sorted and the fragment is dropped.
+
+    :param url: URL to normalize
+    :return: Normalized URL
+    """
+    parts = parse.urlsplit(str(url))
+    query = parse.urlencode(
+        sorted(parse.parse_qsl(parts.query, keep_blank_values=True)),
+        quote_via=parse.quote,
+    )
+    return parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, query, "")
+    )
+
+
+def _end_date_of(url: str) -> Optional[date]:
+    """
+    :param url: Search URL
+    :return: End date of the date range searched by the URL, if it has one
+    """
+    end_dates = parse.parse_qs(parse.urlsplit(str(url)).query).get("enddt")
+    if not end_dates:
+        return None
+    try:
+        return datetime.strptime(end_dates[0], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+class ResponseCache:
+    """
+    Thread-safe cache of JSON responses stored on disk, so running the same search again
+    does not send any requests for the pages that were already fetched.
+
+    Every response is stored in its own file, named after the hash of its normalized
+    URL. Responses for date ranges that ended before today expire after
+    ``historical_ttl``, all others after ``recent_ttl``. Once the cached responses take
+    more than ``max_size`` bytes, the least recently used ones are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        historical_ttl: timedelta = HISTORICAL_RESPONSE_TTL,
+        recent_ttl: timedelta = RECENT_RESPONSE_TTL,
+    ):
+        """
+        :param directory: Directory to store the cached responses in, created if needed
+        :param max_size: Maximum total size of the cached responses, in bytes
+        :param historical_ttl: How long to keep responses for date ranges that ended
+          before today
+        :param recent_ttl: How long to keep every other response
+        """
+        if max_size <= 0:
+            raise ValueError("Cache max size must be greater than 0.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.historical_ttl = historical_ttl
+        self.recent_ttl = recent_ttl
+        self._lock = threading.Lock()
+        self._sizes: Dict[Path, int] = {
+            path: path.stat().st_size
+            for path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}")
+        }
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached responses, in bytes."""
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def _path_for(self, url: str) -> Path:
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return self.directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def ttl_for(self, url: str) -> timedelta:
+        """
+        :param url: URL of the response
+        :return: How long the response to the given URL can be cached for
+        """
+        end_date = _end_date_of(url)
+        if end_date is not None and end_date < date.today():
+            return self.historical_ttl
+        return self.recent_ttl
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        :param url: URL of the response
+        :return: Cached response to the URL, or None if it is not cached or has expired
+        """
+        path = self._path_for(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("expires_at", 0) <= time.time():
+            self._delete(path)
+            return None
+        # The modification time records when the entry was last used, for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["response"]
+
+    def set(self, url: str, response: dict) -> None:
+        """
+        Stores the response to the given URL, evicting the least recently used responses
+        if the cache grows too large.
+
+        :param url: URL of the response
+        :param response: JSON response to cache
+        """
+        path = self._path_for(url)
+        entry = {
+            "url": normalize_url(url),
+            "expires_at": time.time() + self.ttl_for(url).total_seconds(),
+            "response": response,
+        }
+        temporary_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        # Replacing the file atomically means readers never see a partial entry
+        os.replace(temporary_path, path)
+        with self._lock:
+            self._sizes[path] = path.stat().st_size
+        self._evict()
+
+    def _delete(self, path: Path) -> None:
+        with self._lock:
+            self._sizes.pop(path, None)
+        path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        with self._lock:
+            total_size = sum(self._sizes.values())
+            if total_size <= self.max_size:
+                return
+            last_used = {}
+            for path in self._sizes:
+                try:
+                    last_used[path] = path.stat().st_mtime
+                except OSError:
+                    last_used[path] = 0
+            for path in sorted(last_used, key=last_used.get):
+                if total_size <= self.max_size:
+                    break
+                total_size -= self._sizes.pop(path)
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Deletes every cached response."""
+        with self._lock:
+            paths = list(self._sizes)
+            self._sizes.clear()
+        for path in paths:
+            path.unlink(missing_ok=True)
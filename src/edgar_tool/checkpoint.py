@@ -0,0 +1,138 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Set
+
+CHECKPOINT_FILE_SUFFIX = ".checkpoint"
+
+
+class CheckpointMismatchError(Exception):
+    pass
+
+
+class SearchCheckpoint:
+    """
+    Records the progress of a text search, so an interrupted search can be resumed
+    without downloading the pages that were already saved to the output file.
+
+    The checkpoint is an append-only JSON Lines file stored next to the output file.
+    Every date range planned by :func:`edgar_tool.text_search.generate_search_urls` is
+    recorded either with the URLs of its pages or with the URLs of the smaller date
+    ranges it was split into, and every page is recorded once it has been written to
+    the output file. A date range is complete when all of its pages, or all of its
+    smaller date ranges, are.
+    """
+
+    def __init__(self, path: Path):
+        """
+        :param path: Path of the checkpoint file
+        """
+        self.path = Path(path)
+        self._search_url = None
+        self._range_pages: Dict[str, List[str]] = {}
+        self._range_children: Dict[str, List[str]] = {}
+        self._completed_pages: Set[str] = set()
+
+    @classmethod
+    def for_output(cls, output: str) -> "SearchCheckpoint":
+        """
+        :param output: Name of the output file of the search
+        :return: Checkpoint stored next to the given output file
+        """
+        return cls(Path(f"{output}{CHECKPOINT_FILE_SUFFIX}"))
+
+    def start(self, search_url: str, resume: bool) -> None:
+        """
+        Starts recording the progress of a search.
+
+        :param search_url: URL of the whole search, used to make sure a checkpoint is
+          only resumed by the same search
+        :param resume: Whether to load the progress of a previous run of the search.
+          Otherwise, any existing checkpoint is discarded.
+        """
+        search_url = str(search_url)
+        if resume and self.path.exists():
+            self._load()
+            if self._search_url != search_url:
+                raise CheckpointMismatchError(
+                    f"Checkpoint {self.path} was saved for a different search "
+                    f"({self._search_url}), cannot resume {search_url}."
+                )
+            print(
+                f"Resuming search from {self.path}, "
+                f"{len(self._completed_pages)} page(s) already saved ..."
+            )
+            return
+        self.path.write_text("")
+        self._search_url = search_url
+        self._append({"search": search_url})
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut short if the search was killed mid-write
+                    continue
+                if "search" in entry:
+                    self._search_url = entry["search"]
+                elif "pages" in entry:
+                    self._range_pages[entry["range"]] = entry["pages"]
+                elif "children" in entry:
+                    self._range_children[entry["range"]] = entry["children"]
+                elif "page" in entry:
+                    self._completed_pages.add(entry["page"])
+
+    def _append(self, entry: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def record_range_pages(self, range_url: str, page_urls: List[str]) -> None:
+        """
+        Records the pages of results of a date range that is not split any further.
+
+        :param range_url: URL of the first page of the date range
+        :param page_urls: URLs of every page of the date range
+        """
+        page_urls = [str(u) for u in page_urls]
+        if self._range_pages.get(str(range_url)) != page_urls:
+            self._range_pages[str(range_url)] = page_urls
+            self._append({"range": str(range_url), "pages": page_urls})
+
+    def record_range_children(self, range_url: str, child_urls: List[str]) -> None:
+        """
+        Records the smaller date ranges a date range was split into.
+
+        :param range_url: URL of the first page of the date range
+        :param child_urls: URLs of the first page of each smaller date range
+        """
+        child_urls = [str(u) for u in child_urls]
+        if self._range_children.get(str(range_url)) != child_urls:
+            self._range_children[str(range_url)] = child_urls
+            self._append({"range": str(range_url), "children": child_urls})
+
+    def mark_page_done(self, page_url: str) -> None:
+        """
+        Records that a page has been written to the output file.
+
+        :param page_url: URL of the page
+        """
+        self._completed_pages.add(str(page_url))
+        self._append({"page": str(page_url)})
+
+    def is_page_done(self, page_url: str) -> bool:
+        return str(page_url) in self._completed_pages
+
+    def is_range_done(self, range_url: str) -> bool:
+        range_url = str(range_url)
+        if range_url in self._range_pages:
+            return all(self.is_page_done(u) for u in self._range_pages[range_url])
+        if range_url in self._range_children:
+            return all(self.is_range_done(u) for u in self._range_children[range_url])
+        return False
+
+    def remove(self) -> None:
+        """Deletes the checkpoint file, once the search has completed."""
+        self.path.unlink(missing_ok=True)
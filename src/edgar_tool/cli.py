@@ -1,28 +1,81 @@
+import asyncio
 import time
 from datetime import date, datetime
+from pathlib import Path
 from typing import Optional
 
 import typer
 from typing_extensions import Annotated
 
-from .constants import DateRange, Filing, FilingCategory, Location
+from .cache import ResponseCache
+from .checkpoint import CheckpointMismatchError
+from .constants import COMPRESSION_SUFFIXES, DateRange, Filing, FilingCategory, Location
+from .feed_state import RssFeedState
+from .io import APPENDABLE_OUTPUTS_DESCRIPTION, supports_append
 from .location_autocomplete import LOCATION_CODE_TO_NAME
-from .rss import fetch_rss_feed
+from .rate_limit import SharedRateLimiter
+from .rss import (
+    DEFAULT_BACKFILL_CONCURRENCY,
+    RSS_MONTHLY_ARCHIVE_START,
+    backfill_rss_feed,
+    fetch_rss_feed,
+)
 from .search_params import SearchParams
 from .text_search import search
+from .transport import Transport
+from .watch import load_watchlists, watch
 
 app = typer.Typer(name="edgar", no_args_is_help=True)
 
 
+def _strip_compression_suffix(value: str) -> str:
+    for suffix in COMPRESSION_SUFFIXES:
+        if value.endswith(suffix):
+            return value[: -len(suffix)]
+    return value
+
+
 def text_search_output_callback(value: str):
-    if not value.endswith(("csv", "json", "jsonl")):
+    name = _strip_compression_suffix(value)
+    if not (
+        name.endswith(("csv", "json", "jsonl"))
+        or value.endswith(("parquet", "arrow", "feather", "sqlite", "db"))
+    ):
         raise typer.BadParameter(
             f"Unsupported file extension for destination file: {value} "
-            "(should be one of csv, json, or jsonl)."
+            "(should be one of csv, json, jsonl, parquet, arrow, feather, sqlite, or "
+            "db, and csv, json and jsonl files can be compressed by adding .gz or "
+            ".zst)."
         )
     return value
 
 
+def build_transport(
+    cache_dir: Optional[Path] = None, rate_limit_file: Optional[Path] = None
+) -> Optional[Transport]:
+    """
+    Builds the transport to send requests through for the given command line options.
+
+    :param cache_dir: Directory to cache search result pages in, if any
+    :param rate_limit_file: State file of a rate limiter shared with other processes,
+      if any
+    :return: Transport, or None to use the default one
+    """
+    if cache_dir is None and rate_limit_file is None:
+        return None
+    return Transport(
+        cache=ResponseCache(cache_dir) if cache_dir else None,
+        rate_limiter=SharedRateLimiter(rate_limit_file) if rate_limit_file else None,
+    )
+
+
+RATE_LIMIT_FILE_HELP = (
+    "File through which edgar-tool processes running at the same time on this machine "
+    "share the SEC's request rate limit, e.g. /tmp/edgar_rate_limit.sqlite. Use the "
+    "same file for every process."
+)
+
+
 def location_help_callback(incomplete: str):
     """
     Filters the user's location code input to only show those that start with the input.
@@ -59,7 +112,7 @@ def text_search(
         typer.Option(
             "--output",
             "-o",
-            help="Name of the output file to save results to. Accepts .csv, .json, and .jsonl extensions.",
+            help="Name of the output file to save results to. Accepts .csv, .json, .jsonl, .parquet, .arrow, .feather, .sqlite, and .db extensions. CSV and JSON files are compressed if the name ends with .gz or .zst, e.g. results.jsonl.gz",
             default_factory=f"edgar_search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
             callback=text_search_output_callback,
         ),
@@ -146,6 +199,45 @@ def text_search(
             help="Maximum number of results to retrieve. If not provided, all results will be retrieved.",
         ),
     ] = None,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            min=1,
+            help=(
+                "Number of result pages to fetch at the same time. Requests are still "
+                "limited to the SEC's maximum request rate."
+            ),
+        ),
+    ] = 1,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help=(
+                "Resume an interrupted search into the same --output file, skipping "
+                "the pages that were already saved. Only uncompressed CSV and JSON "
+                "Lines output files and SQLite databases can be resumed."
+            ),
+        ),
+    ] = False,
+    cache_dir: Annotated[
+        Path,
+        typer.Option(
+            "--cache-dir",
+            file_okay=False,
+            help=(
+                "Directory to cache search result pages in. Running a search again "
+                "reuses the cached pages instead of requesting them from the SEC. "
+                "Pages for past dates are kept for 30 days, pages including today "
+                "for 1 hour."
+            ),
+        ),
+    ] = None,
+    rate_limit_file: Annotated[
+        Path,
+        typer.Option("--rate-limit-file", dir_okay=False, help=RATE_LIMIT_FILE_HELP),
+    ] = None,
 ):
     if start_date and end_date:
         if start_date > end_date:
@@ -164,19 +256,35 @@ def text_search(
         inc_in=inc_in,
     )
 
-    search(
-        search_params=search_params,
-        max_results=max_results,
-        output=output,
-    )
+    if resume and not supports_append(output):
+        raise typer.BadParameter(
+            f"Only {APPENDABLE_OUTPUTS_DESCRIPTION} can be resumed.",
+            param_hint="--resume",
+        )
+
+    try:
+        search(
+            search_params=search_params,
+            max_results=max_results,
+            output=output,
+            concurrency=concurrency,
+            resume=resume,
+            transport=build_transport(cache_dir, rate_limit_file),
+        )
+    except CheckpointMismatchError as e:
+        raise typer.BadParameter(str(e), param_hint="--resume")
 
 
 def rss_output_callback(value: str):
-    if not value.endswith("csv"):
+    if not (
+        _strip_compression_suffix(value).endswith("csv")
+        or value.endswith(("parquet", "arrow", "feather", "sqlite", "db"))
+    ):
         raise typer.BadParameter(
             f"Unsupported file extension for destination file: {value}. "
-            "Only CSV files are supported for RSS feed. Please use a file "
-            "that ends with .csv (e.g. --output my_rss_feed.csv)."
+            "Only CSV, Parquet, Arrow and SQLite files are supported for RSS feed. "
+            "Please use a file that ends with .csv, .csv.gz, .csv.zst, .parquet, "
+            ".arrow, .feather, .sqlite or .db (e.g. --output my_rss_feed.csv)."
         )
     return value
 
@@ -218,12 +326,162 @@ def rss(
             help="If set, fetch the RSS feed every n minutes",
         ),
     ] = None,
+    rate_limit_file: Annotated[
+        Path,
+        typer.Option("--rate-limit-file", dir_okay=False, help=RATE_LIMIT_FILE_HELP),
+    ] = None,
 ) -> None:
+    if every_n_mins and not (
+        _strip_compression_suffix(output).endswith("csv")
+        or output.endswith(("sqlite", "db"))
+    ):
+        # Columnar files are rewritten rather than appended to on every fetch
+        raise typer.BadParameter(
+            "Only CSV and SQLite output files can be added to on every fetch.",
+            param_hint="--every-n-mins",
+        )
+    transport = build_transport(rate_limit_file=rate_limit_file)
     if every_n_mins:
+        # Only download the feed when it changed, and only save new filings
+        state = RssFeedState.for_output(output)
         while True:
-            fetch_rss_feed(tickers, output, refresh_tickers_mapping)
+            fetch_rss_feed(
+                tickers,
+                output,
+                refresh_tickers_mapping,
+                transport=transport,
+                state=state,
+            )
             print(
                 f"Sleeping for {every_n_mins} minute(s) before fetching the RSS feed again ..."
             )
             time.sleep(every_n_mins * 60)
-    fetch_rss_feed(tickers, output, refresh_tickers_mapping)
+    fetch_rss_feed(tickers, output, refresh_tickers_mapping, transport=transport)
+
+
+@app.command(
+    help=(
+        "Fetch the monthly archives of the RSS feed between two months for the given "
+        "company tickers, and save their filings to a single file."
+    ),
+)
+def rss_backfill(
+    tickers: Annotated[
+        list[str],
+        typer.Argument(
+            help="List of company tickers to fetch the RSS feed archives for",
+        ),
+    ],
+    from_month: Annotated[
+        datetime,
+        typer.Option(
+            "--from",
+            formats=["%Y-%m"],
+            help="First month to fetch in YYYY-MM format (i.e. 2015-01)",
+        ),
+    ],
+    to_month: Annotated[
+        datetime,
+        typer.Option(
+            "--to",
+            formats=["%Y-%m"],
+            help="Last month to fetch in YYYY-MM format (i.e. 2024-12)",
+        ),
+    ] = date.today().strftime("%Y-%m"),
+    output: Annotated[
+        str,
+        typer.Option(
+            "--output",
+            "-o",
+            help="Name of the output file to save the results to",
+            callback=rss_output_callback,
+        ),
+    ] = f"edgar_rss_backfill_{datetime.now().strftime('%d%m%Y_%H%M%S')}.csv",
+    refresh_tickers_mapping: Annotated[
+        bool,
+        typer.Option(
+            "--refresh-tickers-mapping",
+            "-rtm",
+            help="Whether to refresh the company tickers mapping file or not",
+        ),
+    ] = False,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            min=1,
+            help=(
+                "Number of monthly archives to fetch at the same time. Requests are "
+                "still limited to the SEC's maximum request rate."
+            ),
+        ),
+    ] = DEFAULT_BACKFILL_CONCURRENCY,
+    rate_limit_file: Annotated[
+        Path,
+        typer.Option("--rate-limit-file", dir_okay=False, help=RATE_LIMIT_FILE_HELP),
+    ] = None,
+) -> None:
+    if from_month > to_month:
+        raise typer.BadParameter(
+            "--from must be the same month as --to or before it.", param_hint="--from"
+        )
+    if to_month.date() < RSS_MONTHLY_ARCHIVE_START:
+        raise typer.BadParameter(
+            "Monthly RSS feed archives start in "
+            f"{RSS_MONTHLY_ARCHIVE_START:%Y-%m}, --to must be that month or after it.",
+            param_hint="--to",
+        )
+    backfill_rss_feed(
+        tickers,
+        output,
+        from_month.date(),
+        to_month.date(),
+        refresh_tickers_mapping=refresh_tickers_mapping,
+        concurrency=concurrency,
+        transport=build_transport(rate_limit_file=rate_limit_file),
+    )
+
+
+@app.command(
+    name="watch",
+    help=(
+        "Fetch the latest RSS feed data for several watchlists of company tickers, "
+        "each at its own interval and saved to its own file, until stopped."
+    ),
+)
+def watch_rss(
+    config: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            dir_okay=False,
+            help=(
+                "JSON file of the watchlists, with the tickers, interval in minutes "
+                "and CSV or SQLite output file of each"
+            ),
+        ),
+    ],
+    refresh_tickers_mapping: Annotated[
+        bool,
+        typer.Option(
+            "--refresh-tickers-mapping",
+            "-rtm",
+            help="Whether to refresh the company tickers mapping file or not",
+        ),
+    ] = False,
+    rate_limit_file: Annotated[
+        Path,
+        typer.Option("--rate-limit-file", dir_okay=False, help=RATE_LIMIT_FILE_HELP),
+    ] = None,
+) -> None:
+    try:
+        watchlists = load_watchlists(config)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="CONFIG")
+    asyncio.run(
+        watch(
+            watchlists,
+            refresh_tickers_mapping=refresh_tickers_mapping,
+            transport=build_transport(rate_limit_file=rate_limit_file),
+        )
+    )
@@ -2,9 +2,48 @@ import enum
 
 from typing_extensions import Literal
 
-SUPPORTED_OUTPUT_EXTENSIONS = [".csv", ".jsonl", ".json"]
+SUPPORTED_OUTPUT_EXTENSIONS = [
+    ".csv",
+    ".jsonl",
+    ".json",
+    ".parquet",
+    ".arrow",
+    ".feather",
+    ".sqlite",
+    ".db",
+]
+# Suffixes of compressed CSV, JSON and JSON Lines output files, e.g. results.jsonl.gz
+COMPRESSION_SUFFIXES = [".gz", ".zst"]
+# Extensions of SQLite database output files
+SQLITE_OUTPUT_EXTENSIONS = [".sqlite", ".db"]
+# Table of SQLite output files the results are written to
+SQLITE_TABLE_NAME = "results"
+# Number of rows written to SQLite output files per transaction
+SQLITE_BATCH_SIZE = 10_000
+# Fields indexed in SQLite output files when present: CIKs, forms and filing dates of
+# text search and RSS feed results
+SQLITE_INDEXED_FIELDS_NAMES = [
+    "company_cik",
+    "root_form",
+    "filed_at",
+    "cik",
+    "form",
+    "filing_date",
+]
+# Extensions of the columnar output files, which need the optional pyarrow dependency
+COLUMNAR_OUTPUT_EXTENSIONS = [".parquet", ".arrow", ".feather"]
+# Number of rows written to columnar output files at a time, as one row group
+COLUMNAR_ROW_GROUP_SIZE = 10_000
 TEXT_SEARCH_BASE_URL = "https://efts.sec.gov/LATEST/search-index?"
 TEXT_SEARCH_SPLIT_BATCHES_NUMBER = 2
+# The SEC API only lets us paginate through the first 10,000 results of a search
+TEXT_SEARCH_MAX_PAGINATED_RESULTS = 10000
+# Number of results we aim for when splitting a search into date ranges. Lower than
+# the maximum to leave room for errors in the estimated number of results per day.
+TEXT_SEARCH_TARGET_RESULTS_PER_DATE_RANGE = 7500
+# Maximum number of form types or locations searched for at once when splitting a
+# search, to keep the search URL well under the 2083 character limit
+TEXT_SEARCH_MAX_FILTER_VALUES_PER_SEARCH = 80
 TEXT_SEARCH_CSV_FIELDS_NAMES = [
     "root_form",
     "form_name",
@@ -43,6 +82,51 @@ RSS_FEED_CSV_FIELDS_NAMES = [
     "xbrl_files",
 ]
 
+# Columnar output files store the fields below with their own types, and every other
+# field as a string column.
+# Fields that can hold several values, stored as list columns
+COLUMNAR_LIST_FIELDS_NAMES = frozenset(
+    [
+        "root_form",
+        "form_name",
+        "entity_name",
+        "ticker",
+        "company_cik",
+        "company_cik_trimmed",
+        "place_of_business",
+        "incorporated_location",
+        "file_num",
+        "film_num",
+        "file_num_search_url",
+        "filing_details_url",
+        "filing_document_url",
+        "xbrl_files",
+    ]
+)
+# Fields holding ISO 8601 dates, stored as date columns
+COLUMNAR_DATE_FIELDS_NAMES = frozenset(["filed_at", "reporting_for"])
+# Fields whose values repeat across rows, dictionary encoded so each distinct value is
+# only stored once
+COLUMNAR_DICTIONARY_FIELDS_NAMES = frozenset(
+    [
+        "root_form",
+        "form_name",
+        "entity_name",
+        "ticker",
+        "company_cik",
+        "company_cik_trimmed",
+        "place_of_business",
+        "incorporated_location",
+        "company_name",
+        "cik",
+        "trimmed_cik",
+        "form",
+        "assistant_director",
+        "assigned_sic",
+        "fiscal_year_end",
+    ]
+)
+
 """All mappings below are from the SEC EDGAR website's search form.
 The keys are the values that the CLI uses, and the values are those
 that the search form uses. All values are shown in the order they
@@ -0,0 +1,346 @@
+import bisect
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib import parse
+
+import requests
+
+from edgar_tool.cache import normalize_url
+from edgar_tool.constants import TEXT_SEARCH_MAX_PAGINATED_RESULTS
+from edgar_tool.replay import iter_archive
+from edgar_tool.transport import Transport
+
+SEARCH_INDEX_PATH = "/LATEST/search-index"
+RESULTS_PER_PAGE = 100
+# Number of buckets returned for each aggregation, like the SEC API
+AGGREGATION_SIZE = 30
+
+# Form types and locations used for synthetic filings, weighted roughly like real ones
+_SYNTHETIC_FORMS = ["4", "8-K", "10-Q", "SC 13G", "424B2", "10-K", "S-1", "DEF 14A"]
+_SYNTHETIC_FORM_WEIGHTS = [40, 15, 10, 8, 8, 4, 2, 2]
+_SYNTHETIC_STATES = ["NY", "CA", "TX", "DE", "MA", "IL", "FL", "NC", "ON", "GBR"]
+
+
+def generate_synthetic_hits(
+    count: int, start_date: date, end_date: date, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Generates fake search hits shaped like the ones returned by the SEC API. The same
+    arguments always generate the same hits.
+
+    :param count: Number of hits to generate
+    :param start_date: Earliest filing date
+    :param end_date: Latest filing date
+    :param seed: Seed of the random number generator
+    :return: List of hits
+    """
+    rng = random.Random(seed)
+    number_of_days = (end_date - start_date).days + 1
+    hits = []
+    for index in range(count):
+        cik = f"{rng.randrange(1, 2_000_000):010d}"
+        adsh = f"{cik}-{rng.randrange(0, 100):02d}-{index:06d}"
+        form = rng.choices(_SYNTHETIC_FORMS, weights=_SYNTHETIC_FORM_WEIGHTS)[0]
+        state = rng.choice(_SYNTHETIC_STATES)
+        file_date = start_date + timedelta(days=rng.randrange(number_of_days))
+        hits.append(
+            {
+                "_index": "edgar_file",
+                "_id": f"{adsh}:doc{index}.htm",
+                "_score": 1.0,
+                "_source": {
+                    "ciks": [cik],
+                    "period_ending": None,
+                    "file_num": [f"001-{rng.randrange(10_000, 99_999)}"],
+                    "display_names": [f"Company {index}  (CIK {cik})"],
+                    "xsl": None,
+                    "sequence": 1,
+                    "root_forms": [form],
+                    "file_date": file_date.isoformat(),
+                    "biz_states": [state],
+                    "sics": [str(rng.randrange(1000, 9999))],
+                    "form": form,
+                    "adsh": adsh,
+                    "film_num": [str(rng.randrange(10_000_000, 99_999_999))],
+                    "biz_locations": [f"City, {state}"],
+                    "file_type": form,
+                    "file_description": form,
+                    "inc_states": [rng.choice(_SYNTHETIC_STATES)],
+                    "items": [],
+                },
+            }
+        )
+    return hits
+
+
+def _aggregate(hits: List[Dict[str, Any]], field: str) -> Dict[str, Any]:
+    counts = Counter(value for hit in hits for value in hit["_source"].get(field, []))
+    top = counts.most_common(AGGREGATION_SIZE)
+    return {
+        "doc_count_error_upper_bound": 0,
+        "sum_other_doc_count": sum(counts.values()) - sum(n for _, n in top),
+        "buckets": [{"key": key, "doc_count": n} for key, n in top],
+    }
+
+
+class SearchIndex:
+    """
+    In-memory stand-in for the SEC full-text search index. Hits are kept sorted by
+    filing date, so date range filters only look at the hits inside the range.
+    """
+
+    def __init__(self, hits: List[Dict[str, Any]]):
+        """
+        :param hits: Hits to search through, see :func:`generate_synthetic_hits`
+        """
+        self.hits = sorted(hits, key=lambda hit: hit["_source"]["file_date"])
+        self._dates = [hit["_source"]["file_date"] for hit in self.hits]
+
+    def search(self, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answers a search request. Keywords are ignored, every hit matches them.
+
+        :param query: Query parameters of the request, as parsed by
+          :func:`urllib.parse.parse_qs`
+        :return: HTTP status code and JSON response
+        """
+
+        def param(name: str) -> Optional[str]:
+            return query.get(name, [None])[0]
+
+        start = bisect.bisect_left(self._dates, param("startdt") or "")
+        end = (
+            bisect.bisect_right(self._dates, param("enddt"))
+            if param("enddt")
+            else len(self._dates)
+        )
+        hits = self.hits[start:end]
+        if forms := param("forms"):
+            forms = set(forms.split(","))
+            hits = [hit for hit in hits if forms & set(hit["_source"]["root_forms"])]
+        if locations := param("locationCode"):
+            locations = set(locations.split(","))
+            field = (
+                "inc_states"
+                if param("locationType") == "incorporated"
+                else "biz_states"
+            )
+            hits = [hit for hit in hits if locations & set(hit["_source"][field])]
+
+        if param("from") is not None:
+            offset = int(param("from"))
+        else:
+            offset = (int(param("page") or 1) - 1) * RESULTS_PER_PAGE
+        if offset >= TEXT_SEARCH_MAX_PAGINATED_RESULTS:
+            return 500, {"error": "Result window is too large"}
+
+        return 200, {
+            "took": 1,
+            "timed_out": False,
+            "hits": {
+                "total": {
+                    "value": min(len(hits), TEXT_SEARCH_MAX_PAGINATED_RESULTS),
+                    "relation": (
+                        "gte" if len(hits) > TEXT_SEARCH_MAX_PAGINATED_RESULTS else "eq"
+                    ),
+                },
+                "max_score": 1.0,
+                "hits": hits[offset : offset + RESULTS_PER_PAGE],
+            },
+            "aggregations": {
+                "form_filter": _aggregate(hits, "root_forms"),
+                "biz_states_filter": _aggregate(hits, "biz_states"),
+            },
+        }
+
+
+class LocalEftsServer:
+    """
+    Local HTTP server standing in for the SEC full-text search API, so searches can be
+    run and benchmarked offline and deterministically.
+
+    Requests to the search index are answered from a list of hits, filtered by the
+    ``startdt``, ``enddt``, ``forms`` and ``locationCode`` parameters (keywords are
+    ignored), and paginated with the ``from`` or ``page`` parameters like the SEC API:
+    the hit count stops at 10,000 and results past the first 10,000 cannot be paged to.
+    Any other request is answered from a recorded archive, if one is given.
+
+    Use it with :class:`HostRewritingTransport` to send requests meant for the SEC to
+    the local server.
+    """
+
+    def __init__(
+        self,
+        hits: Optional[List[Dict[str, Any]]] = None,
+        archive_path: Optional[Path] = None,
+        requests_per_second: Optional[float] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        :param hits: Hits to search through, see :func:`generate_synthetic_hits`
+        :param archive_path: Archive written by
+          :class:`edgar_tool.replay.RecordingTransport` to answer requests from. Recorded
+          responses take precedence over searching ``hits``.
+        :param requests_per_second: If set, requests sent faster than this get a 429
+          response, like the SEC API does when its rate limit is exceeded
+        :param host: Host to listen on
+        :param port: Port to listen on, by default any free port
+        """
+        self.index = SearchIndex(hits or [])
+        self.recorded: Dict[str, Tuple[int, Optional[str], str]] = {}
+        if archive_path is not None:
+            for entry in iter_archive(archive_path):
+                self.recorded[self._request_key(entry["url"])] = (
+                    entry["status"],
+                    entry["content_type"],
+                    entry["body"],
+                )
+        self.requests_per_second = requests_per_second
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.throttled_count = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _request_key(url: str) -> str:
+        parts = parse.urlsplit(normalize_url(url))
+        return f"{parts.path}?{parts.query}"
+
+    @property
+    def base_url(self) -> str:
+        """URL of the server, to pass to :class:`HostRewritingTransport`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalEftsServer":
+        """Starts serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server and closes its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "LocalEftsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _is_throttled(self) -> bool:
+        with self._lock:
+            self.request_count += 1
+            if self.requests_per_second is None:
+                return False
+            now = time.monotonic()
+            self._tokens = min(
+                1.0,
+                self._tokens + (now - self._updated_at) * self.requests_per_second,
+            )
+            self._updated_at = now
+            if self._tokens < 1:
+                self.throttled_count += 1
+                return True
+            self._tokens -= 1
+            return False
+
+    def search(self, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answers a search request.
+
+        :param query: Query parameters of the request
+        :return: HTTP status code and JSON response
+        """
+        return self.index.search(query)
+
+    def _handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if server._is_throttled():
+                    self._send(
+                        429, "text/plain", b"Too Many Requests", {"Retry-After": "1"}
+                    )
+                    return
+                parts = parse.urlsplit(self.path)
+                recorded = server.recorded.get(server._request_key(self.path))
+                if recorded is not None:
+                    status, content_type, body = recorded
+                    self._send(status, content_type, body.encode("utf-8"))
+                elif parts.path == SEARCH_INDEX_PATH:
+                    status, response = server.search(parse.parse_qs(parts.query))
+                    self._send(
+                        status, "application/json", json.dumps(response).encode("utf-8")
+                    )
+                else:
+                    self._send(404, "text/plain", b"Not Found")
+
+            def _send(
+                self,
+                status: int,
+                content_type: Optional[str],
+                body: bytes,
+                headers: Optional[Dict[str, str]] = None,
+            ) -> None:
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
+
+
+class HostRewritingTransport(Transport):
+    """
+    Transport that sends every request to another host, such as a
+    :class:`LocalEftsServer`, keeping the path and query of the original URL.
+    """
+
+    def __init__(self, base_url: str, **kwargs: Any):
+        """
+        :param base_url: Scheme and host to send requests to, e.g. http://127.0.0.1:8000
+        :param kwargs: Keyword arguments passed on to :class:`Transport`
+        """
+        super().__init__(**kwargs)
+        base = parse.urlsplit(base_url)
+        self.scheme = base.scheme
+        self.netloc = base.netloc
+
+    def rewrite_url(self, url: str) -> str:
+        """
+        :param url: Original URL
+        :return: URL pointing to the other host
+        """
+        parts = parse.urlsplit(str(url))
+        return parse.urlunsplit(
+            (self.scheme, self.netloc, parts.path, parts.query, parts.fragment)
+        )
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> requests.Response:
+        return super().get(self.rewrite_url(url), headers=headers, **kwargs)
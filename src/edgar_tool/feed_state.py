@@ -0,0 +1,122 @@
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from requests import Response
+
+FEED_STATE_FILE_SUFFIX = ".feed-state"
+# The RSS feed lists the latest 200 filings, so this remembers the filings of many
+# successive polls even when the whole feed changes between polls
+MAX_SEEN_ACCESSION_NUMBERS = 10_000
+
+
+class RssFeedState:
+    """
+    Remembers what was already fetched from the RSS feed between polls, so each poll
+    only saves new filings.
+
+    The state holds the validators (ETag and Last-Modified headers) of the last feed
+    response, to ask the SEC to only send the feed again if it changed, and the
+    accession numbers of the latest filings saved, up to a maximum. It is stored as a
+    JSON file next to the output file, so polling can be stopped and started again.
+    """
+
+    def __init__(
+        self, path: Path, max_seen_accession_numbers: int = MAX_SEEN_ACCESSION_NUMBERS
+    ):
+        """
+        :param path: Path of the state file
+        :param max_seen_accession_numbers: Number of accession numbers to remember, the
+          oldest ones are forgotten first
+        """
+        if max_seen_accession_numbers < 1:
+            raise ValueError("Maximum number of accession numbers must be at least 1.")
+        self.path = Path(path)
+        self.max_seen_accession_numbers = max_seen_accession_numbers
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        # Ordered from the oldest to the most recently seen
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+
+    @classmethod
+    def for_output(cls, output: str) -> "RssFeedState":
+        """
+        :param output: Name of the output file the feed is saved to
+        :return: State stored next to the given output file, loaded if the output file
+          and the state file both exist. If the output file was deleted, the filings
+          saved to it are fetched again.
+        """
+        state = cls(Path(f"{output}{FEED_STATE_FILE_SUFFIX}"))
+        if Path(output).exists() and state.path.exists():
+            state.load()
+        return state
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # A missing or corrupt state only means the feed is fetched again in full
+            return
+        self.etag = data.get("etag")
+        self.last_modified = data.get("last_modified")
+        self._seen = OrderedDict.fromkeys(
+            data.get("seen", [])[-self.max_seen_accession_numbers :]
+        )
+
+    def save(self) -> None:
+        """Writes the state to its file, replacing it atomically."""
+        data = {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "seen": list(self._seen),
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        :return: Headers asking for the feed only if it changed since the last poll
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def update_validators(self, response: Response) -> None:
+        """
+        :param response: Feed response whose items were all saved
+        """
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    def is_new(self, accession_number: Optional[str]) -> bool:
+        """
+        :param accession_number: Accession number of the filing. Filings without one
+          are always new.
+        :return: Whether the filing was not saved before
+        """
+        return accession_number is None or accession_number not in self._seen
+
+    def remember(self, accession_numbers: Iterable[Optional[str]]) -> None:
+        """
+        Remembers filings as saved. Only call it once they are saved, so filings are
+        fetched again if saving them failed.
+
+        :param accession_numbers: Accession numbers of the saved filings
+        """
+        for accession_number in accession_numbers:
+            if accession_number is None:
+                continue
+            # Seeing an accession number again makes it the most recent
+            self._seen[accession_number] = None
+            self._seen.move_to_end(accession_number)
+            if len(self._seen) > self.max_seen_accession_numbers:
+                self._seen.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._seen)
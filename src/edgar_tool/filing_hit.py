@@ -0,0 +1,334 @@
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from edgar_tool.constants import TEXT_SEARCH_FORM_MAPPING, TEXT_SEARCH_LOCATIONS_MAPPING
+from edgar_tool.utils import unpack_singleton_list
+
+# Ticker(s) in parentheses at the end of an entity name, e.g. "Ouster, Inc.  (OUST, OUSTW)"
+_TICKER_PATTERN = re.compile(r"\(([A-Z\s,\-]+)\)+$")
+# Flat form type to title lookup, so parsing a row only does one dictionary lookup
+_FORM_TITLES = {
+    form: details.get("title", "") for form, details in TEXT_SEARCH_FORM_MAPPING.items()
+}
+_FILE_NUM_SEARCH_URL = (
+    "https://www.sec.gov/cgi-bin/browse-edgar/?filenum={}&action=getcompany"
+)
+_ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data/"
+
+
+# A field with several values is stored as a tuple, but a field with a single value,
+# which is the most common case, is stored as just the value to save memory
+Values = Union[str, Tuple[str, ...]]
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _pack(values: List[str]) -> Values:
+    # Dates, CIKs, names, form types and locations repeat across hits, so share one
+    # copy of each
+    if len(values) == 1 and type(values[0]) is str:
+        return sys.intern(values[0])
+    return tuple([_intern(value) for value in values])
+
+
+def _values(packed: Optional[Values]) -> Tuple[str, ...]:
+    # Values that were not packed are still in the list from the search response
+    return (packed,) if type(packed) is str else packed
+
+
+def _as_list(packed: Values) -> List[str]:
+    return [packed] if type(packed) is str else list(packed)
+
+
+def hit_fields_to_dict(
+    document_id: str,
+    adsh: str,
+    ciks: List[str],
+    root_forms: List[str],
+    filed_at: Optional[str],
+    reporting_for: Optional[str],
+    display_names: List[str],
+    biz_locations: List[str],
+    inc_states: List[str],
+    file_nums: List[str],
+    film_nums: Optional[List[str]],
+) -> Dict[str, Any]:
+    """
+    Builds the dictionary written to output files from the fields of a text search
+    hit, where lists with a single value are replaced by the value. Parsing a row
+    straight into a dictionary goes through here without building a
+    :class:`FilingHit`, which is only needed for compact records.
+
+    :return: Dictionary with the keys of :attr:`FilingHit.FIELD_NAMES`
+    """
+    ciks_trimmed = [cik.lstrip("0") for cik in ciks]
+    form_names = [_FORM_TITLES.get(form, "") for form in root_forms]
+
+    # Building URLs for filing details and documents
+    adsh_no_dash = adsh.replace("-", "")
+    filing_doc_urls = [
+        f"{_ARCHIVES_URL}{cik}/{adsh_no_dash}/{document_id}" for cik in ciks_trimmed
+    ]
+    if ciks_trimmed and adsh:
+        filing_details_urls = [
+            f"{_ARCHIVES_URL}{cik}/{adsh_no_dash}/{adsh}-index.html"
+            for cik in ciks_trimmed
+        ]
+        filing_details_urls = (
+            filing_details_urls[0]
+            if len(filing_details_urls) == 1
+            else filing_details_urls
+        )
+    else:
+        filing_details_urls = None
+
+    # Remove newlines and CIK from entity names, then split off their tickers
+    entity_names = []
+    tickers = []
+    for name in display_names:
+        name = name.replace("\n", "").rsplit("  (CIK ", maxsplit=1)[0]
+        ticker = _TICKER_PATTERN.search(name)
+        if ticker is not None:
+            tickers.append(ticker.group(1))
+            name = name[: ticker.start()] + name[ticker.end() :]
+        entity_names.append(name.strip())
+
+    locations = TEXT_SEARCH_LOCATIONS_MAPPING
+    places_of_business = []
+    for place in biz_locations:
+        city, separator, location = place.rpartition(", ")
+        places_of_business.append(
+            f"{city}, {locations.get(location)}" if separator else location
+        )
+
+    incorporated_locations = [locations.get(location) for location in inc_states]
+
+    return {
+        "root_form": root_forms[0] if len(root_forms) == 1 else root_forms,
+        "form_name": form_names[0] if len(form_names) == 1 else form_names,
+        "filed_at": filed_at,
+        "reporting_for": reporting_for,
+        "entity_name": entity_names[0] if len(entity_names) == 1 else entity_names,
+        "ticker": (
+            None if not tickers else tickers[0] if len(tickers) == 1 else tickers
+        ),
+        "company_cik": ciks[0] if len(ciks) == 1 else ciks,
+        "company_cik_trimmed": (
+            ciks_trimmed[0] if len(ciks_trimmed) == 1 else ciks_trimmed
+        ),
+        "place_of_business": (
+            places_of_business[0]
+            if len(places_of_business) == 1
+            else places_of_business
+        ),
+        "incorporated_location": (
+            incorporated_locations[0]
+            if len(incorporated_locations) == 1
+            else incorporated_locations
+        ),
+        "file_num": file_nums[0] if len(file_nums) == 1 else file_nums,
+        "file_num_search_url": (
+            _FILE_NUM_SEARCH_URL.format(file_nums[0])
+            if len(file_nums) == 1
+            else [_FILE_NUM_SEARCH_URL.format(file_num) for file_num in file_nums]
+        ),
+        "film_num": unpack_singleton_list(film_nums),
+        "filing_details_url": filing_details_urls,
+        "filing_document_url": (
+            filing_doc_urls[0] if len(filing_doc_urls) == 1 else filing_doc_urls
+        ),
+    }
+
+
+class FilingHit:
+    """
+    Compact record of a text search hit, using a fraction of the memory of the
+    dictionary returned by :meth:`to_dict`.
+
+    Only the values taken from the search response are stored, with repeated values
+    shared between hits. The entity names, tickers, locations and URLs are derived from
+    them when accessed. Fields that can have several values, such as ``ciks``, hold a
+    single string when there is only one value and a tuple otherwise. Use
+    :meth:`to_dict` to get the same dictionary that is written to CSV and JSON output
+    files.
+    """
+
+    __slots__ = (
+        "document_id",
+        "adsh",
+        "ciks",
+        "root_forms",
+        "filed_at",
+        "reporting_for",
+        "display_names",
+        "biz_locations",
+        "inc_states",
+        "file_nums",
+        "film_nums",
+    )
+
+    # Keys of the dictionary returned by to_dict, in order
+    FIELD_NAMES = (
+        "root_form",
+        "form_name",
+        "filed_at",
+        "reporting_for",
+        "entity_name",
+        "ticker",
+        "company_cik",
+        "company_cik_trimmed",
+        "place_of_business",
+        "incorporated_location",
+        "file_num",
+        "file_num_search_url",
+        "film_num",
+        "filing_details_url",
+        "filing_document_url",
+    )
+
+    def __init__(
+        self,
+        document_id: str,
+        adsh: str,
+        ciks: Values,
+        root_forms: Values,
+        filed_at: Optional[str],
+        reporting_for: Optional[str],
+        display_names: Values,
+        biz_locations: Values,
+        inc_states: Values,
+        file_nums: Values,
+        film_nums: Optional[Values],
+    ):
+        self.document_id = document_id
+        self.adsh = adsh
+        self.ciks = ciks
+        self.root_forms = root_forms
+        self.filed_at = filed_at
+        self.reporting_for = reporting_for
+        self.display_names = display_names
+        self.biz_locations = biz_locations
+        self.inc_states = inc_states
+        self.file_nums = file_nums
+        self.film_nums = film_nums
+
+    @classmethod
+    def from_hit(cls, row: Dict[str, Any]) -> "FilingHit":
+        """
+        :param row: Hit from the JSON response of a text search
+        :return: Record of the hit
+        """
+        _source = row.get("_source", {})
+        film_nums = _source.get("film_num")
+        return cls(
+            document_id=row.get("_id", "").rpartition(":")[2],
+            adsh=_source.get("adsh", ""),
+            ciks=_pack(_source.get("ciks")),
+            root_forms=_pack(_source.get("root_forms")),
+            filed_at=_intern(_source.get("file_date")),
+            reporting_for=_intern(_source.get("period_ending")),
+            display_names=_pack(_source.get("display_names", [])),
+            biz_locations=_pack(_source.get("biz_locations")),
+            inc_states=_pack(_source.get("inc_states")),
+            file_nums=_pack(_source.get("file_num", [])),
+            film_nums=None if film_nums is None else _pack(film_nums),
+        )
+
+    def __repr__(self) -> str:
+        return f"FilingHit(adsh={self.adsh!r}, document_id={self.document_id!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FilingHit):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    @property
+    def ciks_trimmed(self) -> List[str]:
+        return [cik.lstrip("0") for cik in _values(self.ciks)]
+
+    @property
+    def form_names(self) -> List[str]:
+        return [_FORM_TITLES.get(form, "") for form in _values(self.root_forms)]
+
+    def entity_names_and_tickers(self) -> Tuple[List[str], List[str]]:
+        """
+        :return: Names of the entities without their CIKs and tickers, and the tickers
+        """
+        entity_names = []
+        tickers = []
+        for name in _values(self.display_names):
+            name = name.replace("\n", "").rsplit("  (CIK ", maxsplit=1)[0]
+            ticker = _TICKER_PATTERN.search(name)
+            if ticker is not None:
+                tickers.append(ticker.group(1))
+                name = name[: ticker.start()] + name[ticker.end() :]
+            entity_names.append(name.strip())
+        return entity_names, tickers
+
+    @property
+    def places_of_business(self) -> List[str]:
+        places_of_business = []
+        for place in _values(self.biz_locations):
+            city, separator, location = place.rpartition(", ")
+            places_of_business.append(
+                f"{city}, {TEXT_SEARCH_LOCATIONS_MAPPING.get(location)}"
+                if separator
+                else location
+            )
+        return places_of_business
+
+    @property
+    def incorporated_locations(self) -> List[Optional[str]]:
+        return [
+            TEXT_SEARCH_LOCATIONS_MAPPING.get(state)
+            for state in _values(self.inc_states)
+        ]
+
+    @property
+    def file_num_search_urls(self) -> List[str]:
+        return [
+            _FILE_NUM_SEARCH_URL.format(file_num)
+            for file_num in _values(self.file_nums)
+        ]
+
+    @property
+    def filing_details_urls(self) -> Optional[List[str]]:
+        if not (_values(self.ciks) and self.adsh):
+            return None
+        adsh_no_dash = self.adsh.replace("-", "")
+        return [
+            f"{_ARCHIVES_URL}{cik}/{adsh_no_dash}/{self.adsh}-index.html"
+            for cik in self.ciks_trimmed
+        ]
+
+    @property
+    def filing_document_urls(self) -> List[str]:
+        adsh_no_dash = self.adsh.replace("-", "")
+        return [
+            f"{_ARCHIVES_URL}{cik}/{adsh_no_dash}/{self.document_id}"
+            for cik in self.ciks_trimmed
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: Dictionary with the fields written to output files, where lists with a
+          single value are replaced by the value, see :func:`hit_fields_to_dict`
+        """
+        return hit_fields_to_dict(
+            self.document_id,
+            self.adsh,
+            _as_list(self.ciks),
+            _as_list(self.root_forms),
+            self.filed_at,
+            self.reporting_for,
+            _as_list(self.display_names),
+            _as_list(self.biz_locations),
+            _as_list(self.inc_states),
+            _as_list(self.file_nums),
+            None if self.film_nums is None else _as_list(self.film_nums),
+        )
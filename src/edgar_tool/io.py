@@ -1,73 +1,548 @@
 import csv
+import gzip
+import hashlib
 import json
-from typing import Any, Dict, Iterator, List
+import os
+import sqlite3
+from datetime import date
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
 
 import jsonlines
 
-from edgar_tool.constants import SUPPORTED_OUTPUT_EXTENSIONS
+from edgar_tool.constants import (
+    COLUMNAR_DATE_FIELDS_NAMES,
+    COLUMNAR_DICTIONARY_FIELDS_NAMES,
+    COLUMNAR_LIST_FIELDS_NAMES,
+    COLUMNAR_OUTPUT_EXTENSIONS,
+    COLUMNAR_ROW_GROUP_SIZE,
+    COMPRESSION_SUFFIXES,
+    SQLITE_BATCH_SIZE,
+    SQLITE_INDEXED_FIELDS_NAMES,
+    SQLITE_OUTPUT_EXTENSIONS,
+    SQLITE_TABLE_NAME,
+    SUPPORTED_OUTPUT_EXTENSIONS,
+)
 
+# Same level as the gzip command line tool, the highest levels are much slower for
+# little gain
+GZIP_COMPRESSION_LEVEL = 6
 
-def write_results_to_file(
-    data: Iterator[Dict[str, Any]],
-    file_name: str,
-    field_names: List[str],
-) -> None:
+
+def _split_compression_suffix(file_name: str) -> Tuple[str, Optional[str]]:
+    """
+    :param file_name: Name of a file
+    :return: Name of the file in lower case without its compression suffix, and the
+      compression suffix if any
+    """
+    lower_file_name = file_name.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if lower_file_name.endswith(suffix):
+            return lower_file_name[: -len(suffix)], suffix
+    return lower_file_name, None
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Writing Zstandard compressed files requires zstandard. Install it with "
+            "`pip install edgar-tool[zstd]`."
+        ) from e
+    return zstandard
+
+
+def _open_text_file(file_name: str, mode: str, newline: Optional[str] = None) -> IO:
+    """
+    Opens a text file, compressing what is written to it if its name ends with one of
+    the COMPRESSION_SUFFIXES. Appending to a compressed file adds a new gzip member or
+    Zstandard frame to it, which decompressors read as the continuation of the file.
+
+    :param file_name: Name of the file
+    :param mode: "w" to replace the file or "a" to append to it
+    :param newline: How line endings are translated, see :func:`open`
+    :return: Text file object
+    """
+    _, compression = _split_compression_suffix(file_name)
+    if compression == ".gz":
+        return gzip.open(
+            file_name,
+            f"{mode}t",
+            compresslevel=GZIP_COMPRESSION_LEVEL,
+            encoding="utf-8",
+            newline=newline,
+        )
+    elif compression == ".zst":
+        return _import_zstandard().open(
+            file_name, f"{mode}t", encoding="utf-8", newline=newline
+        )
+    return open(file_name, mode, encoding="utf-8", newline=newline)
+
+
+class ResultsWriter:
+    """
+    Base class for writers that save results to a file batch by batch, so results can
+    be written as they arrive instead of being collected in memory first.
+    """
+
+    # Whether rows are appended to an existing file rather than replacing it, which
+    # allows an interrupted search to be resumed into the same file
+    supports_append = False
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        """
+        :param file_name: Name of the file to write to
+        :param field_names: List of field names to use as the header for the file
+        """
+        self.file_name = file_name
+        self.field_names = field_names
+        if _split_compression_suffix(file_name)[1] is not None:
+            # A compressed stream cut short by an interruption can't be continued, so
+            # compressed files are only appended to after being closed properly
+            self.supports_append = False
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Writes the given dictionaries to the file.
+
+        :param rows: Iterable of dictionaries to write
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Makes sure every row written so far has reached the disk."""
+
+    def close(self) -> None:
+        """Flushes and closes the file."""
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _CsvResultsWriter(ResultsWriter):
+    """
+    Writes dictionaries to a CSV file. Assumes all dictionaries have the same keys,
+    and that the keys are the column names. If file is already present, it appends the data to the file.
+
+    Only writes the header once, and then writes the rows.
+    """
+
+    supports_append = True
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        super().__init__(file_name, field_names)
+        is_empty = not os.path.exists(file_name) or os.path.getsize(file_name) == 0
+        self._file = _open_text_file(file_name, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=field_names)
+        if is_empty:
+            self._writer.writeheader()
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _JsonLinesResultsWriter(ResultsWriter):
+    """
+    Writes dictionaries to a JSON Lines file, appending to it if it already exists.
+    """
+
+    supports_append = True
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        super().__init__(file_name, field_names)
+        self._file = _open_text_file(file_name, "a")
+        self._writer = jsonlines.Writer(self._file)
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        self._writer.write_all(rows)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._writer.close()
+        self._file.close()
+
+
+_JSON_INDENT = 4
+_JSON_ROW_NEWLINE = "\n" + " " * _JSON_INDENT
+
+
+class _JsonResultsWriter(ResultsWriter):
+    """
+    Writes dictionaries as an array of dictionaries to a JSON file. Rows are written
+    one by one as they arrive, so neither the rows nor the whole document are ever held
+    in memory. The file is the same, byte for byte, as
+    ``json.dumps(rows, indent=4)``.
+    """
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        """
+        :param file_name: Name of the file to write to
+        :param field_names: List of field names, unused
+        """
+        super().__init__(file_name, field_names)
+        self._file = _open_text_file(file_name, "w")
+        self._is_empty = True
+        self._file.write("[")
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        write = self._file.write
+        for row in rows:
+            # Nest the row one level deeper. JSON strings can't contain line breaks, so
+            # every line break is between two lines of the row.
+            text = json.dumps(row, indent=_JSON_INDENT)
+            text = text.replace("\n", _JSON_ROW_NEWLINE)
+            if self._is_empty:
+                self._is_empty = False
+                write(_JSON_ROW_NEWLINE)
+            else:
+                write("," + _JSON_ROW_NEWLINE)
+            write(text)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if not self._is_empty:
+            self._file.write("\n")
+        self._file.write("]")
+        self._file.close()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Writing Parquet and Arrow files requires pyarrow. Install it with "
+            "`pip install edgar-tool[columnar]`."
+        ) from e
+    return pyarrow
+
+
+class _DictionaryEncoder:
+    """
+    Maps the values of a column to their index in a dictionary that only grows, so the
+    dictionary of every batch written extends the one of the previous batch.
+    """
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._indices: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        index = self._indices.get(value)
+        if index is None:
+            index = self._indices[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+def _to_string(value: Any) -> Optional[str]:
+    # Same text as the CSV writer would write for the value
+    return value if value is None or type(value) is str else str(value)
+
+
+def _to_date(value: Any) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+class _ColumnarResultsWriter(ResultsWriter):
+    """
+    Writes dictionaries to a Parquet or Arrow IPC (Feather) file with typed columns.
+    Rows are written COLUMNAR_ROW_GROUP_SIZE at a time, so only one row group is kept in
+    memory. Fields that can hold several values are list columns, dates are date
+    columns and fields whose values repeat across rows are dictionary encoded, see the
+    COLUMNAR_* constants.
+
+    The file can only be read once the writer is closed.
+    """
+
+    row_group_size = COLUMNAR_ROW_GROUP_SIZE
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        super().__init__(file_name, field_names)
+        self._pa = _import_pyarrow()
+        self._parquet = file_name.lower().endswith(".parquet")
+        self.schema = self._pa.schema(
+            [(name, self._column_type(name)) for name in field_names]
+        )
+        self._rows: List[Dict[str, Any]] = []
+        self._encoders = self._new_encoders()
+        if self._parquet:
+            import pyarrow.parquet
+
+            self._writer = pyarrow.parquet.ParquetWriter(
+                file_name, self.schema, compression="zstd"
+            )
+        else:
+            import pyarrow.ipc
+
+            self._writer = pyarrow.ipc.new_file(
+                file_name,
+                self.schema,
+                options=pyarrow.ipc.IpcWriteOptions(
+                    compression="zstd", emit_dictionary_deltas=True
+                ),
+            )
+
+    def _column_type(self, name: str):
+        pa = self._pa
+        if name in COLUMNAR_DATE_FIELDS_NAMES:
+            value_type = pa.date32()
+        elif name in COLUMNAR_DICTIONARY_FIELDS_NAMES:
+            value_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            value_type = pa.string()
+        return (
+            pa.list_(value_type) if name in COLUMNAR_LIST_FIELDS_NAMES else value_type
+        )
+
+    def _new_encoders(self) -> Dict[str, _DictionaryEncoder]:
+        return {
+            name: _DictionaryEncoder()
+            for name in self.field_names
+            if name in COLUMNAR_DICTIONARY_FIELDS_NAMES
+        }
+
+    def _column(self, name: str, values: List[Any]):
+        pa = self._pa
+        is_list = name in COLUMNAR_LIST_FIELDS_NAMES
+        if is_list:
+            # Lists are flattened into one array of values, with the offset of the
+            # first value of each list
+            offsets = [0]
+            mask = []
+            flat_values = []
+            for value in values:
+                if value is not None:
+                    flat_values.extend([value] if type(value) is str else value)
+                offsets.append(len(flat_values))
+                mask.append(value is None)
+            values = flat_values
+
+        if name in COLUMNAR_DATE_FIELDS_NAMES:
+            array = pa.array([_to_date(value) for value in values], pa.date32())
+        elif name in COLUMNAR_DICTIONARY_FIELDS_NAMES:
+            encoder = self._encoders[name]
+            indices = [
+                None if value is None else encoder.encode(_to_string(value))
+                for value in values
+            ]
+            array = pa.DictionaryArray.from_arrays(
+                pa.array(indices, pa.int32()), pa.array(encoder.values, pa.string())
+            )
+        else:
+            array = pa.array([_to_string(value) for value in values], pa.string())
+
+        if is_list:
+            array = pa.ListArray.from_arrays(
+                pa.array(offsets, pa.int32()), array, mask=pa.array(mask, pa.bool_())
+            )
+        return array
+
+    def _write_row_group(self, rows: List[Dict[str, Any]]) -> None:
+        if self._parquet:
+            # Every row group of a Parquet file has its own dictionaries
+            self._encoders = self._new_encoders()
+        batch = self._pa.record_batch(
+            [
+                self._column(name, [row.get(name) for row in rows])
+                for name in self.field_names
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self._rows.append(row)
+            if len(self._rows) >= self.row_group_size:
+                self._write_row_group(self._rows)
+                self._rows = []
+
+    def close(self) -> None:
+        if self._rows:
+            self._write_row_group(self._rows)
+            self._rows = []
+        self._writer.close()
+
+
+def _filing_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    :param row: Text search or RSS feed result
+    :return: Accession number and document ID of the filing the result is for. If they
+      are unknown, an empty accession number and a hash of the row instead, so that
+      saving the same row again still updates it.
+    """
+    if row.get("accession_number"):
+        # RSS feed results have one row per filing
+        return row["accession_number"], ""
+    urls = row.get("filing_document_url")
+    url = urls if urls is None or type(urls) is str else next(iter(urls), None)
+    # https://www.sec.gov/Archives/edgar/data/{cik}/{adsh without dashes}/{document ID}
+    parts = url.rsplit("/", 2) if url else []
+    if len(parts) == 3 and len(parts[1]) == 18 and parts[2]:
+        adsh, document_id = parts[1:]
+        return f"{adsh[:10]}-{adsh[10:12]}-{adsh[12:]}", document_id
+    row_json = json.dumps(row, sort_keys=True, default=str)
+    return "", hashlib.sha256(row_json.encode("utf-8")).hexdigest()
+
+
+def _to_sqlite_value(value: Any) -> Any:
+    # Lists are stored as JSON arrays, which can be queried with SQLite's json_each
+    return value if value is None or type(value) is str else json.dumps(value)
+
+
+class _SqliteResultsWriter(ResultsWriter):
+    """
+    Writes dictionaries to the SQLITE_TABLE_NAME table of a SQLite database, with one
+    TEXT column per field, keyed by the accession number and document ID of the filing.
+    Writing a filing that is already in the table updates its row instead of adding a
+    duplicate, so the results of overlapping searches can be written to the same
+    database. Rows are written SQLITE_BATCH_SIZE at a time, in one transaction per
+    batch, and the fields in SQLITE_INDEXED_FIELDS_NAMES are indexed.
+    """
+
+    supports_append = True
+
+    def __init__(self, file_name: str, field_names: List[str]):
+        super().__init__(file_name, field_names)
+        # Transactions are managed explicitly, one per batch of rows
+        self._connection = sqlite3.connect(file_name, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        columns = ", ".join(f'"{name}" TEXT' for name in field_names)
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE_NAME} ("
+            f"adsh TEXT, document_id TEXT, {columns}, "
+            "PRIMARY KEY (adsh, document_id))"
+        )
+        for name in SQLITE_INDEXED_FIELDS_NAMES:
+            if name in field_names:
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {SQLITE_TABLE_NAME}_{name} "
+                    f'ON {SQLITE_TABLE_NAME} ("{name}")'
+                )
+        quoted_names = ", ".join(f'"{name}"' for name in field_names)
+        updates = ", ".join(f'"{name}" = excluded."{name}"' for name in field_names)
+        self._upsert = (
+            f"INSERT INTO {SQLITE_TABLE_NAME} (adsh, document_id, {quoted_names}) "
+            f"VALUES ({', '.join(['?'] * (len(field_names) + 2))}) "
+            f"ON CONFLICT (adsh, document_id) DO UPDATE SET {updates}"
+        )
+
+    def _write_batch(self, batch: List[Tuple[Any, ...]]) -> None:
+        self._connection.execute("BEGIN")
+        try:
+            self._connection.executemany(self._upsert, batch)
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def write_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        batch = []
+        for row in rows:
+            batch.append(
+                (
+                    *_filing_key(row),
+                    *[_to_sqlite_value(row.get(name)) for name in self.field_names],
+                )
+            )
+            if len(batch) >= SQLITE_BATCH_SIZE:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def _results_writer_class(file_name: str) -> Type[ResultsWriter]:
     """
-    Writes the given generator of dictionaries to a file with the given name. The file type is inferred from the file
-    extension, and the data is written accordingly.
-    :param data: Iterator of iterators of dictionaries to write to the file
     :param file_name: Name of the file to write to
-    :param field_names: List of field names to use as the header for the CSV file
+    :return: ResultsWriter subclass for the file type, inferred from the file extension
     """
-    if file_name.lower().endswith(".csv"):
-        _write_results_to_csv(data, field_names, file_name)
-    elif file_name.lower().endswith(".jsonl"):
-        _write_results_to_jsonlines(data, file_name)
-    elif file_name.lower().endswith(".json"):
-        _write_results_to_json(data, file_name)
+    name, compression = _split_compression_suffix(file_name)
+    if name.endswith(".csv"):
+        return _CsvResultsWriter
+    elif name.endswith(".jsonl"):
+        return _JsonLinesResultsWriter
+    elif name.endswith(".json"):
+        return _JsonResultsWriter
+    elif compression is None and name.endswith(tuple(COLUMNAR_OUTPUT_EXTENSIONS)):
+        # Columnar files compress their own columns
+        return _ColumnarResultsWriter
+    elif compression is None and name.endswith(tuple(SQLITE_OUTPUT_EXTENSIONS)):
+        return _SqliteResultsWriter
     else:
         raise ValueError(
-            f"Unsupported file extension for destination file: {file_name} (should be one of {', '.join(SUPPORTED_OUTPUT_EXTENSIONS)})"
+            f"Unsupported file extension for destination file: {file_name} (should be one of {', '.join(SUPPORTED_OUTPUT_EXTENSIONS)}, and CSV and JSON files can be compressed by adding {' or '.join(COMPRESSION_SUFFIXES)})"
         )
-    print(f"Successfully wrote data to {file_name}.")
 
 
-def _write_results_to_json(data: Iterator[Dict[str, Any]], file_name: str) -> None:
+# Output files whose writers support append, for error messages
+APPENDABLE_OUTPUTS_DESCRIPTION = (
+    "uncompressed CSV and JSON Lines output files and SQLite databases"
+)
+
+
+def supports_append(file_name: str) -> bool:
     """
-    Writes the given generator of dictionaries as an array of dictionaries to a JSON file.
+    Tells whether the writer of a file would append rows to it, without opening it,
+    since opening a writer that doesn't append replaces the file.
 
-    :param data: Iterator of iterators of dictionaries to write to the JSON file
-    :param file_name: Name of the JSON Lines file to write to
+    :param file_name: Name of the file to write to
+    :return: Whether rows are appended to the file, see
+      :attr:`ResultsWriter.supports_append`
     """
-    with open(file_name, "w") as f:
-        f.write(json.dumps(data, indent=4))
+    return (
+        _results_writer_class(file_name).supports_append
+        and _split_compression_suffix(file_name)[1] is None
+    )
 
 
-def _write_results_to_jsonlines(data: Iterator[Dict[str, Any]], file_name: str) -> None:
+def open_results_writer(file_name: str, field_names: List[str]) -> ResultsWriter:
     """
-    Writes the given generator of dictionaries to a JSON Lines file. Assumes all dictionaries have the same keys.
+    Opens a writer for the file with the given name. The file type is inferred from the
+    file extension, and CSV and JSON files whose name ends with .gz or .zst are
+    compressed as they are written. SQLite databases are updated rather than appended
+    to, see :class:`_SqliteResultsWriter`.
 
-    :param data: Iterator of iterators of dictionaries to write to the JSON Lines file
-    :param file_name: Name of the JSON Lines file to write to
+    :param file_name: Name of the file to write to
+    :param field_names: List of field names to use as the header for the CSV file, or
+      the schema of columnar files
+    :return: ResultsWriter for the file, to be closed once all rows are written
     """
-    with jsonlines.open(file_name, mode="a") as writer:
-        writer.write_all(data)
+    return _results_writer_class(file_name)(file_name, field_names)
 
 
-def _write_results_to_csv(
-    data: Iterator[Dict[str, Any]], fields_names: List[str], file_name: str
+def write_results_to_file(
+    data: Iterator[Dict[str, Any]],
+    file_name: str,
+    field_names: List[str],
 ) -> None:
     """
-    Writes the given generator of dictionaries to a CSV file. Assumes all dictionaries have the same keys,
-    and that the keys are the column names. If file is already present, it appends the data to the file.
-
-    Only writes the header once, and then writes the rows.
-
-    :param data: Iterator of iterators of dictionaries to write to the CSV file
-    :param file_name: Name of the CSV file to write to
+    Writes the given generator of dictionaries to a file with the given name. The file type is inferred from the file
+    extension, and the data is written accordingly.
+    :param data: Iterator of dictionaries to write to the file
+    :param file_name: Name of the file to write to
+    :param field_names: List of field names to use as the header for the CSV file
     """
-    with open(file_name, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fields_names)
-        if f.tell() == 0:
-            writer.writeheader()
-        writer.writerows(data)
+    with open_results_writer(file_name, field_names) as writer:
+        writer.write_rows(data)
+    print(f"Successfully wrote data to {file_name}.")
@@ -0,0 +1,394 @@
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+# The SEC API limits us to max 10 requests per second. Let's be conservative.
+DEFAULT_REQUESTS_PER_SECOND = 9
+# Slowest rate the adaptive rate limiter backs off to
+MIN_REQUESTS_PER_SECOND = 0.5
+# Number of requests in a row that must succeed before the rate is increased
+SUCCESSES_BEFORE_INCREASE = 20
+# Longest pause after the SEC throttles us, unless it asks for a longer one
+MAX_BACKOFF_SECONDS = 60
+# HTTP status codes the SEC answers with when we send too many requests
+THROTTLED_STATUS_CODES = (429, 503)
+# State file shared by the rate limiters of every process on the host
+DEFAULT_SHARED_RATE_LIMIT_PATH = (
+    Path(tempfile.gettempdir()) / "edgar_tool_rate_limit.sqlite"
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses the value of a Retry-After header, which is either a number of seconds or
+    an HTTP date.
+
+    :param value: Value of the header, if the response had one
+    :return: Number of seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket limiting how many requests are sent per second.
+
+    Every request takes one token from the bucket, and tokens are added back at a
+    constant rate. When the bucket is empty, callers block until their token is due,
+    so any number of threads sharing one limiter together stay under the configured
+    rate.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: int = 1,
+    ):
+        """
+        :param requests_per_second: Number of tokens added back to the bucket per second
+        :param burst: Maximum number of tokens the bucket can hold, i.e. how many
+          requests can be sent back to back after a quiet period
+        """
+        if requests_per_second <= 0:
+            raise ValueError("Requests per second must be greater than 0.")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1.")
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = self._now()
+        # Reentrant, so subclasses can hold it around the base class methods
+        self._lock = threading.RLock()
+
+    def _now(self) -> float:
+        """:return: Current time in seconds, as measured by the bucket's clock"""
+        return time.monotonic()
+
+    def _reserve(self) -> float:
+        """
+        Takes a token from the bucket, going into debt if it is empty.
+
+        :return: Number of seconds the caller has to wait before using its token
+        """
+        with self._lock:
+            now = self._now()
+            elapsed = now - self._updated_at
+            self._tokens = min(
+                self.burst, self._tokens + elapsed * self.requests_per_second
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.requests_per_second
+
+    def acquire(self) -> float:
+        """
+        Blocks until the caller is allowed to send one request.
+
+        :return: Time the request is sent at, as measured by the bucket's clock
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return self._now()
+
+    def record_success(self) -> None:
+        """Called after a request was answered without being throttled."""
+
+    def record_throttled(
+        self, retry_after: Optional[float] = None, sent_at: Optional[float] = None
+    ) -> None:
+        """
+        Called after a request was throttled by the server.
+
+        :param retry_after: Number of seconds the server asked us to wait, if any
+        :param sent_at: Time the request was sent at, as returned by :meth:`acquire`,
+          if known
+        """
+
+
+class AdaptiveRateLimiter(TokenBucketRateLimiter):
+    """
+    Token bucket whose rate adapts to throttling by the server, following the additive
+    increase, multiplicative decrease (AIMD) scheme used by TCP congestion control.
+
+    Every throttling episode halves the rate and pauses every caller sharing the
+    limiter, for as long as the server asked with Retry-After or else for an
+    exponentially growing, randomly jittered delay. Responses throttled while the pause
+    is pending, or to requests sent before the rate was halved, belong to the same
+    episode: concurrent requests are often throttled together, and slowing down once
+    for each of them would drop the rate to its minimum. After a run of successful
+    requests, the rate is slowly increased again, up to the configured maximum.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: int = 1,
+        min_requests_per_second: float = MIN_REQUESTS_PER_SECOND,
+        increase_step: float = 0.5,
+        decrease_factor: float = 0.5,
+        backoff_base_seconds: float = 1.0,
+    ):
+        """
+        :param requests_per_second: Maximum rate, which is also the starting rate
+        :param burst: Maximum number of requests that can be sent back to back
+        :param min_requests_per_second: Rate never goes below this
+        :param increase_step: Requests per second added after a run of successes
+        :param decrease_factor: Rate is multiplied by this after a throttled request
+        :param backoff_base_seconds: Pause after the first throttled request without a
+          Retry-After header, doubled for every further throttled request in a row
+        """
+        super().__init__(requests_per_second, burst)
+        if not 0 < min_requests_per_second <= requests_per_second:
+            raise ValueError(
+                "Minimum requests per second must be greater than 0 and at most the "
+                "maximum."
+            )
+        if not 0 < decrease_factor < 1:
+            raise ValueError("Decrease factor must be between 0 and 1.")
+        self.max_requests_per_second = requests_per_second
+        self.min_requests_per_second = min_requests_per_second
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.backoff_base_seconds = backoff_base_seconds
+        self.throttled_count = 0
+        self._successes_in_a_row = 0
+        self._throttled_in_a_row = 0
+        # Times, on the bucket's clock, of the last decrease of the rate and of the end
+        # of the pause that came with it
+        self._decreased_at = 0.0
+        self._paused_until = 0.0
+
+    @property
+    def current_rate(self) -> float:
+        """Number of requests per second currently allowed."""
+        return self.requests_per_second
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._throttled_in_a_row = 0
+            self._successes_in_a_row += 1
+            if self._successes_in_a_row < SUCCESSES_BEFORE_INCREASE:
+                return
+            self._successes_in_a_row = 0
+            self._set_rate(
+                min(
+                    self.max_requests_per_second,
+                    self.requests_per_second + self.increase_step,
+                )
+            )
+
+    def record_throttled(
+        self, retry_after: Optional[float] = None, sent_at: Optional[float] = None
+    ) -> None:
+        with self._lock:
+            self.throttled_count += 1
+            self._successes_in_a_row = 0
+            now = self._now()
+            same_episode = now < self._paused_until or (
+                sent_at is not None and sent_at < self._decreased_at
+            )
+            if same_episode:
+                # Already slowed down for, only a longer Retry-After extends the pause
+                pause = retry_after or 0.0
+                self._set_rate(self.requests_per_second)
+            else:
+                self._throttled_in_a_row += 1
+                # Full jitter, so callers that were throttled together don't retry
+                # together
+                backoff = random.uniform(
+                    0,
+                    min(
+                        MAX_BACKOFF_SECONDS,
+                        self.backoff_base_seconds * 2 ** (self._throttled_in_a_row - 1),
+                    ),
+                )
+                pause = max(retry_after or 0.0, backoff)
+                self._set_rate(
+                    max(
+                        self.min_requests_per_second,
+                        self.requests_per_second * self.decrease_factor,
+                    )
+                )
+                self._decreased_at = now
+            # Going into debt makes every caller wait out the pause before its token,
+            # pauses of the same episode overlap rather than add up
+            self._tokens = min(self._tokens, -pause * self.requests_per_second)
+            self._paused_until = max(self._paused_until, now + pause)
+        if not same_episode:
+            print(
+                f"Requests are being throttled, pausing for {pause:.1f}s and slowing "
+                f"down to {self.requests_per_second:.2f} requests per second ..."
+            )
+
+    def _set_rate(self, requests_per_second: float) -> None:
+        # Settle the tokens earned at the old rate before switching to the new one
+        now = self._now()
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated_at) * self.requests_per_second,
+        )
+        self._updated_at = now
+        self.requests_per_second = requests_per_second
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """
+    Adaptive rate limiter shared by every process on the host that uses the same state
+    file, so that several edgar-tool processes running at once together stay under the
+    SEC's rate limit instead of each one using all of it.
+
+    The bucket's tokens and current rate are stored in a small SQLite database, and
+    every request takes its token in a transaction that locks the database. Throttling
+    seen by one process slows down all of them.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_SHARED_RATE_LIMIT_PATH,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        **kwargs: Any,
+    ):
+        """
+        :param path: Path of the SQLite database holding the shared state, created if
+          needed
+        :param requests_per_second: Maximum rate shared by all processes, which is also
+          the starting rate
+        :param kwargs: Keyword arguments passed on to :class:`AdaptiveRateLimiter`
+        """
+        super().__init__(requests_per_second, **kwargs)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions are managed explicitly, and only one thread at a time uses the
+        # connection since it is only used while holding the lock
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS bucket ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL, "
+            "requests_per_second REAL NOT NULL, "
+            "decreased_at REAL NOT NULL DEFAULT 0, "
+            "paused_until REAL NOT NULL DEFAULT 0)"
+        )
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            # State files created by older versions lack the throttling episode
+            columns = {
+                row[1] for row in self._connection.execute("PRAGMA table_info(bucket)")
+            }
+            for column in ("decreased_at", "paused_until"):
+                if column not in columns:
+                    self._connection.execute(
+                        f"ALTER TABLE bucket ADD COLUMN {column} REAL NOT NULL DEFAULT 0"
+                    )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO bucket "
+                "(id, tokens, updated_at, requests_per_second) VALUES (0, ?, ?, ?)",
+                (float(self.burst), self._now(), requests_per_second),
+            )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def _now(self) -> float:
+        # Monotonic clocks can't be compared between processes
+        return time.time()
+
+    @contextmanager
+    def _shared_state(self) -> Iterator[None]:
+        """Loads the shared state, and saves it back once the block has updated it."""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                (
+                    self._tokens,
+                    self._updated_at,
+                    self.requests_per_second,
+                    self._decreased_at,
+                    self._paused_until,
+                ) = self._connection.execute(
+                    "SELECT tokens, updated_at, requests_per_second, decreased_at, "
+                    "paused_until FROM bucket"
+                ).fetchone()
+                yield
+                self._connection.execute(
+                    "UPDATE bucket SET tokens = ?, updated_at = ?, "
+                    "requests_per_second = ?, decreased_at = ?, paused_until = ?",
+                    (
+                        self._tokens,
+                        self._updated_at,
+                        self.requests_per_second,
+                        self._decreased_at,
+                        self._paused_until,
+                    ),
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    @property
+    def current_rate(self) -> float:
+        with self._shared_state():
+            return self.requests_per_second
+
+    def _reserve(self) -> float:
+        with self._shared_state():
+            return super()._reserve()
+
+    def record_success(self) -> None:
+        with self._shared_state():
+            super().record_success()
+
+    def record_throttled(
+        self, retry_after: Optional[float] = None, sent_at: Optional[float] = None
+    ) -> None:
+        with self._shared_state():
+            super().record_throttled(retry_after, sent_at)
+
+    def close(self) -> None:
+        """Closes the connection to the shared state."""
+        self._connection.close()
+
+
+_default_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_default_rate_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter() -> AdaptiveRateLimiter:
+    """
+    Returns the process-wide rate limiter, creating it on first use. Transports share
+    it by default, so all requests sent by this process count against one budget and
+    all slow down together when the SEC throttles us.
+
+    :return: Shared AdaptiveRateLimiter instance
+    """
+    global _default_rate_limiter
+    with _default_rate_limiter_lock:
+        if _default_rate_limiter is None:
+            _default_rate_limiter = AdaptiveRateLimiter()
+    return _default_rate_limiter
@@ -0,0 +1,255 @@
+import codecs
+import gzip
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional
+
+import requests
+
+from edgar_tool.cache import normalize_url
+from edgar_tool.rate_limit import TokenBucketRateLimiter
+from edgar_tool.transport import Transport
+
+# Streamed bodies are copied to memory while recording up to this size, then to disk
+RECORDING_SPOOL_SIZE = 1024 * 1024
+# Size of the pieces a recorded body is copied to the archive in
+_ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+
+class _NoopRateLimiter(TokenBucketRateLimiter):
+    """Rate limiter that never waits, for transports that send no real requests."""
+
+    def acquire(self) -> float:
+        return self._now()
+
+
+def iter_archive(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the responses saved in an archive written by :class:`RecordingTransport`.
+
+    :param path: Path of the gzipped JSON Lines archive
+    :yield: Recorded responses, as dictionaries with ``url``, ``status``,
+      ``content_type`` and ``body`` keys
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may be cut short if the recording was killed mid-write
+                continue
+
+
+def build_response(
+    url: str, status: int, body: bytes, content_type: Optional[str] = None
+) -> requests.Response:
+    """
+    Builds a response object that behaves like one received from the network.
+
+    :param url: URL the response is for
+    :param status: HTTP status code
+    :param body: Response body
+    :param content_type: Value of the Content-Type header
+    :return: Response object
+    """
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response._content = body
+    # The body is already read, so iter_content() iterates over it
+    response._content_consumed = True
+    response.encoding = "utf-8"
+    if content_type:
+        response.headers["Content-Type"] = content_type
+    return response
+
+
+class _RecordingStream:
+    """
+    Wraps the raw body of a streamed response, copying every chunk the caller reads to a
+    spool file so the whole body can be archived once it has been read. The caller still
+    gets each chunk as soon as it arrives, and the body is never held in memory at once.
+    """
+
+    def __init__(self, raw: Any, on_finish: Callable[[BinaryIO], None]):
+        """
+        :param raw: Raw urllib3 response to read from
+        :param on_finish: Called with the spool file, rewound, once the body is read
+        """
+        self._raw = raw
+        self._on_finish = on_finish
+        self._body = tempfile.SpooledTemporaryFile(max_size=RECORDING_SPOOL_SIZE)
+        self._finished = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+    def stream(
+        self, amt: Optional[int] = 2**16, decode_content: Optional[bool] = None
+    ) -> Iterator[bytes]:
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                if not self._finished:
+                    self._body.write(chunk)
+                yield chunk
+        except Exception:
+            self._discard()
+            raise
+        self._finish()
+
+    def read(
+        self, amt: Optional[int] = None, decode_content: Optional[bool] = True, **kwargs
+    ) -> bytes:
+        # Bodies are archived decompressed, so reads are decompressed by default
+        try:
+            chunk = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        except Exception:
+            self._discard()
+            raise
+        if not self._finished:
+            self._body.write(chunk)
+        if amt is None or not chunk:
+            self._finish()
+        return chunk
+
+    def _finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self._body.seek(0)
+            self._on_finish(self._body)
+        finally:
+            self._body.close()
+
+    def _drain(self) -> None:
+        """Reads the rest of a body the caller stopped reading, so it is archived whole."""
+        if self._finished:
+            return
+        try:
+            for _ in self.stream(_ARCHIVE_CHUNK_SIZE, decode_content=True):
+                pass
+        except Exception:
+            # stream() has already discarded the body
+            pass
+
+    def _discard(self) -> None:
+        # A body cut short can't be replayed faithfully, so it isn't archived
+        self._finished = True
+        self._body.close()
+
+    def close(self) -> None:
+        self._drain()
+        self._raw.close()
+
+    def release_conn(self) -> None:
+        self._drain()
+        self._raw.release_conn()
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that sends real requests and saves every response to an archive, so a
+    search or RSS feed can later be replayed offline with :class:`ReplayTransport`.
+
+    The archive is a gzipped JSON Lines file with one line per response. Recording into
+    an existing archive adds to it.
+
+    Responses requested with ``stream=True`` are still streamed: their bodies are copied
+    to a spool file (in memory up to :data:`RECORDING_SPOOL_SIZE`, then on disk) as the
+    caller reads them, and archived once fully read. If the caller closes such a
+    response early, the rest of its body is downloaded so the archive holds all of it.
+    Streamed responses that are never closed nor read to the end are not archived.
+    """
+
+    def __init__(self, archive_path: Path, **kwargs: Any):
+        """
+        :param archive_path: Path of the archive to save responses to
+        :param kwargs: Keyword arguments passed on to :class:`Transport`
+        """
+        super().__init__(**kwargs)
+        self.archive_path = Path(archive_path)
+        self._archive = gzip.open(self.archive_path, "at", encoding="utf-8")
+        self._archive_lock = threading.Lock()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> requests.Response:
+        response = super().get(url, headers=headers, **kwargs)
+        entry = {
+            "url": normalize_url(url),
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type"),
+        }
+        if kwargs.get("stream") and response.raw is not None:
+            response.raw = _RecordingStream(
+                response.raw,
+                lambda body: self._write_entry(
+                    entry, iter(lambda: body.read(_ARCHIVE_CHUNK_SIZE), b"")
+                ),
+            )
+        else:
+            self._write_entry(entry, [response.content])
+        return response
+
+    def _write_entry(self, entry: Dict[str, Any], body: Iterable[bytes]) -> None:
+        """
+        Appends a response to the archive as a single line, copying its body piece by
+        piece so a large body is never decoded or escaped at once.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # Drops the closing brace, so the body can be added as the last key
+        head = json.dumps(entry)[:-1] + ', "body": "'
+        with self._archive_lock:
+            self._archive.write(head)
+            for chunk in body:
+                self._archive.write(json.dumps(decoder.decode(chunk))[1:-1])
+            self._archive.write(json.dumps(decoder.decode(b"", final=True))[1:-1])
+            self._archive.write('"}\n')
+
+    def close(self) -> None:
+        with self._archive_lock:
+            self._archive.close()
+        super().close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers requests from an archive written by
+    :class:`RecordingTransport` instead of the network, so searches can be run offline
+    and give the same results every time. Requests are not rate limited.
+
+    URLs that were not recorded get a 404 response. If a URL was recorded several times,
+    its responses are replayed in the order they were recorded, and the last one is
+    repeated after that.
+    """
+
+    def __init__(self, archive_path: Path, **kwargs: Any):
+        """
+        :param archive_path: Path of the archive to replay
+        :param kwargs: Keyword arguments passed on to :class:`Transport`
+        """
+        kwargs.setdefault("rate_limiter", _NoopRateLimiter())
+        super().__init__(**kwargs)
+        self.archive_path = Path(archive_path)
+        self._responses: Dict[str, list] = {}
+        for entry in iter_archive(self.archive_path):
+            self._responses.setdefault(entry["url"], []).append(entry)
+        self._replay_lock = threading.Lock()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> requests.Response:
+        self.rate_limiter.acquire()
+        with self._replay_lock:
+            entries = self._responses.get(normalize_url(url))
+            if not entries:
+                return build_response(url, 404, b"Not recorded")
+            entry = entries.pop(0) if len(entries) > 1 else entries[0]
+        return build_response(
+            url, entry["status"], entry["body"].encode("utf-8"), entry["content_type"]
+        )
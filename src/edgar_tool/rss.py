@@ -1,62 +1,92 @@
 import json
-import uuid
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Tuple
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+from xml.etree import ElementTree
 
-import requests
-import xmltodict
 from requests import Response
+from tenacity import retry
 
 from edgar_tool.constants import RSS_FEED_CSV_FIELDS_NAMES
+from edgar_tool.feed_state import RssFeedState
 from edgar_tool.io import write_results_to_file
+from edgar_tool.rate_limit import THROTTLED_STATUS_CODES
+from edgar_tool.text_search import ThrottledError, stop_retrying
+from edgar_tool.ticker_index import TickerIndex, load_ticker_index
+from edgar_tool.transport import (
+    Transport,
+    build_request_headers,
+    get_default_transport,
+)
 from edgar_tool.utils import safe_get, unpack_singleton_list
 
 RSS_FEED_DATA_DIRECTORY = Path(__file__).resolve().parents[1] / "data"
 RSS_FEED_URL = "https://www.sec.gov/Archives/edgar/xbrlrss.all.xml"
+# Tickers file saved by older versions, converted to the index when found
 RSS_COMPANY_TICKERS_FILE_PATH = RSS_FEED_DATA_DIRECTORY / "company_tickers.json"
+RSS_COMPANY_TICKERS_INDEX_PATH = RSS_FEED_DATA_DIRECTORY / "company_tickers.idx"
 RSS_COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
 UNKNOWN_TICKER_PLACEHOLDER = "UNKNOWN"
+# Monthly archives of the XBRL RSS feed, with every filing of the month
+RSS_MONTHLY_ARCHIVE_URL = (
+    "https://www.sec.gov/Archives/edgar/monthly/xbrlrss-{:%Y-%m}.xml"
+)
+# Month of the first monthly archive
+RSS_MONTHLY_ARCHIVE_START = date(2005, 4, 1)
+# Number of monthly archives fetched at the same time by default
+DEFAULT_BACKFILL_CONCURRENCY = 4
+# Items of a fetched monthly archive are kept in memory up to this size, then on disk
+RSS_MONTHLY_ARCHIVE_SPOOL_SIZE = 1024 * 1024
+# Size of the chunks of the RSS feed body fed to the XML parser as they are downloaded
+RSS_FEED_CHUNK_SIZE = 64 * 1024
 
 
 def _fetch_company_tickers(
-    request_headers: Dict[str, Any], refresh_tickers_mapping: bool
+    request_headers: Dict[str, Any],
+    refresh_tickers_mapping: bool,
+    transport: Optional[Transport] = None,
 ) -> None:
     """
     Fetch the company tickers file from SEC website and save it to the data directory
+    as a ticker index, see :class:`edgar_tool.ticker_index.TickerIndex`
 
     :param request_headers: headers to use for the request
     :param refresh_tickers_mapping: whether to refresh the tickers mapping file or not
+    :param transport: transport to send the request through, defaults to the shared one
     """
 
-    # If tickers file is not present or refresh is requested, download the tickers file
-    if not RSS_COMPANY_TICKERS_FILE_PATH.exists() or refresh_tickers_mapping:
-        print(f"Downloading tickers file at {RSS_COMPANY_TICKERS_URL} ...")
-        response = requests.get(RSS_COMPANY_TICKERS_URL, headers=request_headers)
-        response.raise_for_status()
-        mapping = response.json()
-        cik_to_company_mapping = {}
-        # Transform the tickers file data to {CIK: [tickers]} format
-        print("Transforming tickers file to make it more easily usable ...")
-        for _, company_data in mapping.items():
-            if cik_to_company_mapping.get(company_data["cik_str"]) is None:
-                cik_to_company_mapping[company_data["cik_str"]] = [
-                    company_data["ticker"]
-                ]
-            else:
-                cik_to_company_mapping[company_data["cik_str"]].append(
-                    company_data["ticker"]
-                )
-        with open(RSS_COMPANY_TICKERS_FILE_PATH, "wb") as file:
-            file.write(
-                json.dumps(cik_to_company_mapping, indent=4, sort_keys=True).encode(
-                    "utf-8"
-                )
-            )
-        print(f"Successfully saved tickers file to {RSS_COMPANY_TICKERS_FILE_PATH}.")
-    else:
+    if RSS_COMPANY_TICKERS_INDEX_PATH.exists() and not refresh_tickers_mapping:
         print(
             "Company tickers file found and no refresh requested, skipping download ..."
         )
+        return
+
+    # Tickers files saved by older versions are converted instead of downloaded again
+    if RSS_COMPANY_TICKERS_FILE_PATH.exists() and not refresh_tickers_mapping:
+        print(f"Converting tickers file {RSS_COMPANY_TICKERS_FILE_PATH} ...")
+        with open(RSS_COMPANY_TICKERS_FILE_PATH) as file:
+            index = TickerIndex.from_mapping(json.load(file))
+    else:
+        print(f"Downloading tickers file at {RSS_COMPANY_TICKERS_URL} ...")
+        transport = transport or get_default_transport()
+        response = transport.get(RSS_COMPANY_TICKERS_URL, headers=request_headers)
+        response.raise_for_status()
+        index = TickerIndex.from_company_tickers(response.json())
+    index.save(RSS_COMPANY_TICKERS_INDEX_PATH)
+    print(f"Successfully saved tickers file to {RSS_COMPANY_TICKERS_INDEX_PATH}.")
 
 
 def resolve_item_cik_and_ticker(
@@ -125,16 +155,137 @@ def resolve_item_fields(
     # Process files URLs
     files_urls = safe_get(item, "edgar:xbrlFiling", "edgar:xbrlFiles", "edgar:xbrlFile")
 
+    if isinstance(files_urls, dict):
+        # A single file is not wrapped in a list
+        files_urls = [files_urls]
     files_urls = unpack_singleton_list([f.get("@edgar:url") for f in files_urls])
     parsed_line["xbrl_files"] = files_urls
 
     return parsed_line
 
 
+def _element_to_dict(
+    element: ElementTree.Element,
+    prefixes: Dict[str, str],
+    declarations: Dict[ElementTree.Element, List[Tuple[str, str]]],
+) -> Any:
+    """
+    Converts an XML element the same way as :func:`xmltodict.parse`, with the default
+    options: attributes are keys starting with "@", repeated children are lists, text
+    next to attributes or children is under "#text", and elements with neither are
+    their text, or None if they are empty.
+
+    :param element: Element to convert
+    :param prefixes: Prefix of each namespace URI, to write names as they appear in the
+      XML, e.g. "edgar:url" instead of "{https://www.sec.gov/Archives/edgar}url"
+    :param declarations: Namespaces declared by elements, which xmltodict keeps as
+      "@xmlns:<prefix>" attributes
+    :return: Value of the element
+    """
+
+    def name(tag: str) -> str:
+        if tag[0] != "{":
+            return tag
+        uri, _, local_name = tag[1:].partition("}")
+        prefix = prefixes.get(uri)
+        return f"{prefix}:{local_name}" if prefix else local_name
+
+    result: Dict[str, Any] = {}
+    for prefix, uri in declarations.get(element, ()):
+        result[f"@xmlns:{prefix}" if prefix else "@xmlns"] = uri
+    for key, value in element.attrib.items():
+        result[f"@{name(key)}"] = value
+    texts = [element.text] if element.text else []
+    for child in element:
+        key = name(child.tag)
+        value = _element_to_dict(child, prefixes, declarations)
+        if key not in result:
+            result[key] = value
+        elif isinstance(result[key], list):
+            result[key].append(value)
+        else:
+            result[key] = [result[key], value]
+        if child.tail:
+            texts.append(child.tail)
+    text = "".join(texts).strip() or None
+    if not result:
+        return text
+    if text is not None:
+        result["#text"] = text
+    return result
+
+
+def iter_rss_items(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Parses an RSS feed incrementally, yielding each item as soon as it has been read,
+    so items can be processed while the rest of the feed is still downloading. Items
+    are discarded once yielded, so only one is kept in memory at a time.
+
+    :param chunks: Chunks of the XML body of the feed, e.g. from
+      :meth:`requests.Response.iter_content`
+    :return: Iterator of the items of the feed, in the same format as
+      ``xmltodict.parse(body)["rss"]["channel"]["item"]``
+    """
+    parser = ElementTree.XMLPullParser(events=("start-ns", "start", "end"))
+    prefixes: Dict[str, str] = {}
+    declarations: Dict[ElementTree.Element, List[Tuple[str, str]]] = {}
+    pending_declarations: List[Tuple[str, str]] = []
+    path: List[ElementTree.Element] = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, value in parser.read_events():
+            if event == "start-ns":
+                prefix, uri = value
+                prefixes[uri] = prefix
+                pending_declarations.append(value)
+            elif event == "start":
+                if pending_declarations:
+                    declarations[value] = pending_declarations
+                    pending_declarations = []
+                path.append(value)
+            else:
+                path.pop()
+                # Items are children of the channel, itself a child of the root
+                if len(path) == 2 and value.tag == "item":
+                    yield _element_to_dict(value, prefixes, declarations)
+                    path[-1].remove(value)
+                    for element in value.iter():
+                        declarations.pop(element, None)
+    parser.close()
+
+
+def _matched_tickers_by_cik(
+    tickers: List[str], tickers_mapping: Mapping[str, List[str]]
+) -> Dict[str, str]:
+    """
+    :param tickers: list of tickers to filter the parsed data with
+    :param tickers_mapping: mapping of CIK numbers to company tickers
+    :return: mapping of the CIK numbers of the given tickers to the first of their
+      tickers found in the list
+    """
+
+    tickers_set = set(tickers)
+    if isinstance(tickers_mapping, TickerIndex):
+        # Only look at the companies of the given tickers
+        ciks: Iterable[str] = {
+            cik for x in tickers_set for cik in tickers_mapping.ciks_for_ticker(x)
+        }
+    else:
+        ciks = tickers_mapping.keys()
+    matched_tickers_by_cik = {}
+    for cik in ciks:
+        matched_ticker = next(
+            (x for x in tickers_mapping[cik] if x in tickers_set), None
+        )
+        if matched_ticker is not None:
+            matched_tickers_by_cik[cik] = matched_ticker
+    return matched_tickers_by_cik
+
+
 def parse_rss_feed_data(
     response: Response,
     tickers: List[str],
-    tickers_mapping: Dict[str, List[str]],
+    tickers_mapping: Mapping[str, List[str]],
 ) -> Iterator[Dict[str, Any]]:
     """
     Parse the RSS feed data and yield the parsed data for each item
@@ -147,8 +298,14 @@ def parse_rss_feed_data(
     :return: Iterator of parsed dicts for each item in the RSS feed
     """
 
-    # Parse RSS feed data and get all items
-    items = xmltodict.parse(response.content)["rss"]["channel"]["item"]
+    # Resolve the tickers to CIK numbers once, so that items are filtered with a
+    # single lookup whatever the number of tickers
+    matched_tickers_by_cik = (
+        _matched_tickers_by_cik(tickers, tickers_mapping) if tickers else None
+    )
+
+    # Parse the RSS feed items one by one as the feed is downloaded
+    items = iter_rss_items(response.iter_content(chunk_size=RSS_FEED_CHUNK_SIZE))
     for i in items:
 
         try:
@@ -158,20 +315,19 @@ def parse_rss_feed_data(
                 resolve_item_cik_and_ticker(i, tickers_mapping)
             )
 
-            # If tickers are provided by user, skip the current item if it doesn't match any of the specified tickers
-            if tickers and not any(
-                x for x in matching_tickers_for_item_cik if x in tickers
-            ):
-                continue
-
-            # If tickers are provided by user, try extracting the matched ticker from the tickers mapping
-            # If no matched ticker is found or no tickers are provided by user, concatenate the matching tickers
-            # for the current CIK into a single string, if no matching tickers are found, use UNKNOWN as placeholder
-            matched_ticker_str = (
-                next((x for x in matching_tickers_for_item_cik if x in tickers), None)
-                or "/".join(matching_tickers_for_item_cik)
-                or UNKNOWN_TICKER_PLACEHOLDER
-            )
+            # If tickers are provided by user, skip the current item if it doesn't match any of the specified tickers,
+            # otherwise use the matched ticker
+            # If no tickers are provided by user, concatenate the matching tickers for the current CIK into a single
+            # string, if no matching tickers are found, use UNKNOWN as placeholder
+            if matched_tickers_by_cik is not None:
+                matched_ticker_str = matched_tickers_by_cik.get(trimmed_cik)
+                if matched_ticker_str is None:
+                    continue
+            else:
+                matched_ticker_str = (
+                    "/".join(matching_tickers_for_item_cik)
+                    or UNKNOWN_TICKER_PLACEHOLDER
+                )
 
             # Parse the current item
             parsed_item = resolve_item_fields(i, cik, trimmed_cik, matched_ticker_str)
@@ -184,10 +340,76 @@ def parse_rss_feed_data(
             )
 
 
+def _load_tickers_mapping(
+    headers: Dict[str, Any],
+    refresh_tickers_mapping: bool,
+    transport: Transport,
+) -> TickerIndex:
+    """
+    :param headers: headers to use for the request
+    :param refresh_tickers_mapping: whether to refresh the tickers mapping file or not
+    :param transport: transport to send the request through
+    :return: mapping of CIK numbers to company tickers, kept in memory between calls
+      as long as the file doesn't change
+    """
+
+    # Create the data directory if it doesn't exist
+    RSS_FEED_DATA_DIRECTORY.mkdir(parents=True, exist_ok=True)
+
+    # Fetch the company tickers file if needed/requested
+    _fetch_company_tickers(headers, refresh_tickers_mapping, transport=transport)
+
+    return load_ticker_index(RSS_COMPANY_TICKERS_INDEX_PATH)
+
+
+def load_tickers_mapping(
+    refresh_tickers_mapping: bool = False, transport: Optional[Transport] = None
+) -> TickerIndex:
+    """
+    Load the mapping of CIK numbers to company tickers, downloading it first if it is
+    missing or a refresh is requested
+
+    :param refresh_tickers_mapping: whether to refresh the tickers mapping file or not
+    :param transport: transport to send the request through, defaults to the shared one
+    :return: mapping of CIK numbers to company tickers
+    """
+
+    return _load_tickers_mapping(
+        build_request_headers(),
+        refresh_tickers_mapping,
+        transport or get_default_transport(),
+    )
+
+
+def _new_filings(
+    items: Iterable[Dict[str, Any]],
+    state: RssFeedState,
+    new_accession_numbers: List[Optional[str]],
+) -> Iterator[Dict[str, Any]]:
+    """
+    :param items: parsed items of the RSS feed
+    :param state: state of previous fetches
+    :param new_accession_numbers: list the accession numbers of the yielded items are
+      added to
+    :return: Iterator of the items not saved by previous fetches
+    """
+    yielded = set()
+    for item in items:
+        accession_number = item.get("accession_number")
+        if not state.is_new(accession_number) or accession_number in yielded:
+            continue
+        if accession_number is not None:
+            yielded.add(accession_number)
+        new_accession_numbers.append(accession_number)
+        yield item
+
+
 def fetch_rss_feed(
     tickers: List[str],
     output_file: str,
     refresh_tickers_mapping: bool,
+    transport: Optional[Transport] = None,
+    state: Optional[RssFeedState] = None,
 ) -> None:
     """
     Fetch the latest RSS feed data for the given company tickers and save it to either a CSV, JSON, or JSONLines file.
@@ -195,42 +417,239 @@ def fetch_rss_feed(
     :param tickers: list of company tickers to filter the RSS feed for
     :param output_file: name of the output file to save the results to
     :param refresh_tickers_mapping: whether to refresh the tickers mapping file or not
+    :param transport: transport to send the requests through, defaults to the shared one
+    :param state: state of previous fetches when polling the feed. If given, the feed
+      is only downloaded if it changed since the last fetch, and only filings that were
+      not saved yet are saved. The state is updated and saved once the feed is saved.
     """
 
-    # Create the data directory if it doesn't exist
-    RSS_FEED_DATA_DIRECTORY.mkdir(parents=True, exist_ok=True)
+    transport = transport or get_default_transport()
 
     # Uppercase and print the tickers to be fetched
     tickers = [x.upper() for x in tickers]
     print(f"Fetching RSS feed for tickers: {', '.join(tickers)}")
 
     # Create a User-Agent header
-    headers = {
-        "User-Agent": f"BellingcatEDGARTool_{uuid.uuid4()} contact-tech@bellingcat.com"
-    }
+    headers = build_request_headers()
 
-    # Fetch the company tickers file if needed/requested
-    _fetch_company_tickers(headers, refresh_tickers_mapping)
-
-    # Load the JSON file for CIK numbers
-    with open(RSS_COMPANY_TICKERS_FILE_PATH) as file:
-        cik_to_ticker_mapping = json.load(file)
+    cik_to_ticker_mapping = _load_tickers_mapping(
+        headers, refresh_tickers_mapping, transport
+    )
 
-    # Fetch the RSS feed
+    # Fetch the RSS feed, unless it didn't change since the last fetch
     print(f"Fetching RSS feed from {RSS_FEED_URL}...")
-    response = requests.get(RSS_FEED_URL, headers=headers)
-    response.raise_for_status()
-
-    # Parse the RSS feed data
-    print("Parsing RSS feed XML data...")
-    parsed_feed: Iterator[Dict[str, Any]] = parse_rss_feed_data(
-        response,
-        tickers,
-        cik_to_ticker_mapping,
+    if state is not None:
+        headers = {**headers, **state.conditional_headers()}
+    # The body is streamed, so items are parsed and saved while it downloads
+    with transport.get(RSS_FEED_URL, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            print("RSS feed has not changed since the last fetch, skipping it.")
+            return
+        response.raise_for_status()
+
+        # Parse the RSS feed data
+        print("Parsing RSS feed XML data...")
+        parsed_feed: Iterator[Dict[str, Any]] = parse_rss_feed_data(
+            response,
+            tickers,
+            cik_to_ticker_mapping,
+        )
+        saved_accession_numbers: List[Optional[str]] = []
+        if state is not None:
+            # Skip the filings saved by previous fetches, and keep track of the new
+            # ones to remember them once they are all saved
+            parsed_feed = _new_filings(parsed_feed, state, saved_accession_numbers)
+
+        # Store the parsed data, item by item as it is parsed
+        print(f"Saving RSS feed data to {output_file}...")
+        write_results_to_file(parsed_feed, output_file, RSS_FEED_CSV_FIELDS_NAMES)
+
+    if state is not None:
+        # Only remember the feed once all of its new filings are saved, so they are
+        # fetched again if saving them failed
+        state.remember(saved_accession_numbers)
+        state.update_validators(response)
+        state.save()
+
+
+def iter_months(start_month: date, end_month: date) -> Iterator[date]:
+    """
+    :param start_month: any day of the first month
+    :param end_month: any day of the last month
+    :return: Iterator of the first day of every month from start_month to end_month,
+      both included
+    """
+    year, month = start_month.year, start_month.month
+    while (year, month) <= (end_month.year, end_month.month):
+        yield date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+@retry(
+    stop=stop_retrying,
+    reraise=True,
+)
+def _fetch_monthly_archive(
+    month: date,
+    tickers: List[str],
+    tickers_mapping: Dict[str, List[str]],
+    headers: Dict[str, Any],
+    transport: Transport,
+) -> IO[str]:
+    """
+    Fetches and parses the RSS feed archive of a month, and saves its items to a
+    temporary file, in memory up to RSS_MONTHLY_ARCHIVE_SPOOL_SIZE and on disk after
+    that, so months fetched ahead of the one being saved don't pile up in memory.
+    Failed requests are retried like :func:`edgar_tool.text_search.fetch_page` does,
+    throttled ones once the transport's rate limiter has backed off. Each attempt starts
+    the month over, so items of a failed attempt are not saved twice.
+
+    :param month: first day of the month
+    :param tickers: list of tickers to filter the parsed data with
+    :param tickers_mapping: mapping of CIK numbers to company tickers
+    :param headers: headers to use for the request
+    :param transport: transport to send the request through
+    :return: Temporary file, rewound, with one JSON line per item of the month matching
+      the tickers, see :func:`_iter_saved_items`
+    """
+    url = RSS_MONTHLY_ARCHIVE_URL.format(month)
+    print(f"Fetching RSS feed archive for {month:%Y-%m} from {url}...")
+    items = tempfile.SpooledTemporaryFile(
+        max_size=RSS_MONTHLY_ARCHIVE_SPOOL_SIZE, mode="w+", encoding="utf-8"
+    )
+    try:
+        with transport.get(url, headers=headers, stream=True) as response:
+            if response.status_code in THROTTLED_STATUS_CODES:
+                raise ThrottledError(
+                    f"Error for url {url}, with code {response.status_code}"
+                )
+            if response.status_code == 404:
+                print(f"No RSS feed archive found for {month:%Y-%m}, skipping it.")
+            else:
+                response.raise_for_status()
+                for item in parse_rss_feed_data(response, tickers, tickers_mapping):
+                    items.write(json.dumps(item) + "\n")
+        items.seek(0)
+        return items
+    except BaseException:
+        items.close()
+        raise
+
+
+def _iter_saved_items(items: IO[str]) -> Iterator[Dict[str, Any]]:
+    """
+    :param items: temporary file returned by :func:`_fetch_monthly_archive`, closed
+      once read
+    :return: Iterator of the items saved to the file
+    """
+    with items:
+        for line in items:
+            yield json.loads(line)
+
+
+def _close_saved_items(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _iter_monthly_archives(
+    months: List[date],
+    tickers: List[str],
+    tickers_mapping: Dict[str, List[str]],
+    headers: Dict[str, Any],
+    transport: Transport,
+    concurrency: int,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Fetches the archives of the given months, up to concurrency at a time, and yields
+    their items month by month in order.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = deque()
+        try:
+            for month in months:
+                in_flight.append(
+                    executor.submit(
+                        _fetch_monthly_archive,
+                        month,
+                        tickers,
+                        tickers_mapping,
+                        headers,
+                        transport,
+                    )
+                )
+                if len(in_flight) >= concurrency:
+                    yield from _iter_saved_items(in_flight.popleft().result())
+            while in_flight:
+                yield from _iter_saved_items(in_flight.popleft().result())
+        finally:
+            # Don't fetch the remaining months if saving the items failed, and discard
+            # the items of the months already being fetched
+            for future in in_flight:
+                if not future.cancel():
+                    future.add_done_callback(_close_saved_items)
+
+
+def backfill_rss_feed(
+    tickers: List[str],
+    output_file: str,
+    start_month: date,
+    end_month: date,
+    refresh_tickers_mapping: bool = False,
+    concurrency: int = DEFAULT_BACKFILL_CONCURRENCY,
+    transport: Optional[Transport] = None,
+) -> None:
+    """
+    Fetch the monthly archives of the RSS feed between two months for the given
+    company tickers, and save their filings to a single file, oldest month first.
+
+    Several months are fetched at the same time, with requests still going through the
+    transport's rate limiter, and each archive is parsed while it downloads. Filings
+    listed in several archives are only saved once.
+
+    :param tickers: list of company tickers to filter the RSS feed for
+    :param output_file: name of the output file to save the results to
+    :param start_month: any day of the first month to fetch
+    :param end_month: any day of the last month to fetch
+    :param refresh_tickers_mapping: whether to refresh the tickers mapping file or not
+    :param concurrency: maximum number of monthly archives fetched at the same time
+    :param transport: transport to send the requests through, defaults to the shared one
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1.")
+    start_month = max(start_month, RSS_MONTHLY_ARCHIVE_START)
+    months = list(iter_months(start_month, end_month))
+    if not months:
+        raise ValueError(
+            f"No monthly RSS feed archive between {start_month:%Y-%m} and "
+            f"{end_month:%Y-%m}, archives start in "
+            f"{RSS_MONTHLY_ARCHIVE_START:%Y-%m}."
+        )
+
+    transport = transport or get_default_transport()
+    tickers = [x.upper() for x in tickers]
+    print(
+        f"Backfilling RSS feed from {months[0]:%Y-%m} to {months[-1]:%Y-%m} for "
+        f"tickers: {', '.join(tickers)}"
     )
+    headers = build_request_headers()
+    cik_to_ticker_mapping = _load_tickers_mapping(
+        headers, refresh_tickers_mapping, transport
+    )
+
+    seen_accession_numbers = set()
+
+    def deduplicated(items: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for item in items:
+            accession_number = item.get("accession_number")
+            if accession_number is not None:
+                if accession_number in seen_accession_numbers:
+                    continue
+                seen_accession_numbers.add(accession_number)
+            yield item
 
-    # Store the parsed data (simulating a generator to reuse the write_results_to_file function used in text search)
-    print(f"Saving RSS feed data to {output_file}...")
-    write_results_to_file(
-        (parsed_feed for _ in range(1)), output_file, RSS_FEED_CSV_FIELDS_NAMES
+    items = _iter_monthly_archives(
+        months, tickers, cik_to_ticker_mapping, headers, transport, concurrency
     )
+    print(f"Saving RSS feed archives to {output_file}...")
+    write_results_to_file(deduplicated(items), output_file, RSS_FEED_CSV_FIELDS_NAMES)
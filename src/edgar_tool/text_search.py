@@ -1,20 +1,53 @@
-import re
-import uuid
-from typing import Any, Dict, Iterator, List
+import asyncio
+import datetime
+import math
+import typing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import pydantic
-import requests
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import RetryCallState, retry
 
+from edgar_tool.checkpoint import SearchCheckpoint
 from edgar_tool.constants import (
+    PEO_IN_AND_INC_IN_TO_SEC_FORM_ID,
     TEXT_SEARCH_CSV_FIELDS_NAMES,
-    TEXT_SEARCH_FORM_MAPPING,
-    TEXT_SEARCH_LOCATIONS_MAPPING,
+    TEXT_SEARCH_MAX_FILTER_VALUES_PER_SEARCH,
+    TEXT_SEARCH_MAX_PAGINATED_RESULTS,
+    TEXT_SEARCH_SPLIT_BATCHES_NUMBER,
+    TEXT_SEARCH_TARGET_RESULTS_PER_DATE_RANGE,
+    FilingLiteral,
+)
+from edgar_tool.filing_hit import FilingHit, hit_fields_to_dict
+from edgar_tool.io import (
+    APPENDABLE_OUTPUTS_DESCRIPTION,
+    open_results_writer,
+    supports_append,
 )
-from edgar_tool.io import write_results_to_file
+from edgar_tool.rate_limit import THROTTLED_STATUS_CODES
 from edgar_tool.search_params import SearchParams
+from edgar_tool.transport import (
+    Transport,
+    build_request_headers,
+    get_default_transport,
+)
 from edgar_tool.url_generator import generate_search_url_for_kwargs
-from edgar_tool.utils import split_date_range_in_half, unpack_singleton_list
+from edgar_tool.utils import (
+    split_date_range_by_density,
+    split_date_range_in_half,
+)
 
 
 def _parse_row(row: Dict[str, Any]) -> Dict[str, Any]:
@@ -24,125 +57,50 @@ def _parse_row(row: Dict[str, Any]) -> Dict[str, Any]:
     :param row: Table row to parse
     :return: Dictionary representing the parsed table row
     """
-    _id = row.get("_id", "").split(":")[-1]
     _source = row.get("_source", {})
-
-    # Fetching file numbers and links
-    file_nums = _source.get("file_num", [])
-    file_nums_search_urls = [
-        f"https://www.sec.gov/cgi-bin/browse-edgar/?filenum={file_num}&action=getcompany"
-        for file_num in file_nums
-    ]
-
-    # Fetching film numbers
-    film_nums = _source.get("film_num")
-
-    # Fetching and cleaning CIKs
-    ciks = _source.get("ciks")
-    ciks_trimmed: List[str] = [c.lstrip("0") for c in ciks]
-
-    # Get form and human readable name
-    root_forms = _source.get("root_forms")
-    form_name = [
-        TEXT_SEARCH_FORM_MAPPING.get(form, {}).get("title", "") for form in root_forms
-    ]
-    root_forms = unpack_singleton_list(root_forms)
-    form_name = unpack_singleton_list(form_name)
-
-    # Build adsh for url
-    data_adsh = _source.get("adsh", "")
-    data_adsh_no_dash = data_adsh.replace("-", "")
-
-    # Building URLs for filing details and documents
-    filing_details_urls: List[str] = [
-        f"https://www.sec.gov/Archives/edgar/data/{cik}/{data_adsh_no_dash}/{data_adsh}-index.html"
-        for cik in ciks_trimmed
-    ]
-    filing_details_urls: str = (
-        unpack_singleton_list(filing_details_urls)
-        if (ciks_trimmed and data_adsh)
-        else None
+    return hit_fields_to_dict(
+        row.get("_id", "").rpartition(":")[2],
+        _source.get("adsh", ""),
+        _source.get("ciks"),
+        _source.get("root_forms"),
+        _source.get("file_date"),
+        _source.get("period_ending"),
+        _source.get("display_names", []),
+        _source.get("biz_locations"),
+        _source.get("inc_states"),
+        _source.get("file_num", []),
+        _source.get("film_num"),
     )
-    filing_doc_urls: List[str] = [
-        f"https://www.sec.gov/Archives/edgar/data/{cik}/{data_adsh_no_dash}/{_id}"
-        for cik in ciks_trimmed
-    ]
-    filing_doc_urls: str = unpack_singleton_list(filing_doc_urls)
-
-    filed_at = _source.get("file_date")
-    end_date = _source.get("period_ending")
-    entity_names = [
-        name.replace("\n", "").rsplit("  (CIK ", maxsplit=1)[
-            0
-        ]  # Remove Newlines and CIK from name
-        for name in _source.get("display_names", [])
-    ]
-
-    # Extract tickers from entity names
-    ticker_regex = r"\(([A-Z\s,\-]+)\)+$"
-
-    tickers = [
-        ticker.group(1)
-        for name in entity_names
-        if (ticker := re.search(ticker_regex, name)) and ticker is not None
-    ]
-    tickers = tickers if len(tickers) != 0 else None
-
-    # Remove tickers from entity names
-    entity_names = [re.sub(ticker_regex, "", name).strip() for name in entity_names]
-
-    places_of_business = _source.get("biz_locations")
-    places_of_business = [
-        (
-            f"{split[0]}, {TEXT_SEARCH_LOCATIONS_MAPPING.get(split[1])}"
-            if len(split) == 2
-            else f"{split[0]}"
-        )
-        for place in places_of_business
-        if (split := place.rsplit(", ", maxsplit=1))
-    ]
-
-    incorporated_locations = _source.get("inc_states")
-    incorporated_locations = [
-        TEXT_SEARCH_LOCATIONS_MAPPING.get(inc_loc) for inc_loc in incorporated_locations
-    ]
-
-    parsed = {
-        "root_form": root_forms,
-        "form_name": form_name,
-        "filed_at": filed_at,
-        "reporting_for": end_date,
-        "entity_name": unpack_singleton_list(entity_names),
-        "ticker": unpack_singleton_list(tickers),
-        "company_cik": unpack_singleton_list(ciks),
-        "company_cik_trimmed": unpack_singleton_list(ciks_trimmed),
-        "place_of_business": unpack_singleton_list(places_of_business),
-        "incorporated_location": unpack_singleton_list(incorporated_locations),
-        "file_num": unpack_singleton_list(file_nums),
-        "file_num_search_url": unpack_singleton_list(file_nums_search_urls),
-        "film_num": unpack_singleton_list(film_nums),
-        "filing_details_url": filing_details_urls,
-        "filing_document_url": filing_doc_urls,
-    }
 
-    return parsed
 
-
-def _parse_table_rows(search_request_url: pydantic.HttpUrl) -> List[dict]:
+def _parse_table_rows(
+    search_request_url: pydantic.HttpUrl,
+    prefetched_response: Optional[dict] = None,
+    transport: Optional[Transport] = None,
+    as_records: bool = False,
+) -> List[Union[dict, FilingHit]]:
     """
     Parses the given list of table rows into a list of dictionaries.
     Handles multiline rows by joining the text with a line break.
 
     :param search_request_url: URL of the search request to log in case of errors
-    :return: List of dictionaries representing the parsed table rows
+    :param prefetched_response: JSON response already downloaded for this URL, if any.
+      When provided, the page is not requested again.
+    :param transport: Transport to fetch the page with, defaults to the shared one
+    :param as_records: Whether to return compact FilingHit records instead of
+      dictionaries
+    :return: List of dictionaries or records representing the parsed table rows
     """
-    json_response = fetch_page(search_request_url)
+    json_response = prefetched_response
+    if json_response is None:
+        json_response = fetch_page(search_request_url, transport=transport)
     rows = json_response.get("hits", {}).get("hits", [])
 
+    parse = FilingHit.from_hit if as_records else _parse_row
     parsed_rows = []
     for i, r in enumerate(rows):
         try:
-            parsed = _parse_row(r)
+            parsed = parse(r)
             parsed_rows.append(parsed)
         except Exception as e:
             print(
@@ -152,119 +110,707 @@ def _parse_table_rows(search_request_url: pydantic.HttpUrl) -> List[dict]:
     return parsed_rows
 
 
+def _iter_page_results(
+    search_params: SearchParams,
+    max_results: Optional[int] = None,
+    concurrency: int = 1,
+    transport: Optional[Transport] = None,
+    checkpoint: Optional[SearchCheckpoint] = None,
+    as_records: bool = False,
+) -> Iterator[Tuple[pydantic.HttpUrl, List[Union[dict, FilingHit]]]]:
+    """
+    Fetches and parses every page of results for the given search parameters, in order,
+    stopping once max_results rows have been yielded.
+
+    With a concurrency greater than 1, up to that many pages are fetched at the same time
+    by a pool of threads. All threads share the transport's rate limiter, so the overall
+    request rate stays the same, but the time spent waiting on the network overlaps.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param max_results: Maximum number of rows to yield, all of them if not provided
+    :param concurrency: Maximum number of pages fetched at the same time
+    :param transport: Transport to send the requests through
+    :param checkpoint: Checkpoint of a previous run whose completed pages are skipped
+    :param as_records: Whether to parse rows into FilingHit records instead of
+      dictionaries
+    :yield: Tuples of page URL and the list of parsed rows of the page
+    """
+    remaining_results = max_results
+    for search_url, page_results in _fetch_page_results(
+        search_params, concurrency, transport, checkpoint, as_records
+    ):
+        if max_results:
+            page_results = page_results[:remaining_results]
+            remaining_results -= len(page_results)
+        yield search_url, page_results
+        if max_results and remaining_results <= 0:
+            return
+
+
+def _fetch_page_results(
+    search_params: SearchParams,
+    concurrency: int,
+    transport: Optional[Transport],
+    checkpoint: Optional[SearchCheckpoint],
+    as_records: bool,
+) -> Iterator[Tuple[pydantic.HttpUrl, List[Union[dict, FilingHit]]]]:
+    """
+    Fetches and parses every page of results for the given search parameters, in order.
+    See :func:`_iter_page_results`.
+    """
+    search_urls = generate_search_urls(
+        search_params, transport=transport, checkpoint=checkpoint
+    )
+    if concurrency <= 1:
+        for search_url, prefetched_response in search_urls:
+            yield search_url, _parse_table_rows(
+                search_url,
+                prefetched_response,
+                transport=transport,
+                as_records=as_records,
+            )
+        return
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    in_flight = deque()
+    try:
+        for search_url, prefetched_response in search_urls:
+            future = executor.submit(
+                _parse_table_rows,
+                search_url,
+                prefetched_response,
+                transport=transport,
+                as_records=as_records,
+            )
+            in_flight.append((search_url, future))
+            if len(in_flight) >= concurrency:
+                search_url, future = in_flight.popleft()
+                yield search_url, future.result()
+        while in_flight:
+            search_url, future = in_flight.popleft()
+            yield search_url, future.result()
+    finally:
+        # Don't fetch pages nobody is going to read, e.g. once max_results is reached,
+        # and don't wait for the ones being fetched, so stopping early is immediate
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_search(
+    search_params: SearchParams,
+    max_results: Optional[int] = None,
+    concurrency: int = 1,
+    transport: Optional[Transport] = None,
+    as_records: bool = False,
+) -> Iterator[Union[Dict[str, Any], FilingHit]]:
+    """
+    Searches the SEC website for filings based on the given parameters, yielding parsed
+    rows page by page as they are downloaded instead of collecting them all first.
+    Unlike :func:`search`, errors are raised instead of being printed.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param max_results: Maximum number of results to yield.
+    :param concurrency: Maximum number of result pages to fetch at the same time.
+      Requests still go through the transport's rate limiter.
+    :param transport: Transport to send requests through, defaults to the shared one
+    :param as_records: Whether to yield compact FilingHit records, which use much less
+      memory than dictionaries, instead of dictionaries
+    :yield: Parsed rows
+    """
+    for _, page_results in _iter_page_results(
+        search_params,
+        max_results=max_results,
+        concurrency=concurrency,
+        transport=transport,
+        as_records=as_records,
+    ):
+        yield from page_results
+
+
 def search(
     search_params: SearchParams,
     output: str = None,
     max_results: int = None,
-) -> None:
+    transport: Optional[Transport] = None,
+    concurrency: int = 1,
+    resume: bool = False,
+    as_records: bool = False,
+) -> Optional[List[Union[Dict[str, Any], FilingHit]]]:
     """
     Searches the SEC website for filings based on the given parameters.
 
     :param search_params: Instance of SearchParams containing the search parameters
-    :param output: Name of the CSV file to write the results to. In no output is
+    :param output: Name of the CSV file to write the results to. Results are appended to
+      the file page by page as they arrive, and nothing is returned. If no output is
       provided, then the results are returned as a list of dictionaries.
     :param max_results: Maximum number of results to return.
+    :param transport: Transport to send requests through. Pass your own to share one
+      connection pool between searches, otherwise the process-wide one is used.
+    :param concurrency: Maximum number of result pages to fetch at the same time.
+      Requests still go through the transport's rate limiter.
+    :param resume: Whether to resume a previous, interrupted run of the same search,
+      skipping the pages it already appended to the output file. Progress is saved in
+      a checkpoint file next to the output file, which is deleted once the search
+      completes. Only output formats that can be appended to support resuming.
+    :param as_records: Whether to return compact FilingHit records, which use much less
+      memory than dictionaries, instead of dictionaries. Only used without an output.
     """
     to_return = []
+    search_url = generate_search_url_for_kwargs(search_params)
+    # Resuming is checked before opening the output, as opening a file that can't be
+    # appended to replaces it
+    checkpoint = None
+    if output and supports_append(output):
+        checkpoint = SearchCheckpoint.for_output(output)
+        checkpoint.start(search_url, resume=resume)
+    elif resume:
+        raise ValueError(
+            f"Cannot resume a search writing to {output}, only "
+            f"{APPENDABLE_OUTPUTS_DESCRIPTION} can be appended to."
+        )
+    writer = (
+        open_results_writer(output, TEXT_SEARCH_CSV_FIELDS_NAMES) if output else None
+    )
+
+    completed = False
     try:
-        for search_url in generate_search_urls(search_params):
-            page_results = _parse_table_rows(search_url)
-            to_return.extend(page_results)
-            if max_results and len(to_return) >= max_results:
-                break
+        for page_url, page_results in _iter_page_results(
+            search_params,
+            max_results=max_results,
+            concurrency=concurrency,
+            transport=transport,
+            checkpoint=checkpoint,
+            as_records=as_records and writer is None,
+        ):
+            if writer:
+                writer.write_rows(page_results)
+                writer.flush()
+            else:
+                to_return.extend(page_results)
+            if checkpoint:
+                checkpoint.mark_page_done(page_url)
+        completed = True
     except Exception as e:
         print(
             f"Skipping search request due to an unexpected {e.__class__.__name__} for request parameters '{search_url}': {e}"
         )
-
-    if output:
-        write_results_to_file(
-            to_return,
-            output,
-            TEXT_SEARCH_CSV_FIELDS_NAMES,
-        )
-    if max_results:
-        return to_return[:max_results]
+    finally:
+        if writer:
+            writer.close()
+
+    if checkpoint:
+        if completed:
+            checkpoint.remove()
+        else:
+            print(
+                f"Search progress was saved to {checkpoint.path}, "
+                "run the same search again with resume enabled to continue it."
+            )
+    if writer:
+        print(f"Successfully wrote data to {output}.")
+        return None
     return to_return
 
 
+# Keeps the tasks closing page generators in the background from being garbage
+# collected before they are done
+_closing_pages: Set["asyncio.Future[None]"] = set()
+
+
+async def _close_pages(
+    pages: Iterator[Any], next_page: Optional["asyncio.Future[Any]"]
+) -> None:
+    """
+    Closes a page generator on a worker thread, once the page it is fetching, if any,
+    is done, as a running generator can't be closed.
+    """
+    if next_page is not None:
+        await asyncio.wait([next_page])
+        if not next_page.cancelled():
+            # Nobody reads the page anymore, including its error if it failed
+            next_page.exception()
+    await asyncio.to_thread(pages.close)
+
+
+async def aiter_search(
+    search_params: SearchParams,
+    concurrency: int = 1,
+    transport: Optional[Transport] = None,
+    timeout: Optional[float] = None,
+    as_records: bool = False,
+) -> AsyncIterator[Union[Dict[str, Any], FilingHit]]:
+    """
+    Asynchronously searches the SEC website for filings based on the given parameters,
+    yielding parsed rows as each page of results arrives.
+
+    Pages are planned, fetched and parsed exactly like :func:`search` does, on a worker
+    thread using the shared pooled transport, so the event loop is never blocked and
+    every search running on it counts against the same rate limit. Unlike
+    :func:`search`, errors are raised instead of being printed.
+
+    Cancelling the task consuming this generator stops the search: the page being
+    fetched when it was cancelled is discarded and no further pages are requested.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param concurrency: Maximum number of result pages to fetch at the same time
+    :param transport: Transport to send the requests through
+    :param timeout: Maximum number of seconds the whole search may take, raises
+      asyncio.TimeoutError when exceeded
+    :param as_records: Whether to yield compact FilingHit records instead of
+      dictionaries
+    :yield: Parsed rows
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    pages = _iter_page_results(
+        search_params,
+        concurrency=concurrency,
+        transport=transport,
+        as_records=as_records,
+    )
+    next_page = None
+    try:
+        while True:
+            next_page = asyncio.ensure_future(asyncio.to_thread(next, pages, None))
+            remaining = None if deadline is None else max(deadline - loop.time(), 0)
+            # Shield the worker so a timeout or cancellation doesn't leave the page
+            # generator half-closed while a thread is still running it
+            page = await asyncio.wait_for(asyncio.shield(next_page), remaining)
+            if page is None:
+                break
+            _, page_results = page
+            for row in page_results:
+                yield row
+    finally:
+        # Closing the page generator runs its cleanup, which is done on a worker thread
+        # so the event loop is never blocked
+        closing = asyncio.ensure_future(_close_pages(pages, next_page))
+        if next_page is None or next_page.done():
+            await asyncio.shield(closing)
+        else:
+            # The page being fetched is left to finish in the background, instead of
+            # delaying the cancellation or timeout
+            _closing_pages.add(closing)
+            closing.add_done_callback(_closing_pages.discard)
+
+
+async def async_search(
+    search_params: SearchParams,
+    max_results: Optional[int] = None,
+    concurrency: int = 1,
+    transport: Optional[Transport] = None,
+    timeout: Optional[float] = None,
+    as_records: bool = False,
+) -> List[Union[Dict[str, Any], FilingHit]]:
+    """
+    Asynchronously searches the SEC website for filings based on the given parameters.
+    See :func:`aiter_search` for details.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param max_results: Maximum number of results to return.
+    :param concurrency: Maximum number of result pages to fetch at the same time
+    :param transport: Transport to send the requests through
+    :param timeout: Maximum number of seconds the whole search may take, raises
+      asyncio.TimeoutError when exceeded
+    :param as_records: Whether to return compact FilingHit records instead of
+      dictionaries
+    :return: List of parsed rows
+    """
+    results = []
+    rows = aiter_search(
+        search_params,
+        concurrency=concurrency,
+        transport=transport,
+        timeout=timeout,
+        as_records=as_records,
+    )
+    try:
+        async for row in rows:
+            results.append(row)
+            if max_results and len(results) >= max_results:
+                break
+    finally:
+        await rows.aclose()
+    return results
+
+
 class PageCheckFailedError(Exception):
     pass
 
 
+class ThrottledError(PageCheckFailedError):
+    pass
+
+
+# Number of times a page is requested before giving up. Throttled requests are retried
+# for longer, since the rate limiter pauses and slows down before each retry.
+MAX_ATTEMPTS = 3
+MAX_THROTTLED_ATTEMPTS = 10
+
+
+def stop_retrying(retry_state: RetryCallState) -> bool:
+    """
+    Stop condition of :func:`tenacity.retry` for requests to the SEC website: throttled
+    requests are attempted up to MAX_THROTTLED_ATTEMPTS times, other failures up to
+    MAX_ATTEMPTS times.
+    """
+    if isinstance(retry_state.outcome.exception(), ThrottledError):
+        return retry_state.attempt_number >= MAX_THROTTLED_ATTEMPTS
+    return retry_state.attempt_number >= MAX_ATTEMPTS
+
+
 @retry(
-    before=wait_fixed(
-        0.11
-    ),  # The SEC API limits us to max 10 requests per second. Let's be conservative.
-    stop=stop_after_attempt(3),
+    stop=stop_retrying,
     reraise=True,
 )
-def fetch_page(url: pydantic.HttpUrl) -> dict:
+def fetch_page(url: pydantic.HttpUrl, transport: Optional[Transport] = None) -> dict:
     """
     Fetches the given URL and retries the request if the page load fails.
+    Requests are throttled by the transport's rate limiter, including retries. When the
+    SEC throttles a request, the rate limiter backs off before the request is retried.
+    If the transport has a response cache, cached responses are returned without
+    sending a request, and new responses are added to the cache.
 
     :param url: URL to fetch
+    :param transport: Transport to send the request through, defaults to the shared one
     :return: JSON response from the URL
     """
 
+    transport = transport or get_default_transport()
+    if transport.cache is not None:
+        cached_response = transport.cache.get(str(url))
+        if cached_response is not None:
+            print(f"Using cached response for URL: {url}")
+            return cached_response
+
     print(f"Requesting URL: {url}")
-    headers = {
-        "User-Agent": f"BellingcatEDGARTool_{uuid.uuid4()} contact-tech@bellingcat.com"
-    }
-    res = requests.get(str(url), headers=headers)
+    res = transport.get(str(url), headers=build_request_headers())
+    if res.status_code in THROTTLED_STATUS_CODES:
+        raise ThrottledError(f"Error for url {url}, with code {res.status_code}")
     if res.status_code != 200:
         raise PageCheckFailedError(f"Error for url {url}, with code {res.status_code}")
-    return res.json()
+    json_response = res.json()
+    if transport.cache is not None:
+        transport.cache.set(str(url), json_response)
+    return json_response
 
 
 MAX_RESULTS_PER_PAGE = 100
+# Form types we can search for, in the order they appear in the SEC search form
+SEARCHABLE_FORMS = typing.get_args(FilingLiteral)
+SEC_FORM_ID_TO_PEO_IN_AND_INC_IN = {
+    sec_form_id: location
+    for location, sec_form_id in PEO_IN_AND_INC_IN_TO_SEC_FORM_ID.items()
+}
+
+
+def _estimate_total_results(json_response: dict) -> Optional[int]:
+    """
+    Estimates the total number of results of a search. The hits total stops counting at
+    10,000, but the form type aggregation returned with every page counts every result,
+    so it is used instead when available. Filings with several root forms are counted
+    once per form, so the estimate can only be too high, never too low.
+
+    :param json_response: JSON response of the first page of the search
+    :return: Estimated total number of results, or None if the response has no aggregation
+    """
+    form_filter = json_response.get("aggregations", {}).get("form_filter")
+    if not form_filter:
+        return None
+    return sum(
+        bucket.get("doc_count", 0) for bucket in form_filter.get("buckets", [])
+    ) + form_filter.get("sum_other_doc_count", 0)
+
 
+def _split_date_range(
+    search_params: SearchParams, json_response: dict
+) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    Splits the date range of a search with too many results to paginate through into
+    smaller date ranges that each should have fewer.
+
+    The number of date ranges is based on the estimated total number of results, and the
+    ranges are cut according to the filing dates of the results on the first page, which
+    are ordered by relevance and therefore a sample of the results across the whole date
+    range. This usually splits a search into date ranges of fewer than 10,000 results in
+    a single pass, even when results are unevenly spread over time. If the response has
+    no aggregation to estimate from, the date range is split in half.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param json_response: JSON response of the first page of the search
+    :return: List of (start date, end date) tuples
+    """
+    start = search_params.start_date_formatted
+    end = search_params.end_date_formatted
+    estimated_total_results = _estimate_total_results(json_response)
+    if not estimated_total_results:
+        return list(split_date_range_in_half(start, end))
+
+    number_of_ranges = max(
+        TEXT_SEARCH_SPLIT_BATCHES_NUMBER,
+        math.ceil(estimated_total_results / TEXT_SEARCH_TARGET_RESULTS_PER_DATE_RANGE),
+    )
+    sample_dates = []
+    for hit in json_response.get("hits", {}).get("hits", []):
+        try:
+            sample_dates.append(
+                datetime.date.fromisoformat(hit["_source"]["file_date"])
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    return split_date_range_by_density(start, end, number_of_ranges, sample_dates)
 
-def generate_search_urls(search_params: SearchParams) -> Iterator[pydantic.HttpUrl]:
+
+def _narrow_search_params(search_params: SearchParams, **changes: Any) -> SearchParams:
+    """
+    Copies the given search parameters over a custom date range, with the given changes.
+
+    :param search_params: Instance of SearchParams to copy
+    :param changes: Search parameters to change
+    :return: New instance of SearchParams
+    """
+    fields = {
+        "keywords": search_params.keywords,
+        "entity": search_params.entity,
+        "filing_category": search_params.filing_category,
+        "single_forms": search_params.single_forms,
+        "start_date": search_params.start_date_formatted,
+        "end_date": search_params.end_date_formatted,
+        "inc_in": search_params.inc_in,
+        "peo_in": search_params.peo_in,
+    }
+    fields.update(changes)
+    return SearchParams(**fields)
+
+
+def _group_by_result_counts(
+    values: List[str], counts: Dict[str, int], other_count: Optional[int]
+) -> List[List[str]]:
+    """
+    Groups the given search filter values, such as form types, so that searching for
+    each group should return fewer than 10,000 results.
+
+    :param values: Values to group
+    :param counts: Number of results for the values whose count is known
+    :param other_count: Number of results for all the other values together, if known.
+      If not, the other values are split in half.
+    :return: List of groups of values
+    """
+    target = TEXT_SEARCH_TARGET_RESULTS_PER_DATE_RANGE
+    counted = sorted(
+        (value for value in values if value in counts),
+        key=lambda value: counts[value],
+        reverse=True,
+    )
+    # First-fit decreasing: put each value in the first group it still fits in
+    groups: List[List[str]] = []
+    group_counts: List[int] = []
+    for value in counted:
+        for index, group_count in enumerate(group_counts):
+            if group_count + counts[value] <= target:
+                groups[index].append(value)
+                group_counts[index] += counts[value]
+                break
+        else:
+            groups.append([value])
+            group_counts.append(counts[value])
+
+    # Values without a count are spread evenly over as many groups as needed
+    uncounted = [value for value in values if value not in counts]
+    if uncounted:
+        if other_count is None:
+            number_of_groups = TEXT_SEARCH_SPLIT_BATCHES_NUMBER
+        else:
+            number_of_groups = max(1, math.ceil(other_count / target))
+        number_of_groups = max(
+            number_of_groups,
+            math.ceil(len(uncounted) / TEXT_SEARCH_MAX_FILTER_VALUES_PER_SEARCH),
+        )
+        number_of_groups = min(len(uncounted), number_of_groups)
+        groups.extend(
+            uncounted[index::number_of_groups] for index in range(number_of_groups)
+        )
+    return groups
+
+
+def _split_single_day(
+    search_params: SearchParams, json_response: dict
+) -> List[SearchParams]:
+    """
+    Splits a search for a single day with too many results to paginate through into
+    searches for groups of form types, or if the search is already for a single form
+    type, into searches for groups of principal executive office locations. Group sizes
+    are based on the form type and location aggregations of the response.
+
+    :param search_params: Instance of SearchParams containing the search parameters
+    :param json_response: JSON response of the first page of the search
+    :return: List of narrower search parameters, empty if the search cannot be split
+    """
+    aggregations = json_response.get("aggregations", {})
+
+    # A filing category cannot be combined with single forms, and we don't know which
+    # forms each category contains, so those searches can only be split by location
+    if search_params.single_forms:
+        forms = list(search_params.single_forms)
+    elif search_params.filing_category in (None, "all", "custom"):
+        forms = list(SEARCHABLE_FORMS)
+    else:
+        forms = []
+    if len(forms) > 1:
+        form_filter = aggregations.get("form_filter", {})
+        groups = _group_by_result_counts(
+            forms,
+            {b["key"]: b["doc_count"] for b in form_filter.get("buckets", [])},
+            form_filter.get("sum_other_doc_count") if form_filter else None,
+        )
+        if len(groups) > 1:
+            return [
+                _narrow_search_params(
+                    search_params, filing_category=None, single_forms=group
+                )
+                for group in groups
+            ]
+
+    if search_params.inc_in:
+        location_field = "inc_in"
+        locations = _as_list(search_params.inc_in)
+        # The response only aggregates principal executive office locations
+        location_counts = {}
+        other_count = _estimate_total_results(json_response)
+    else:
+        location_field = "peo_in"
+        locations = _as_list(search_params.peo_in) or list(
+            PEO_IN_AND_INC_IN_TO_SEC_FORM_ID
+        )
+        biz_states_filter = aggregations.get("biz_states_filter", {})
+        location_counts = {
+            SEC_FORM_ID_TO_PEO_IN_AND_INC_IN[b["key"]]: b["doc_count"]
+            for b in biz_states_filter.get("buckets", [])
+            if b["key"] in SEC_FORM_ID_TO_PEO_IN_AND_INC_IN
+        }
+        other_count = (
+            biz_states_filter.get("sum_other_doc_count") if biz_states_filter else None
+        )
+    if len(locations) > 1:
+        groups = _group_by_result_counts(locations, location_counts, other_count)
+        if len(groups) > 1:
+            return [
+                _narrow_search_params(search_params, **{location_field: group})
+                for group in groups
+            ]
+    return []
+
+
+def _as_list(value: Union[None, str, List[str]]) -> List[str]:
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def generate_search_urls(
+    search_params: SearchParams,
+    transport: Optional[Transport] = None,
+    checkpoint: Optional[SearchCheckpoint] = None,
+) -> Generator[Tuple[pydantic.HttpUrl, Optional[dict]], None, Optional[int]]:
     """
     Generates search URLs for the given search parameters. Each search URL is
     generated to try and return less than 10,000 results, which is the maximum number of
-    results that the SEC API allows us to paginate through. If a search query is
-    so vague that a single day contains more than 10,000 results, then the yielded URL is not
-    guaranteed to provide all results. This is because the SEC API only allows us to paginate
-    through 10,000 results at a time, and we cannot search a date range that is smaller than 1 day.
+    results that the SEC API allows us to paginate through. Searches with more results are
+    split into smaller date ranges. As we cannot search a date range that is smaller than
+    1 day, a single day with more than 10,000 results is split by form type instead, and
+    then by location of the principal executive offices. If a search query is so vague
+    that even that is not enough, then the yielded URLs are not guaranteed to provide all
+    results, and a warning is printed.
+
+    The first page of every date range has to be downloaded to count its results, so it is
+    yielded along with its JSON response to avoid requesting it a second time. Every other
+    page is yielded with ``None`` and still needs to be fetched.
 
     :param search_params: Instance of SearchParams containing the search parameters
-    :yield: Search URLs
+    :param transport: Transport to send the requests through
+    :param checkpoint: Checkpoint to record the planned date ranges in. Date ranges and
+      pages it already lists as completed are skipped.
+    :yield: Tuples of search URL and the already downloaded JSON response, if any
+    :return: Number of results the yielded URLs give access to, or None if some of them
+      were skipped because the checkpoint lists them as completed
     """
     url = generate_search_url_for_kwargs(search_params)
-    json_response = fetch_page(url)
+    if checkpoint and checkpoint.is_range_done(url):
+        return None
+    json_response = fetch_page(url, transport=transport)
     total_records = int(json_response.get("hits", {}).get("total", {}).get("value", 0))
     search_is_for_single_day = (
         search_params.start_date_formatted is not None
         and search_params.end_date_formatted is not None
         and search_params.start_date_formatted == search_params.end_date_formatted
     )
-    if search_is_for_single_day or total_records < 10000:
-        yield url
-        for page, max_records_per_page in enumerate(
-            range(
-                MAX_RESULTS_PER_PAGE,
-                total_records,
-                MAX_RESULTS_PER_PAGE,
-            ),
-            start=2,
-        ):
-            yield pydantic.HttpUrl(f"{url}&page={page}&from={max_records_per_page}")
+
     # The SEC returns a maximum of 10,000 results at a time, so if there are more than
-    # 10,000 results, we split the date range in half until we have less than 10,000 results
-    else:
-        for start, end in split_date_range_in_half(
-            search_params.start_date_formatted, search_params.end_date_formatted
-        ):
-            new_search_params = SearchParams(
-                keywords=search_params.keywords,
-                entity=search_params.entity,
-                filing_category=search_params.filing_category,
-                single_forms=search_params.single_forms,
-                start_date=start,
-                end_date=end,
-                inc_in=search_params.inc_in,
-                peo_in=search_params.peo_in,
+    # 10,000 results, we split the search until we have less than 10,000 results
+    sub_search_params = []
+    if total_records >= TEXT_SEARCH_MAX_PAGINATED_RESULTS:
+        if search_is_for_single_day:
+            sub_search_params = _split_single_day(search_params, json_response)
+        else:
+            sub_search_params = [
+                _narrow_search_params(search_params, start_date=start, end_date=end)
+                for start, end in _split_date_range(search_params, json_response)
+            ]
+
+    if not sub_search_params:
+        if total_records >= TEXT_SEARCH_MAX_PAGINATED_RESULTS:
+            print(
+                f"Warning: {url} has more than {TEXT_SEARCH_MAX_PAGINATED_RESULTS} "
+                "results and cannot be split any further, only the first "
+                f"{TEXT_SEARCH_MAX_PAGINATED_RESULTS} results will be retrieved."
+            )
+        pages = [(url, json_response)] + [
+            (
+                pydantic.HttpUrl(f"{url}&page={page}&from={max_records_per_page}"),
+                None,
+            )
+            for page, max_records_per_page in enumerate(
+                range(
+                    MAX_RESULTS_PER_PAGE,
+                    total_records,
+                    MAX_RESULTS_PER_PAGE,
+                ),
+                start=2,
             )
-            yield from generate_search_urls(new_search_params)
+        ]
+        if checkpoint:
+            checkpoint.record_range_pages(url, [page_url for page_url, _ in pages])
+        for page_url, prefetched_response in pages:
+            if checkpoint and checkpoint.is_page_done(page_url):
+                continue
+            yield page_url, prefetched_response
+        return total_records
+
+    if checkpoint:
+        checkpoint.record_range_children(
+            url, [generate_search_url_for_kwargs(p) for p in sub_search_params]
+        )
+    covered_records = 0
+    for new_search_params in sub_search_params:
+        sub_search_records = yield from generate_search_urls(
+            new_search_params, transport=transport, checkpoint=checkpoint
+        )
+        if sub_search_records is None:
+            covered_records = None
+        elif covered_records is not None:
+            covered_records += sub_search_records
+
+    # Splitting a day by form type or location only returns the filings that have one of
+    # the form types or locations we know of, so make sure none were left out
+    estimated_total_records = _estimate_total_results(json_response)
+    if (
+        search_is_for_single_day
+        and covered_records is not None
+        and estimated_total_records
+        and covered_records < estimated_total_records
+    ):
+        print(
+            f"Warning: {url} has about {estimated_total_records} results, but only "
+            f"{covered_records} of them could be retrieved by splitting it by form type "
+            "and location."
+        )
+    return covered_records
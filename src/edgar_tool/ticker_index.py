@@ -0,0 +1,163 @@
+import os
+import struct
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Start of every index file, with the version of the format
+TICKER_INDEX_MAGIC = b"EDGARTI1"
+_HEADER = struct.Struct("<8sI")
+
+
+def _trim_cik(cik: Any) -> str:
+    # CIKs are zero padded in the RSS feed, but not in the SEC company tickers file
+    return cik.lstrip("0") if isinstance(cik, str) else str(cik)
+
+
+class TickerIndex(Mapping):
+    """
+    Maps the CIK numbers of companies to their tickers, and tickers back to CIK
+    numbers, as listed in the SEC company tickers file.
+
+    As a mapping, the index works like the dictionary it replaces: keys are CIK
+    numbers without leading zeros, and values are lists of tickers, in the order of
+    the SEC file. Use :meth:`ciks_for_ticker` for reverse lookups. Both lookups are
+    dictionary lookups.
+
+    The index is saved as a compact binary file, about a third of the size of the
+    JSON file it replaces. The file has a header with the format version and
+    the number of (CIK, ticker) pairs. Then come the CIKs as little-endian 32-bit
+    integers, sorted, followed by the matching tickers separated by line breaks.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]]):
+        """
+        :param pairs: CIK number, without leading zeros, and ticker pairs, sorted by
+          CIK number
+        """
+        self._tickers_by_cik: Dict[str, List[str]] = {}
+        for cik, ticker in pairs:
+            tickers = self._tickers_by_cik.get(cik)
+            if tickers is None:
+                self._tickers_by_cik[cik] = [ticker]
+            else:
+                tickers.append(ticker)
+        # Built on the first reverse lookup, most callers only need CIK lookups
+        self._ciks_by_ticker: Optional[Dict[str, List[str]]] = None
+
+    @classmethod
+    def _from_unsorted_pairs(cls, pairs: Iterable[Tuple[int, str]]) -> "TickerIndex":
+        # Sorting is stable, so the tickers of each CIK keep their order
+        return cls(
+            (str(cik), ticker) for cik, ticker in sorted(pairs, key=lambda p: p[0])
+        )
+
+    @classmethod
+    def from_company_tickers(cls, company_tickers: Dict[str, Any]) -> "TickerIndex":
+        """
+        :param company_tickers: Content of the SEC company tickers file, see
+          :data:`edgar_tool.rss.RSS_COMPANY_TICKERS_URL`
+        :return: Index of the companies in the file
+        """
+        return cls._from_unsorted_pairs(
+            (int(company["cik_str"]), company["ticker"])
+            for company in company_tickers.values()
+        )
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, List[str]]) -> "TickerIndex":
+        """
+        :param mapping: Tickers of each CIK number
+        :return: Index of the mapping
+        """
+        return cls._from_unsorted_pairs(
+            (int(cik), ticker) for cik, tickers in mapping.items() for ticker in tickers
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "TickerIndex":
+        """
+        :param path: Path of an index file written by :meth:`save`
+        :return: Index read from the file
+        """
+        data = Path(path).read_bytes()
+        magic, count = _HEADER.unpack_from(data)
+        if magic != TICKER_INDEX_MAGIC:
+            raise ValueError(f"{path} is not a ticker index file.")
+        ciks = struct.unpack_from(f"<{count}I", data, _HEADER.size)
+        tickers_offset = _HEADER.size + 4 * count
+        tickers = data[tickers_offset:].decode("utf-8").split("\n") if count else []
+        if len(tickers) != count:
+            raise ValueError(f"Ticker index file {path} is truncated.")
+        return cls(zip(map(str, ciks), tickers))
+
+    def save(self, path: Path) -> None:
+        """
+        Writes the index to a file, replacing it atomically.
+
+        :param path: Path of the index file
+        """
+        pairs = [
+            (int(cik), ticker)
+            for cik, tickers in self._tickers_by_cik.items()
+            for ticker in tickers
+        ]
+        data = b"".join(
+            [
+                _HEADER.pack(TICKER_INDEX_MAGIC, len(pairs)),
+                struct.pack(f"<{len(pairs)}I", *(cik for cik, _ in pairs)),
+                "\n".join(ticker for _, ticker in pairs).encode("utf-8"),
+            ]
+        )
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def __getitem__(self, cik: Any) -> List[str]:
+        return self._tickers_by_cik[_trim_cik(cik)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tickers_by_cik)
+
+    def __len__(self) -> int:
+        return len(self._tickers_by_cik)
+
+    def ciks_for_ticker(self, ticker: str) -> List[str]:
+        """
+        :param ticker: Ticker, in any case
+        :return: CIK numbers without leading zeros of the companies with the ticker
+        """
+        if self._ciks_by_ticker is None:
+            ciks_by_ticker: Dict[str, List[str]] = {}
+            for cik, tickers in self._tickers_by_cik.items():
+                for cik_ticker in tickers:
+                    ciks_by_ticker.setdefault(cik_ticker.upper(), []).append(cik)
+            self._ciks_by_ticker = ciks_by_ticker
+        return self._ciks_by_ticker.get(ticker.upper(), [])
+
+
+_cache: Dict[Path, Tuple[Tuple[int, int], TickerIndex]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_ticker_index(path: Path) -> TickerIndex:
+    """
+    Loads an index file, or returns the index already loaded from it if the file
+    didn't change since, so polling the RSS feed doesn't read it again every time.
+
+    :param path: Path of the index file
+    :return: Index read from the file
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    index = TickerIndex.load(path)
+    with _cache_lock:
+        _cache[path] = (version, index)
+    return index
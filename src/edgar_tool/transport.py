@@ -0,0 +1,112 @@
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from edgar_tool.cache import ResponseCache
+from edgar_tool.rate_limit import (
+    THROTTLED_STATUS_CODES,
+    TokenBucketRateLimiter,
+    get_default_rate_limiter,
+    parse_retry_after,
+)
+
+# Number of keep-alive connections kept open per host. The SEC limits us to
+# 10 requests per second, so there is no point in keeping more sockets around.
+DEFAULT_POOL_SIZE = 10
+
+
+def build_request_headers() -> Dict[str, str]:
+    """
+    Builds the headers sent with every request to the SEC website.
+
+    :return: Dictionary of request headers, including the User-Agent the SEC asks for
+    """
+    return {
+        "User-Agent": f"BellingcatEDGARTool_{uuid.uuid4()} contact-tech@bellingcat.com"
+    }
+
+
+class Transport:
+    """
+    Shared HTTP transport used for every request made to the SEC website.
+
+    Wraps a single :class:`requests.Session` with a keep-alive connection pool, so
+    consecutive requests to the same host reuse an open TCP/TLS connection instead of
+    paying a fresh handshake for every page. Every request first waits for a token from
+    the transport's rate limiter, so it is safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        """
+        :param pool_size: Maximum number of connections kept open per host
+        :param rate_limiter: Rate limiter to wait on before each request. Defaults to the
+          process-wide limiter, so separate transports still share one request budget.
+        :param cache: Disk cache of responses that :func:`edgar_tool.text_search.fetch_page`
+          checks before sending a request. Responses are not cached by default.
+        """
+        if pool_size < 1:
+            raise ValueError("Connection pool size must be at least 1.")
+        self.pool_size = pool_size
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any
+    ) -> requests.Response:
+        """
+        Waits for the rate limiter, then sends a GET request through the pooled session.
+        Tells the rate limiter whether the request was throttled, so it can adapt.
+
+        :param url: URL to fetch
+        :param headers: Headers to send with the request
+        :param kwargs: Extra keyword arguments passed on to :meth:`requests.Session.get`
+        :return: Response object
+        """
+        sent_at = self.rate_limiter.acquire()
+        response = self.session.get(url, headers=headers, **kwargs)
+        if response.status_code in THROTTLED_STATUS_CODES:
+            self.rate_limiter.record_throttled(
+                parse_retry_after(response.headers.get("Retry-After")), sent_at=sent_at
+            )
+        else:
+            self.rate_limiter.record_success()
+        return response
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> "Transport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+_default_transport: Optional[Transport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """
+    Returns the process-wide transport, creating it on first use.
+
+    :return: Shared Transport instance
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+    return _default_transport
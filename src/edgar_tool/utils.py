@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import Any, Iterator, List, Optional, Union
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 
 def split_date_range_in_half(start: date, end: date) -> Iterator[date, date]:
@@ -22,6 +23,60 @@ def split_date_range_in_half(start: date, end: date) -> Iterator[date, date]:
     yield start + diff, end
 
 
+def split_date_range_by_density(
+    start: date,
+    end: date,
+    number_of_ranges: int,
+    sample_dates: Optional[List[date]] = None,
+    sample_weight: float = 0.3,
+) -> List[Tuple[date, date]]:
+    """
+    Splits the inclusive range between start and end dates into consecutive, non-overlapping
+    ranges of whole days that are expected to contain the same number of results.
+
+    The number of results per day is estimated from a sample of the dates of the results,
+    blended with a uniform distribution so days that happen to be missing from a small
+    sample are not assumed to be empty.
+
+    :param start: first day of the range to split
+    :param end: last day of the range to split
+    :param number_of_ranges: number of ranges to split into, capped at the number of days
+    :param sample_dates: dates of a sample of the results, dates outside the range are ignored
+    :param sample_weight: share of the estimate based on the sample, between 0 and 1
+    :return: list of (first day, last day) tuples
+    """
+    number_of_days = (end - start).days + 1
+    number_of_ranges = max(1, min(number_of_ranges, number_of_days))
+    sample = Counter(
+        (d - start).days for d in (sample_dates or []) if start <= d <= end
+    )
+    sample_size = sum(sample.values())
+    if not sample_size:
+        sample_weight = 0
+
+    ranges = []
+    range_start = 0
+    cumulative_share = 0.0
+    for day in range(number_of_days):
+        cumulative_share += (1 - sample_weight) / number_of_days
+        if sample_size:
+            cumulative_share += sample_weight * sample[day] / sample_size
+        remaining_days = number_of_days - day - 1
+        remaining_ranges = number_of_ranges - len(ranges) - 1
+        # Close the current range once it holds its share of the results, making sure
+        # every remaining range still gets at least one day
+        if remaining_ranges > 0 and (
+            cumulative_share >= (len(ranges) + 1) / number_of_ranges
+            or remaining_days == remaining_ranges
+        ):
+            ranges.append(
+                (start + timedelta(days=range_start), start + timedelta(days=day))
+            )
+            range_start = day + 1
+    ranges.append((start + timedelta(days=range_start), end))
+    return ranges
+
+
 def safe_get(d: dict, *keys) -> Any:
     """
     Safely get a value from a nested dictionary without raising a KeyError
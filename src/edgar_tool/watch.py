@@ -0,0 +1,173 @@
+import asyncio
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from edgar_tool.constants import COMPRESSION_SUFFIXES, SQLITE_OUTPUT_EXTENSIONS
+from edgar_tool.feed_state import RssFeedState
+from edgar_tool.rss import fetch_rss_feed, load_tickers_mapping
+from edgar_tool.transport import Transport, get_default_transport
+
+WATCHLIST_KEYS = frozenset({"tickers", "every_n_mins", "output"})
+
+
+class Watchlist(NamedTuple):
+    """Tickers whose filings in the RSS feed are saved to a file at regular intervals"""
+
+    name: str
+    tickers: List[str]
+    every_n_mins: float
+    output: str
+
+
+def _can_be_added_to(output: str) -> bool:
+    # Columnar files are rewritten rather than appended to on every fetch
+    for suffix in COMPRESSION_SUFFIXES:
+        if output.endswith(suffix):
+            output = output[: -len(suffix)]
+    return output.endswith((".csv", *SQLITE_OUTPUT_EXTENSIONS))
+
+
+def _parse_watchlist(name: str, config: Any) -> Watchlist:
+    if not isinstance(config, dict):
+        raise ValueError(f"Watchlist {name} must be an object.")
+    unknown_keys = config.keys() - WATCHLIST_KEYS
+    if unknown_keys:
+        raise ValueError(
+            f"Unknown keys in watchlist {name}: {', '.join(sorted(unknown_keys))}."
+        )
+    tickers = config.get("tickers")
+    if (
+        not isinstance(tickers, list)
+        or not tickers
+        or not all(isinstance(x, str) for x in tickers)
+    ):
+        raise ValueError(f"Watchlist {name} must have a non-empty list of tickers.")
+    every_n_mins = config.get("every_n_mins")
+    if (
+        not isinstance(every_n_mins, (int, float))
+        or isinstance(every_n_mins, bool)
+        or every_n_mins <= 0
+    ):
+        raise ValueError(
+            f"Watchlist {name} must fetch the feed every positive number of minutes."
+        )
+    output = config.get("output")
+    if not isinstance(output, str) or not _can_be_added_to(output):
+        raise ValueError(
+            f"Watchlist {name} must save to a CSV or SQLite output file, e.g. "
+            f"{name}.csv or {name}.sqlite."
+        )
+    return Watchlist(name, tickers, every_n_mins, output)
+
+
+def load_watchlists(path: Path) -> List[Watchlist]:
+    """
+    Reads watchlists from a JSON configuration file such as::
+
+        {
+            "watchlists": {
+                "big-tech": {
+                    "tickers": ["AAPL", "GOOG"],
+                    "every_n_mins": 10,
+                    "output": "big_tech.csv"
+                }
+            }
+        }
+
+    :param path: Path of the configuration file
+    :return: Watchlists of the file
+    :raises ValueError: If the file is not a valid configuration
+    """
+    with open(path) as file:
+        config = json.load(file)
+    watchlists_config = config.get("watchlists") if isinstance(config, dict) else None
+    if not isinstance(watchlists_config, dict) or not watchlists_config:
+        raise ValueError(f"{path} must have at least one watchlist in 'watchlists'.")
+    watchlists = [
+        _parse_watchlist(name, watchlist_config)
+        for name, watchlist_config in watchlists_config.items()
+    ]
+    # Each output file has a single feed state next to it
+    names_by_output: Dict[Path, str] = {}
+    for watchlist in watchlists:
+        output = Path(watchlist.output).resolve()
+        if output in names_by_output:
+            raise ValueError(
+                f"Watchlists {names_by_output[output]} and {watchlist.name} save to "
+                f"the same output file {watchlist.output}."
+            )
+        names_by_output[output] = watchlist.name
+    return watchlists
+
+
+def _next_run_time(scheduled: float, now: float, interval: float) -> float:
+    """
+    :param scheduled: Time the last run was scheduled at
+    :param now: Current time
+    :param interval: Time between runs
+    :return: Time of the next run on the schedule, skipping the runs missed while
+      the last one was running
+    """
+    next_run = scheduled + interval
+    if next_run < now:
+        next_run += math.ceil((now - next_run) / interval) * interval
+    return next_run
+
+
+async def _watch_feed(watchlist: Watchlist, transport: Transport) -> None:
+    """
+    Fetches the RSS feed for a watchlist forever. Runs are scheduled from the first
+    one, so the time fetching takes doesn't delay the next runs.
+    """
+    state = RssFeedState.for_output(watchlist.output)
+    interval = watchlist.every_n_mins * 60
+    loop = asyncio.get_running_loop()
+    scheduled = loop.time()
+    while True:
+        try:
+            await asyncio.to_thread(
+                fetch_rss_feed,
+                watchlist.tickers,
+                watchlist.output,
+                False,
+                transport=transport,
+                state=state,
+            )
+        except Exception as e:
+            print(
+                f"{e.__class__} occurred while fetching the RSS feed for watchlist "
+                f"{watchlist.name}, trying again at its next run: {e.args}"
+            )
+        scheduled = _next_run_time(scheduled, loop.time(), interval)
+        print(
+            f"Fetching the RSS feed for watchlist {watchlist.name} again in "
+            f"{(scheduled - loop.time()) / 60:.1f} minute(s) ..."
+        )
+        await asyncio.sleep(scheduled - loop.time())
+
+
+async def watch(
+    watchlists: List[Watchlist],
+    refresh_tickers_mapping: bool = False,
+    transport: Optional[Transport] = None,
+) -> None:
+    """
+    Fetches the RSS feed for every watchlist at its own interval, until cancelled.
+
+    Watchlists share the transport, and so its connections and rate limit, as well
+    as the mapping of CIK numbers to company tickers, which is loaded once.
+
+    :param watchlists: Watchlists to fetch the feed for
+    :param refresh_tickers_mapping: whether to refresh the tickers mapping file first
+    :param transport: transport to send the requests through, defaults to the shared
+      one
+    """
+    transport = transport or get_default_transport()
+    await asyncio.to_thread(
+        load_tickers_mapping, refresh_tickers_mapping, transport=transport
+    )
+    await asyncio.gather(
+        *(_watch_feed(watchlist, transport) for watchlist in watchlists)
+    )
@@ -0,0 +1,142 @@
+import os
+from datetime import timedelta
+
+import pytest
+from freezegun import freeze_time
+
+from edgar_tool.cache import (
+    HISTORICAL_RESPONSE_TTL,
+    RECENT_RESPONSE_TTL,
+    ResponseCache,
+    normalize_url,
+)
+
+PAST_URL = (
+    "https://efts.sec.gov/LATEST/search-index?q=test"
+    "&dateRange=custom&startdt=2020-01-01&enddt=2020-01-31"
+)
+TODAY_URL = (
+    "https://efts.sec.gov/LATEST/search-index?q=test"
+    "&dateRange=custom&startdt=2024-01-01&enddt=2024-06-15"
+)
+
+
+def test_normalize_url_sorts_query_and_lowercases_host():
+    # GIVEN
+    url = "HTTPS://EFTS.sec.gov/LATEST/search-index?q=test&from=100&page=2#top"
+
+    # WHEN
+    normalized = normalize_url(url)
+
+    # THEN
+    assert (
+        normalized == "https://efts.sec.gov/LATEST/search-index?from=100&page=2&q=test"
+    )
+    assert normalize_url("https://efts.sec.gov/x?b=2&a=1") == normalize_url(
+        "https://efts.sec.gov/x?a=1&b=2"
+    )
+
+
+def test_cache_returns_stored_response_for_equivalent_url(tmp_path):
+    # GIVEN
+    cache = ResponseCache(tmp_path)
+
+    # WHEN
+    cache.set("https://efts.sec.gov/x?a=1&b=2", {"hits": 1})
+
+    # THEN
+    assert cache.get("https://efts.sec.gov/x?b=2&a=1") == {"hits": 1}
+    assert cache.get("https://efts.sec.gov/x?a=1&b=3") is None
+
+
+def test_cache_persists_between_instances(tmp_path):
+    # GIVEN
+    ResponseCache(tmp_path).set(PAST_URL, {"hits": 1})
+
+    # WHEN
+    cache = ResponseCache(tmp_path)
+
+    # THEN
+    assert cache.get(PAST_URL) == {"hits": 1}
+    assert cache.size > 0
+
+
+@freeze_time("2024-06-15")
+def test_cache_ttl_depends_on_end_date(tmp_path):
+    # GIVEN
+    cache = ResponseCache(tmp_path)
+
+    # WHEN / THEN
+    assert cache.ttl_for(PAST_URL) == HISTORICAL_RESPONSE_TTL
+    assert cache.ttl_for(TODAY_URL) == RECENT_RESPONSE_TTL
+    assert cache.ttl_for("https://efts.sec.gov/x?q=test") == RECENT_RESPONSE_TTL
+
+
+def test_cache_expires_recent_responses_first(tmp_path):
+    # GIVEN
+    with freeze_time("2024-06-15 12:00:00"):
+        cache = ResponseCache(tmp_path)
+        cache.set(PAST_URL, {"hits": "past"})
+        cache.set(TODAY_URL, {"hits": "today"})
+
+    # WHEN
+    with freeze_time("2024-06-15 14:00:00"):
+        # THEN
+        assert cache.get(PAST_URL) == {"hits": "past"}
+        assert cache.get(TODAY_URL) is None
+
+    with freeze_time("2024-08-01"):
+        assert cache.get(PAST_URL) is None
+
+
+def test_cache_evicts_least_recently_used_responses(tmp_path):
+    # GIVEN
+    cache = ResponseCache(tmp_path, historical_ttl=timedelta(days=1))
+    cache.set(f"{PAST_URL}&page=1", {"hits": "x" * 100})
+    entry_size = cache.size
+    # Room for two entries, whose sizes can differ by a few bytes, but not three
+    cache.max_size = entry_size * 2 + entry_size // 2
+    cache.set(f"{PAST_URL}&page=2", {"hits": "y" * 100})
+    # Make page 1 the most recently used entry
+    for page, last_used in ((1, 200), (2, 100)):
+        path = cache._path_for(f"{PAST_URL}&page={page}")
+        os.utime(path, (last_used, last_used))
+    assert cache.get(f"{PAST_URL}&page=1") is not None
+
+    # WHEN
+    cache.set(f"{PAST_URL}&page=3", {"hits": "z" * 100})
+
+    # THEN
+    assert cache.get(f"{PAST_URL}&page=2") is None
+    assert cache.get(f"{PAST_URL}&page=1") is not None
+    assert cache.get(f"{PAST_URL}&page=3") is not None
+    assert cache.size <= cache.max_size
+
+
+def test_cache_ignores_corrupt_entries(tmp_path):
+    # GIVEN
+    cache = ResponseCache(tmp_path)
+    cache.set(PAST_URL, {"hits": 1})
+    cache._path_for(PAST_URL).write_text("{not json")
+
+    # WHEN / THEN
+    assert cache.get(PAST_URL) is None
+
+
+def test_cache_clear_deletes_every_response(tmp_path):
+    # GIVEN
+    cache = ResponseCache(tmp_path)
+    cache.set(PAST_URL, {"hits": 1})
+
+    # WHEN
+    cache.clear()
+
+    # THEN
+    assert cache.get(PAST_URL) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_rejects_empty_max_size(tmp_path):
+    # GIVEN / WHEN / THEN
+    with pytest.raises(ValueError, match="Cache max size must be greater than 0."):
+        ResponseCache(tmp_path, max_size=0)
@@ -0,0 +1,109 @@
+import pytest
+
+from edgar_tool.checkpoint import CheckpointMismatchError, SearchCheckpoint
+
+SEARCH_URL = "https://efts.sec.gov/LATEST/search-index?q=test"
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return SearchCheckpoint.for_output(str(tmp_path / "results.csv"))
+
+
+def test_for_output_stores_checkpoint_next_to_output(tmp_path):
+    # GIVEN / WHEN
+    checkpoint = SearchCheckpoint.for_output(str(tmp_path / "results.csv"))
+
+    # THEN
+    assert checkpoint.path == tmp_path / "results.csv.checkpoint"
+
+
+def test_range_is_done_once_all_its_pages_are_done(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+    checkpoint.record_range_pages("range", ["page-1", "page-2"])
+
+    # WHEN
+    checkpoint.mark_page_done("page-1")
+
+    # THEN
+    assert not checkpoint.is_range_done("range")
+    checkpoint.mark_page_done("page-2")
+    assert checkpoint.is_range_done("range")
+
+
+def test_split_range_is_done_once_all_its_children_are_done(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+    checkpoint.record_range_children("root", ["first-half", "second-half"])
+    checkpoint.record_range_pages("first-half", ["page-1"])
+    checkpoint.record_range_pages("second-half", ["page-2"])
+
+    # WHEN
+    checkpoint.mark_page_done("page-1")
+
+    # THEN
+    assert not checkpoint.is_range_done("root")
+    checkpoint.mark_page_done("page-2")
+    assert checkpoint.is_range_done("root")
+
+
+def test_unknown_range_is_not_done(checkpoint):
+    # GIVEN / WHEN
+    checkpoint.start(SEARCH_URL, resume=False)
+
+    # THEN
+    assert not checkpoint.is_range_done("range")
+
+
+def test_resume_loads_progress_of_previous_run(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+    checkpoint.record_range_pages("range", ["page-1", "page-2"])
+    checkpoint.mark_page_done("page-1")
+    checkpoint.mark_page_done("page-2")
+    # Simulate the process being killed halfway through writing a line
+    with open(checkpoint.path, "a") as f:
+        f.write('{"page": "page-')
+
+    # WHEN
+    resumed = SearchCheckpoint(checkpoint.path)
+    resumed.start(SEARCH_URL, resume=True)
+
+    # THEN
+    assert resumed.is_page_done("page-1")
+    assert resumed.is_range_done("range")
+
+
+def test_start_without_resume_discards_previous_progress(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+    checkpoint.record_range_pages("range", ["page-1"])
+    checkpoint.mark_page_done("page-1")
+
+    # WHEN
+    restarted = SearchCheckpoint(checkpoint.path)
+    restarted.start(SEARCH_URL, resume=False)
+
+    # THEN
+    assert not restarted.is_page_done("page-1")
+
+
+def test_resume_different_search_raises(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+
+    # WHEN / THEN
+    with pytest.raises(CheckpointMismatchError, match="different search"):
+        SearchCheckpoint(checkpoint.path).start(f"{SEARCH_URL}2", resume=True)
+
+
+def test_remove_deletes_checkpoint_file(checkpoint):
+    # GIVEN
+    checkpoint.start(SEARCH_URL, resume=False)
+
+    # WHEN
+    checkpoint.remove()
+
+    # THEN
+    assert not checkpoint.path.exists()
@@ -1,9 +1,14 @@
+import json
+from datetime import date
 from unittest.mock import patch
 
 import pytest
 from typer.testing import CliRunner
 
 import edgar_tool
+from edgar_tool.feed_state import RssFeedState
+from edgar_tool.rate_limit import SharedRateLimiter
+from edgar_tool.watch import Watchlist
 
 runner = CliRunner()
 
@@ -16,8 +21,8 @@ def mock_search():
 
 @pytest.fixture(autouse=True)
 def mock_fetch_rss_feed():
-    with patch("edgar_tool.cli.fetch_rss_feed"):
-        yield
+    with patch("edgar_tool.cli.fetch_rss_feed") as mock_fetch_rss_feed:
+        yield mock_fetch_rss_feed
 
 
 @pytest.mark.parametrize(
@@ -96,7 +101,22 @@ class TestTextSearch:
         # THEN
         assert result.exit_code == 0
 
-    @pytest.mark.parametrize("extension", [("csv"), ("json"), ("jsonl")])
+    @pytest.mark.parametrize(
+        "extension",
+        [
+            ("csv"),
+            ("json"),
+            ("jsonl"),
+            ("parquet"),
+            ("arrow"),
+            ("feather"),
+            ("csv.gz"),
+            ("jsonl.gz"),
+            ("json.zst"),
+            ("sqlite"),
+            ("db"),
+        ],
+    )
     def test_with_valid_output_file_extension_passes(self, extension):
         # GIVEN/WHEN
         result = runner.invoke(
@@ -107,7 +127,9 @@ class TestTextSearch:
         # THEN
         assert result.exit_code == 0
 
-    @pytest.mark.parametrize("extension", [("yaml"), ("nonsense"), ("blob")])
+    @pytest.mark.parametrize(
+        "extension", [("yaml"), ("nonsense"), ("blob"), ("gz"), ("parquet.gz")]
+    )
     def test_with_invalid_output_file_extension_fails(self, extension):
         # GIVEN/WHEN
         result = runner.invoke(
@@ -278,6 +300,92 @@ class TestTextSearch:
         # THEN
         assert result.exit_code != 0
 
+    def test_with_valid_concurrency_passes(self, mock_search):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--concurrency", "4"],
+        )
+        # THEN
+        assert result.exit_code == 0
+        assert mock_search.call_args.kwargs.get("concurrency") == 4
+
+    @pytest.mark.parametrize("output", ["results.jsonl", "results.csv", "results.db"])
+    def test_with_resume_passes(self, mock_search, output):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--resume", "--output", output],
+        )
+        # THEN
+        assert result.exit_code == 0
+        assert mock_search.call_args.kwargs.get("resume") is True
+
+    def test_with_cache_dir_passes_caching_transport(self, mock_search, tmp_path):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--cache-dir", str(tmp_path / "cache")],
+        )
+        # THEN
+        assert result.exit_code == 0
+        transport = mock_search.call_args.kwargs.get("transport")
+        assert transport.cache.directory == tmp_path / "cache"
+
+    def test_with_rate_limit_file_passes_shared_rate_limiter(
+        self, mock_search, tmp_path
+    ):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            [
+                "text-search",
+                "example",
+                "--rate-limit-file",
+                str(tmp_path / "rate_limit.sqlite"),
+            ],
+        )
+        # THEN
+        assert result.exit_code == 0
+        rate_limiter = mock_search.call_args.kwargs.get("transport").rate_limiter
+        assert isinstance(rate_limiter, SharedRateLimiter)
+        assert rate_limiter.path == tmp_path / "rate_limit.sqlite"
+
+    def test_without_cache_dir_uses_default_transport(self, mock_search):
+        # GIVEN/WHEN
+        result = runner.invoke(edgar_tool.cli.app, ["text-search", "example"])
+        # THEN
+        assert result.exit_code == 0
+        assert mock_search.call_args.kwargs.get("transport") is None
+
+    def test_with_resume_and_json_output_fails(self):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--resume", "--output", "results.json"],
+        )
+        # THEN
+        assert result.exit_code != 0
+
+    @pytest.mark.parametrize("output", ["results.csv.gz", "results.parquet"])
+    def test_with_resume_and_output_that_cannot_be_appended_to_fails(self, output):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--resume", "--output", output],
+        )
+        # THEN
+        assert result.exit_code != 0
+
+    def test_with_zero_concurrency_fails(self):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["text-search", "example", "--concurrency", "0"],
+        )
+        # THEN
+        assert result.exit_code != 0
+
 
 class TestRss:
     def test_with_no_tickers_fails(self):
@@ -314,6 +422,47 @@ class TestRss:
         # THEN
         assert result.exit_code == 0
 
+    @pytest.mark.parametrize(
+        "extension", [("parquet"), ("arrow"), ("feather"), ("csv.gz"), ("csv.zst")]
+    )
+    def test_columnar_or_compressed_output_file_extension_passes(self, extension):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["rss", "AAPL", "--output", f"test.{extension}"],
+        )
+
+        # THEN
+        assert result.exit_code == 0
+
+    def test_sqlite_output_file_with_every_n_mins_fetches_the_feed(
+        self, mock_fetch_rss_feed
+    ):
+        # GIVEN
+        mock_fetch_rss_feed.side_effect = KeyboardInterrupt
+
+        # WHEN
+        runner.invoke(
+            edgar_tool.cli.app,
+            ["rss", "AAPL", "--output", "test.sqlite", "--every-n-mins", "10"],
+        )
+
+        # THEN
+        mock_fetch_rss_feed.assert_called_once()
+        assert mock_fetch_rss_feed.call_args.args[1] == "test.sqlite"
+        assert isinstance(mock_fetch_rss_feed.call_args.kwargs["state"], RssFeedState)
+
+    def test_columnar_output_file_with_every_n_mins_fails(self, mock_fetch_rss_feed):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["rss", "AAPL", "--output", "test.parquet", "--every-n-mins", "10"],
+        )
+
+        # THEN
+        assert result.exit_code != 0
+        mock_fetch_rss_feed.assert_not_called()
+
     @pytest.mark.parametrize("extension", [("yaml"), ("nonsense"), ("blob")])
     def test_invalid_output_file_extension_fails(self, extension):
         # GIVEN/WHEN
@@ -334,3 +483,145 @@ class TestRss:
 
         # THEN
         assert result.exit_code == 0
+
+    def test_with_rate_limit_file_passes_shared_rate_limiter(
+        self, mock_fetch_rss_feed, tmp_path
+    ):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["rss", "AAPL", "--rate-limit-file", str(tmp_path / "rate_limit.sqlite")],
+        )
+
+        # THEN
+        assert result.exit_code == 0
+        transport = mock_fetch_rss_feed.call_args.kwargs.get("transport")
+        assert isinstance(transport.rate_limiter, SharedRateLimiter)
+
+
+class TestRssBackfill:
+    @pytest.fixture
+    def mock_backfill_rss_feed(self):
+        with patch("edgar_tool.cli.backfill_rss_feed") as mock_backfill_rss_feed:
+            yield mock_backfill_rss_feed
+
+    def test_with_months_passes(self, mock_backfill_rss_feed):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            [
+                "rss-backfill",
+                "AAPL",
+                "--from",
+                "2015-01",
+                "--to",
+                "2024-12",
+                "--concurrency",
+                "8",
+                "--output",
+                "backfill.sqlite",
+            ],
+        )
+
+        # THEN
+        assert result.exit_code == 0
+        args, kwargs = mock_backfill_rss_feed.call_args
+        assert args == (
+            ["AAPL"],
+            "backfill.sqlite",
+            date(2015, 1, 1),
+            date(2024, 12, 1),
+        )
+        assert kwargs["concurrency"] == 8
+
+    def test_without_from_fails(self, mock_backfill_rss_feed):
+        # GIVEN/WHEN
+        result = runner.invoke(edgar_tool.cli.app, ["rss-backfill", "AAPL"])
+
+        # THEN
+        assert result.exit_code != 0
+        mock_backfill_rss_feed.assert_not_called()
+
+    def test_with_from_after_to_fails(self, mock_backfill_rss_feed):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["rss-backfill", "AAPL", "--from", "2024-02", "--to", "2024-01"],
+        )
+
+        # THEN
+        assert result.exit_code != 0
+        mock_backfill_rss_feed.assert_not_called()
+
+    def test_with_months_before_the_first_archive_fails(self, mock_backfill_rss_feed):
+        # GIVEN/WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app,
+            ["rss-backfill", "AAPL", "--from", "2004-01", "--to", "2005-03"],
+        )
+
+        # THEN
+        assert result.exit_code != 0
+        assert "--to" in result.output
+        mock_backfill_rss_feed.assert_not_called()
+
+    def test_other_errors_are_not_reported_as_invalid_months(
+        self, mock_backfill_rss_feed
+    ):
+        # GIVEN
+        mock_backfill_rss_feed.side_effect = ValueError("corrupt ticker index")
+
+        # WHEN
+        result = runner.invoke(
+            edgar_tool.cli.app, ["rss-backfill", "AAPL", "--from", "2015-01"]
+        )
+
+        # THEN
+        assert isinstance(result.exception, ValueError)
+        assert "--from" not in result.output
+
+
+class TestWatch:
+    @pytest.fixture
+    def mock_watch(self):
+        # watch is async, so it is patched with an awaitable AsyncMock
+        with patch("edgar_tool.cli.watch") as mock_watch:
+            yield mock_watch
+
+    def test_with_config_passes(self, mock_watch, tmp_path):
+        # GIVEN
+        config = tmp_path / "watch.json"
+        config.write_text(
+            json.dumps(
+                {
+                    "watchlists": {
+                        "big-tech": {
+                            "tickers": ["AAPL"],
+                            "every_n_mins": 10,
+                            "output": "big_tech.csv",
+                        }
+                    }
+                }
+            )
+        )
+
+        # WHEN
+        result = runner.invoke(edgar_tool.cli.app, ["watch", str(config), "-rtm"])
+
+        # THEN
+        assert result.exit_code == 0
+        args, kwargs = mock_watch.call_args
+        assert args == ([Watchlist("big-tech", ["AAPL"], 10, "big_tech.csv")],)
+        assert kwargs["refresh_tickers_mapping"]
+
+    def test_with_invalid_config_fails(self, mock_watch, tmp_path):
+        # GIVEN
+        config = tmp_path / "watch.json"
+        config.write_text(json.dumps({"watchlists": {}}))
+
+        # WHEN
+        result = runner.invoke(edgar_tool.cli.app, ["watch", str(config)])
+
+        # THEN
+        assert result.exit_code != 0
+        mock_watch.assert_not_called()
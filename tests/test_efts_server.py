@@ -0,0 +1,163 @@
+from datetime import date
+
+import pytest
+import requests
+
+from edgar_tool.efts_server import (
+    HostRewritingTransport,
+    LocalEftsServer,
+    generate_synthetic_hits,
+)
+from edgar_tool.rate_limit import AdaptiveRateLimiter, TokenBucketRateLimiter
+from edgar_tool.replay import RecordingTransport, build_response
+from edgar_tool.search_params import SearchParams
+from edgar_tool.text_search import iter_search
+
+SEARCH_URL = "https://efts.sec.gov/LATEST/search-index"
+
+
+@pytest.fixture
+def fast_rate_limiter():
+    return TokenBucketRateLimiter(requests_per_second=100_000, burst=100)
+
+
+def test_generate_synthetic_hits_is_deterministic():
+    # GIVEN / WHEN
+    first = generate_synthetic_hits(50, date(2024, 1, 1), date(2024, 1, 31), seed=1)
+    second = generate_synthetic_hits(50, date(2024, 1, 1), date(2024, 1, 31), seed=1)
+
+    # THEN
+    assert first == second
+    assert len({hit["_source"]["adsh"] for hit in first}) == 50
+    assert all(
+        "2024-01-01" <= hit["_source"]["file_date"] <= "2024-01-31" for hit in first
+    )
+
+
+def test_server_paginates_and_caps_hits():
+    # GIVEN
+    hits = generate_synthetic_hits(10_050, date(2024, 1, 1), date(2024, 1, 1))
+
+    with LocalEftsServer(hits=hits) as server:
+        # WHEN
+        first_page = requests.get(f"{server.base_url}/LATEST/search-index?q=x").json()
+        second_page = requests.get(
+            f"{server.base_url}/LATEST/search-index?q=x&page=2&from=100"
+        ).json()
+        past_cap = requests.get(
+            f"{server.base_url}/LATEST/search-index?q=x&page=101&from=10000"
+        )
+
+    # THEN
+    assert first_page["hits"]["total"] == {"value": 10_000, "relation": "gte"}
+    assert len(first_page["hits"]["hits"]) == 100
+    assert first_page["hits"]["hits"][0] != second_page["hits"]["hits"][0]
+    form_filter = first_page["aggregations"]["form_filter"]
+    assert (
+        sum(b["doc_count"] for b in form_filter["buckets"])
+        + form_filter["sum_other_doc_count"]
+        == 10_050
+    )
+    assert past_cap.status_code == 500
+
+
+def test_server_filters_by_date_form_and_location():
+    # GIVEN
+    hits = generate_synthetic_hits(500, date(2024, 1, 1), date(2024, 1, 31))
+    expected = [
+        hit
+        for hit in hits
+        if hit["_source"]["file_date"] <= "2024-01-10"
+        and hit["_source"]["root_forms"] == ["4"]
+        and hit["_source"]["biz_states"] == ["NY"]
+    ]
+
+    with LocalEftsServer(hits=hits) as server:
+        # WHEN
+        response = requests.get(
+            f"{server.base_url}/LATEST/search-index?q=x&startdt=2024-01-01"
+            "&enddt=2024-01-10&category=custom&forms=4&locationCode=NY"
+        ).json()
+
+    # THEN
+    assert response["hits"]["total"]["value"] == len(expected)
+
+
+def test_server_throttles_requests_over_the_rate_limit():
+    # GIVEN
+    with LocalEftsServer(requests_per_second=0.1) as server:
+        # WHEN
+        first = requests.get(f"{server.base_url}/LATEST/search-index?q=x")
+        second = requests.get(f"{server.base_url}/LATEST/search-index?q=x")
+
+    # THEN
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "1"
+    assert server.throttled_count == 1
+
+
+def test_server_answers_from_recorded_archive(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "rss.jsonl.gz"
+    rss_url = "https://www.sec.gov/Archives/edgar/usgaap.rss.xml"
+    transport = RecordingTransport(archive_path)
+    transport.session.get = lambda url, **kwargs: build_response(
+        url, 200, b"<rss/>", "application/rss+xml"
+    )
+    with transport:
+        transport.get(rss_url)
+
+    with LocalEftsServer(archive_path=archive_path) as server:
+        # WHEN
+        response = HostRewritingTransport(server.base_url).get(rss_url)
+
+    # THEN
+    assert response.status_code == 200
+    assert response.text == "<rss/>"
+
+
+def test_search_against_local_server_retrieves_every_hit_of_busy_day(
+    fast_rate_limiter,
+):
+    """Searching a day with more than 10,000 hits retrieves all of them by splitting
+    the day by form type."""
+    # GIVEN
+    hits = generate_synthetic_hits(12_000, date(2024, 1, 2), date(2024, 1, 2))
+    search_params = SearchParams(
+        keywords=["x"], start_date="2024-01-02", end_date="2024-01-02"
+    )
+
+    with LocalEftsServer(hits=hits) as server:
+        transport = HostRewritingTransport(
+            server.base_url, rate_limiter=fast_rate_limiter
+        )
+        # WHEN
+        rows = list(iter_search(search_params, concurrency=4, transport=transport))
+
+    # THEN
+    expected_urls = {
+        f"https://www.sec.gov/Archives/edgar/data/{hit['_source']['ciks'][0].lstrip('0')}"
+        f"/{hit['_source']['adsh'].replace('-', '')}/{hit['_id'].split(':')[-1]}"
+        for hit in hits
+    }
+    assert {row["filing_document_url"] for row in rows} == expected_urls
+
+
+def test_search_against_throttling_server_slows_down_instead_of_failing():
+    # GIVEN
+    hits = generate_synthetic_hits(400, date(2024, 1, 2), date(2024, 1, 2))
+    search_params = SearchParams(
+        keywords=["x"], start_date="2024-01-02", end_date="2024-01-02"
+    )
+    rate_limiter = AdaptiveRateLimiter(requests_per_second=40, backoff_base_seconds=0.1)
+
+    with LocalEftsServer(hits=hits, requests_per_second=20) as server:
+        transport = HostRewritingTransport(server.base_url, rate_limiter=rate_limiter)
+        # WHEN
+        rows = list(iter_search(search_params, transport=transport))
+
+    # THEN
+    assert len(rows) == 400
+    assert server.throttled_count > 0
+    assert rate_limiter.current_rate < 40
@@ -0,0 +1,96 @@
+import pytest
+
+from edgar_tool.feed_state import FEED_STATE_FILE_SUFFIX, RssFeedState
+from edgar_tool.replay import build_response
+
+
+def test_is_new_only_rejects_remembered_accession_numbers():
+    # GIVEN
+    state = RssFeedState("state")
+
+    # WHEN
+    first = state.is_new("0000320193-25-000008")
+    second = state.is_new("0000320193-25-000008")
+    state.remember(["0000320193-25-000008", None])
+    third = state.is_new("0000320193-25-000008")
+
+    # THEN
+    assert first
+    assert second
+    assert not third
+    assert len(state) == 1
+    assert state.is_new(None)
+
+
+def test_remember_forgets_the_oldest_accession_numbers():
+    # GIVEN
+    state = RssFeedState("state", max_seen_accession_numbers=2)
+    state.remember(["1", "2"])
+    # Saving an accession number again makes it the most recent
+    state.remember(["1"])
+
+    # WHEN
+    state.remember(["3"])
+
+    # THEN
+    assert len(state) == 2
+    assert state.is_new("2")
+    assert not state.is_new("1")
+    assert not state.is_new("3")
+
+
+def test_state_is_saved_and_loaded_next_to_the_output_file(tmp_path):
+    # GIVEN
+    output = tmp_path / "rss_feed.csv"
+    output.write_text("")
+    state = RssFeedState.for_output(str(output))
+    state.remember(["0001652044-25-000014"])
+    response = build_response("https://www.sec.gov/feed.xml", 200, b"")
+    response.headers["ETag"] = '"abc"'
+    response.headers["Last-Modified"] = "Fri, 31 Jan 2025 22:57:12 GMT"
+    state.update_validators(response)
+
+    # WHEN
+    state.save()
+    loaded_state = RssFeedState.for_output(str(output))
+
+    # THEN
+    assert state.path == tmp_path / f"rss_feed.csv{FEED_STATE_FILE_SUFFIX}"
+    assert loaded_state.conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Fri, 31 Jan 2025 22:57:12 GMT",
+    }
+    assert not loaded_state.is_new("0001652044-25-000014")
+
+
+def test_state_is_not_loaded_if_the_output_file_was_deleted(tmp_path):
+    # GIVEN
+    output = tmp_path / "rss_feed.csv"
+    state = RssFeedState.for_output(str(output))
+    state.remember(["0001652044-25-000014"])
+    state.save()
+
+    # WHEN
+    loaded_state = RssFeedState.for_output(str(output))
+
+    # THEN
+    assert loaded_state.conditional_headers() == {}
+    assert loaded_state.is_new("0001652044-25-000014")
+
+
+def test_corrupt_state_file_is_ignored(tmp_path):
+    # GIVEN
+    state = RssFeedState(tmp_path / "state")
+    state.path.write_text('{"etag": "abc", "seen": [')
+
+    # WHEN
+    state.load()
+
+    # THEN
+    assert state.conditional_headers() == {}
+    assert len(state) == 0
+
+
+def test_max_seen_accession_numbers_must_be_positive():
+    with pytest.raises(ValueError, match="at least 1"):
+        RssFeedState("state", max_seen_accession_numbers=0)
@@ -0,0 +1,145 @@
+import gc
+import json
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from edgar_tool.filing_hit import FilingHit
+from edgar_tool.search_params import SearchParams
+from edgar_tool.text_search import _parse_row, iter_search, search
+
+RESPONSES_DIR = Path(__file__).parent / "responses"
+
+with open(RESPONSES_DIR / "parsed_rows_snapshot.json") as f:
+    PARSED_ROWS_SNAPSHOT = json.load(f)
+
+
+@pytest.mark.parametrize(
+    "case",
+    sorted(
+        case
+        for case, expected in PARSED_ROWS_SNAPSHOT["edge_cases"].items()
+        if "output" in expected
+    ),
+)
+def test_to_dict_matches_parsed_row_snapshot(case):
+    # GIVEN
+    expected = PARSED_ROWS_SNAPSHOT["edge_cases"][case]
+
+    # WHEN
+    record = FilingHit.from_hit(expected["input"])
+
+    # THEN
+    assert record.to_dict() == expected["output"]
+
+
+def test_to_dict_keeps_field_order():
+    # GIVEN
+    hit = PARSED_ROWS_SNAPSHOT["edge_cases"]["multiple_entities"]["input"]
+
+    # WHEN
+    record = FilingHit.from_hit(hit)
+
+    # THEN
+    assert tuple(record.to_dict()) == FilingHit.FIELD_NAMES
+    assert list(record.to_dict().items()) == list(_parse_row(hit).items())
+
+
+def test_record_derives_fields_when_accessed():
+    # GIVEN
+    hit = PARSED_ROWS_SNAPSHOT["edge_cases"]["multiple_entities"]["input"]
+
+    # WHEN
+    record = FilingHit.from_hit(hit)
+
+    # THEN
+    assert record.ciks == ("0001682472", "0000070858")
+    assert record.ciks_trimmed == ["1682472", "70858"]
+    assert record.entity_names_and_tickers() == (
+        ["BofA Finance LLC", "BANK OF AMERICA CORP /DE/"],
+        ["BAC, BAC-PB"],
+    )
+    assert record.filing_details_urls == [
+        "https://www.sec.gov/Archives/edgar/data/1682472/000032019324000069/0000320193-24-000069-index.html",
+        "https://www.sec.gov/Archives/edgar/data/70858/000032019324000069/0000320193-24-000069-index.html",
+    ]
+
+
+def test_records_share_repeated_values():
+    # GIVEN
+    hit = PARSED_ROWS_SNAPSHOT["edge_cases"]["plain"]["input"]
+
+    # WHEN
+    first = FilingHit.from_hit(json.loads(json.dumps(hit)))
+    second = FilingHit.from_hit(json.loads(json.dumps(hit)))
+
+    # THEN
+    assert first == second
+    assert first.ciks is second.ciks
+    assert first.display_names is second.display_names
+
+
+def _retained_bytes_per_row(parse):
+    """Memory kept alive by the parsed rows once the search responses are discarded."""
+    texts = [path.read_text() for path in sorted(RESPONSES_DIR.glob("*_hit*.json"))]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        rows = []
+        for text in texts:
+            rows.extend(parse(hit) for hit in json.loads(text)["hits"]["hits"])
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return retained / len(rows)
+
+
+def test_records_use_several_times_less_memory_than_dictionaries():
+    # GIVEN / WHEN
+    dictionary_size = _retained_bytes_per_row(_parse_row)
+    record_size = _retained_bytes_per_row(FilingHit.from_hit)
+
+    # THEN
+    assert record_size * 2.5 < dictionary_size
+
+
+def test_iter_search_yields_records():
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-01", end_date="2022-01-31"
+    )
+    with open(RESPONSES_DIR / "100_hits.json") as f:
+        response = json.load(f)
+
+    with patch("edgar_tool.text_search.fetch_page", return_value=response):
+        # WHEN
+        records = list(iter_search(search_params, as_records=True))
+        rows = search(search_params)
+
+    # THEN
+    assert all(isinstance(record, FilingHit) for record in records)
+    assert [record.to_dict() for record in records] == rows
+
+
+def test_search_returns_records_only_without_output(tmp_path):
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-01", end_date="2022-01-31"
+    )
+    output = tmp_path / "results.jsonl"
+    with open(RESPONSES_DIR / "100_hits.json") as f:
+        response = json.load(f)
+
+    with patch("edgar_tool.text_search.fetch_page", return_value=response):
+        # WHEN
+        records = search(search_params, as_records=True)
+        search(search_params, output=str(output), as_records=True)
+
+    # THEN
+    assert len(records) == 100
+    assert all(isinstance(record, FilingHit) for record in records)
+    with open(output) as f:
+        assert [json.loads(line) for line in f] == [r.to_dict() for r in records]
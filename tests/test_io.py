@@ -1,9 +1,19 @@
+import csv
+import gzip
+import io
 import json
 import re
+import sqlite3
+from datetime import date
 
 import pytest
 
-from edgar_tool.io import write_results_to_file
+from edgar_tool.constants import RSS_FEED_CSV_FIELDS_NAMES
+from edgar_tool.io import (
+    open_results_writer,
+    supports_append,
+    write_results_to_file,
+)
 
 
 @pytest.fixture
@@ -97,6 +107,42 @@ def test_write_results_to_json(data, field_names, tmp_path):
     assert actual_result == expected_result
 
 
+@pytest.mark.parametrize("number_of_rows", [0, 1, 3])
+def test_json_writer_writes_the_same_bytes_as_json_dumps(
+    data, field_names, tmp_path, number_of_rows
+):
+    # GIVEN
+    file_name = tmp_path / "results.json"
+    rows = [
+        {**data[0], "entity_name": ["Line\nbreak", "Caf\u00e9"], "film_num": index}
+        for index in range(number_of_rows)
+    ]
+
+    # WHEN
+    with open_results_writer(str(file_name), field_names) as writer:
+        writer.write_rows(row for row in rows[:1])
+        writer.write_rows(row for row in rows[1:])
+
+    # THEN
+    assert file_name.read_text() == json.dumps(rows, indent=4)
+
+
+def test_json_writer_writes_rows_as_they_arrive(data, field_names, tmp_path):
+    # GIVEN
+    file_name = tmp_path / "results.json"
+
+    # WHEN
+    with open_results_writer(str(file_name), field_names) as writer:
+        writer.write_rows(data)
+        writer.flush()
+        text_before_close = file_name.read_text()
+
+    # THEN
+    assert "FINANCIAL INVESTORS TRUST" in text_before_close
+    assert not text_before_close.endswith("]")
+    assert json.loads(file_name.read_text()) == data
+
+
 def test_write_results_to_jsonlines(data, field_names, tmp_path):
     # GIVEN
     file_name = tmp_path / "results.jsonl"
@@ -129,8 +175,335 @@ def test_write_results_to_jsonlines(data, field_names, tmp_path):
 def test_write_results_to_file_with_unsupported_extension(data, field_names, tmp_path):
     # GIVEN
     file_name = tmp_path / "results.txt"
-    expected_error_message = f"Unsupported file extension for destination file: {file_name} (should be one of .csv, .jsonl, .json)"
+    expected_error_message = f"Unsupported file extension for destination file: {file_name} (should be one of .csv, .jsonl, .json, .parquet, .arrow, .feather, .sqlite, .db, and CSV and JSON files can be compressed by adding .gz or .zst)"
 
     # WHEN
     with pytest.raises(ValueError, match=re.escape(expected_error_message)):
         write_results_to_file(data, str(file_name), field_names)
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl", "json"])
+def test_write_results_to_file_accepts_generator(
+    data, field_names, tmp_path, extension
+):
+    # GIVEN
+    file_name = tmp_path / f"results.{extension}"
+
+    # WHEN
+    write_results_to_file((row for row in data), str(file_name), field_names)
+
+    # THEN
+    assert "FINANCIAL INVESTORS TRUST" in file_name.read_text()
+
+
+def test_results_writer_appends_batches_with_a_single_csv_header(
+    data, field_names, tmp_path
+):
+    # GIVEN
+    file_name = tmp_path / "results.csv"
+
+    # WHEN
+    with open_results_writer(str(file_name), field_names) as writer:
+        writer.write_rows(data)
+        writer.flush()
+        lines_after_first_batch = file_name.read_text().splitlines()
+        writer.write_rows(data)
+
+    # THEN
+    assert len(lines_after_first_batch) == 2
+    lines = file_name.read_text().splitlines()
+    assert len(lines) == 3
+    assert lines[0].startswith("root_form,")
+
+
+def _read_columnar_file(file_name):
+    pyarrow = pytest.importorskip("pyarrow")
+    if file_name.suffix == ".parquet":
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_table(file_name)
+    import pyarrow.feather
+
+    return pyarrow.feather.read_table(file_name)
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow", "feather"])
+def test_write_results_to_columnar_file(data, field_names, tmp_path, extension):
+    # GIVEN
+    pytest.importorskip("pyarrow")
+    file_name = tmp_path / f"results.{extension}"
+    data[0]["entity_name"] = ["BofA Finance LLC", "BANK OF AMERICA CORP /DE/"]
+
+    # WHEN
+    write_results_to_file(data, str(file_name), field_names)
+
+    # THEN
+    table = _read_columnar_file(file_name)
+    assert table.column_names == field_names
+    row = table.to_pylist()[0]
+    assert row["root_form"] == ["DEF 14A"]
+    assert row["filed_at"] == date(2021, 1, 4)
+    assert row["entity_name"] == ["BofA Finance LLC", "BANK OF AMERICA CORP /DE/"]
+    assert row["ticker"] is None
+    assert row["filing_details_url"] == [data[0]["filing_details_url"]]
+
+
+@pytest.mark.parametrize("extension", ["parquet", "arrow"])
+def test_columnar_writer_writes_row_groups_with_dictionary_encoded_columns(
+    data, field_names, tmp_path, extension
+):
+    # GIVEN
+    pyarrow = pytest.importorskip("pyarrow")
+    file_name = tmp_path / f"results.{extension}"
+    rows = [
+        {**data[0], "root_form": form, "film_num": str(index)}
+        for index, form in enumerate(["8-K", "10-K", "8-K", "4", "10-K"] * 5)
+    ]
+
+    # WHEN
+    with open_results_writer(str(file_name), field_names) as writer:
+        writer.row_group_size = 10
+        writer.write_rows(row for row in rows[:12])
+        writer.write_rows(row for row in rows[12:])
+
+    # THEN
+    if extension == "parquet":
+        import pyarrow.parquet
+
+        assert pyarrow.parquet.ParquetFile(file_name).num_row_groups == 3
+    table = _read_columnar_file(file_name)
+    assert pyarrow.types.is_dictionary(table.schema.field("root_form").type.value_type)
+    assert pyarrow.types.is_string(table.schema.field("film_num").type.value_type)
+    assert [row["root_form"] for row in table.to_pylist()] == [
+        [row["root_form"]] for row in rows
+    ]
+    assert [row["film_num"] for row in table.to_pylist()] == [
+        [str(index)] for index in range(len(rows))
+    ]
+
+
+def test_write_rss_results_to_parquet(tmp_path):
+    # GIVEN
+    pytest.importorskip("pyarrow")
+    file_name = tmp_path / "rss_feed.parquet"
+    row = {name: f"{name} value" for name in RSS_FEED_CSV_FIELDS_NAMES}
+    row["ticker"] = ["GOOGL", "GOOG"]
+    row["xbrl_files"] = "https://www.sec.gov/Archives/edgar/data/1652044/0001.htm"
+
+    # WHEN
+    write_results_to_file([row], str(file_name), RSS_FEED_CSV_FIELDS_NAMES)
+
+    # THEN
+    actual_row = _read_columnar_file(file_name).to_pylist()[0]
+    assert actual_row["ticker"] == ["GOOGL", "GOOG"]
+    assert actual_row["xbrl_files"] == [row["xbrl_files"]]
+    assert actual_row["company_name"] == "company_name value"
+
+
+def _read_compressed_text(file_name):
+    if file_name.suffix == ".gz":
+        with gzip.open(file_name, "rt", encoding="utf-8", newline="") as f:
+            return f.read()
+    zstandard = pytest.importorskip("zstandard")
+    with zstandard.open(file_name, "rt", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("compression", ["gz", "zst"])
+@pytest.mark.parametrize("extension", ["csv", "jsonl", "json"])
+def test_write_results_to_compressed_file(
+    data, field_names, tmp_path, extension, compression
+):
+    # GIVEN
+    if compression == "zst":
+        pytest.importorskip("zstandard")
+    file_name = tmp_path / f"results.{extension}.{compression}"
+    uncompressed_file_name = tmp_path / f"results.{extension}"
+
+    # WHEN
+    write_results_to_file(data * 50, str(file_name), field_names)
+    write_results_to_file(data * 50, str(uncompressed_file_name), field_names)
+
+    # THEN
+    assert (
+        _read_compressed_text(file_name) == uncompressed_file_name.read_bytes().decode()
+    )
+    assert file_name.stat().st_size * 5 < uncompressed_file_name.stat().st_size
+
+
+@pytest.mark.parametrize("compression", ["gz", "zst"])
+def test_appending_to_compressed_csv_file_writes_a_single_header(
+    data, field_names, tmp_path, compression
+):
+    # GIVEN
+    if compression == "zst":
+        pytest.importorskip("zstandard")
+    file_name = tmp_path / f"results.csv.{compression}"
+
+    # WHEN
+    write_results_to_file(data, str(file_name), field_names)
+    write_results_to_file(data, str(file_name), field_names)
+
+    # THEN
+    rows = list(csv.DictReader(io.StringIO(_read_compressed_text(file_name))))
+    assert [row["entity_name"] for row in rows] == ["FINANCIAL INVESTORS TRUST"] * 2
+
+
+def test_compressed_files_do_not_support_resuming(field_names, tmp_path):
+    # GIVEN
+    file_name = tmp_path / "results.jsonl.gz"
+
+    # WHEN
+    with open_results_writer(str(file_name), field_names) as writer:
+        supports_append = writer.supports_append
+
+    # THEN
+    assert not supports_append
+
+
+def test_columnar_files_cannot_be_compressed(data, field_names, tmp_path):
+    # GIVEN
+    file_name = tmp_path / "results.parquet.gz"
+
+    # WHEN / THEN
+    with pytest.raises(ValueError, match="Unsupported file extension"):
+        write_results_to_file(data, str(file_name), field_names)
+
+
+@pytest.fixture
+def rows_of_two_filings(data):
+    other_document_url = data[0]["filing_document_url"].replace(
+        "fp0060683_def14a.htm", "exhibit.htm"
+    )
+    return [
+        data[0],
+        {**data[0], "filing_document_url": other_document_url, "film_num": "1"},
+    ]
+
+
+def test_write_results_to_sqlite(rows_of_two_filings, field_names, tmp_path):
+    # GIVEN
+    file_name = tmp_path / "results.sqlite"
+    rows_of_two_filings[1]["entity_name"] = ["BofA Finance LLC", "BANK OF AMERICA"]
+
+    # WHEN
+    write_results_to_file(rows_of_two_filings, str(file_name), field_names)
+
+    # THEN
+    with sqlite3.connect(file_name) as connection:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute("SELECT * FROM results ORDER BY rowid").fetchall()
+    assert [(row["adsh"], row["document_id"]) for row in rows] == [
+        ("0001398344-21-000011", "fp0060683_def14a.htm"),
+        ("0001398344-21-000011", "exhibit.htm"),
+    ]
+    assert rows[0]["entity_name"] == "FINANCIAL INVESTORS TRUST"
+    assert json.loads(rows[1]["entity_name"]) == ["BofA Finance LLC", "BANK OF AMERICA"]
+    assert rows[0]["ticker"] is None
+
+
+def test_sqlite_writer_updates_filings_already_written(
+    rows_of_two_filings, field_names, tmp_path
+):
+    # GIVEN
+    file_name = tmp_path / "results.db"
+    write_results_to_file(rows_of_two_filings, str(file_name), field_names)
+    updated_row = {**rows_of_two_filings[1], "film_num": "2"}
+
+    # WHEN
+    write_results_to_file([updated_row, updated_row], str(file_name), field_names)
+
+    # THEN
+    with sqlite3.connect(file_name) as connection:
+        film_nums = connection.execute(
+            "SELECT document_id, film_num FROM results ORDER BY rowid"
+        ).fetchall()
+    assert film_nums == [("fp0060683_def14a.htm", "21500495"), ("exhibit.htm", "2")]
+
+
+@pytest.mark.parametrize("url", [[], None, "", "not a filing url"])
+def test_sqlite_writer_keys_rows_without_filing_url_by_their_content(
+    field_names, tmp_path, url
+):
+    # GIVEN
+    file_name = tmp_path / "results.sqlite"
+    row = {"entity_name": "NO CIK FUND", "filing_document_url": url}
+    other_row = {"entity_name": "OTHER FUND", "filing_document_url": url}
+
+    # WHEN
+    write_results_to_file([row, other_row], str(file_name), field_names)
+    write_results_to_file([row], str(file_name), field_names)
+
+    # THEN
+    with sqlite3.connect(file_name) as connection:
+        rows = connection.execute(
+            "SELECT adsh, document_id, entity_name FROM results ORDER BY rowid"
+        ).fetchall()
+    assert [(adsh, entity_name) for adsh, _, entity_name in rows] == [
+        ("", "NO CIK FUND"),
+        ("", "OTHER FUND"),
+    ]
+    assert all(document_id for _, document_id, _ in rows)
+
+
+def test_sqlite_writer_indexes_ciks_forms_and_dates(data, field_names, tmp_path):
+    # GIVEN
+    file_name = tmp_path / "results.sqlite"
+
+    # WHEN
+    write_results_to_file(data, str(file_name), field_names)
+
+    # THEN
+    with sqlite3.connect(file_name) as connection:
+        indexes = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ).fetchall()
+    assert sorted(indexes) == [
+        ("results_company_cik",),
+        ("results_filed_at",),
+        ("results_root_form",),
+    ]
+
+
+def test_sqlite_writer_keys_rss_results_by_accession_number(tmp_path):
+    # GIVEN
+    file_name = tmp_path / "rss_feed.sqlite"
+    row = {name: f"{name} value" for name in RSS_FEED_CSV_FIELDS_NAMES}
+    row["accession_number"] = "0001652044-25-000014"
+
+    # WHEN
+    write_results_to_file([row], str(file_name), RSS_FEED_CSV_FIELDS_NAMES)
+    write_results_to_file(
+        [{**row, "title": "New title"}], str(file_name), RSS_FEED_CSV_FIELDS_NAMES
+    )
+
+    # THEN
+    with sqlite3.connect(file_name) as connection:
+        rows = connection.execute("SELECT adsh, title FROM results").fetchall()
+    assert rows == [("0001652044-25-000014", "New title")]
+
+
+@pytest.mark.parametrize(
+    "file_name, expected",
+    [
+        ("results.csv", True),
+        ("results.jsonl", True),
+        ("results.sqlite", True),
+        ("results.db", True),
+        ("results.json", False),
+        ("results.csv.gz", False),
+        ("results.jsonl.zst", False),
+        ("results.parquet", False),
+        ("results.arrow", False),
+    ],
+)
+def test_supports_append_does_not_open_the_file(tmp_path, file_name, expected):
+    # GIVEN
+    path = tmp_path / file_name
+
+    # WHEN
+    result = supports_append(str(path))
+
+    # THEN
+    assert result == expected
+    assert not path.exists()
@@ -0,0 +1,335 @@
+import multiprocessing
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import pytest
+
+from edgar_tool import rate_limit
+from edgar_tool.rate_limit import (
+    SUCCESSES_BEFORE_INCREASE,
+    AdaptiveRateLimiter,
+    SharedRateLimiter,
+    TokenBucketRateLimiter,
+    get_default_rate_limiter,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Stands in for the time module so the tests don't actually sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake_clock = FakeClock()
+    with patch("edgar_tool.rate_limit.time", fake_clock):
+        yield fake_clock
+
+
+def test_acquire_does_not_wait_for_first_request(clock):
+    # GIVEN
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=10)
+
+    # WHEN
+    rate_limiter.acquire()
+
+    # THEN
+    assert clock.sleeps == []
+
+
+def test_acquire_spaces_requests_at_configured_rate(clock):
+    # GIVEN
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=10)
+
+    # WHEN
+    for _ in range(11):
+        rate_limiter.acquire()
+
+    # THEN
+    assert clock.now == pytest.approx(1.0)
+    assert all(s == pytest.approx(0.1) for s in clock.sleeps)
+
+
+def test_acquire_allows_burst_after_quiet_period(clock):
+    # GIVEN
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=10, burst=3)
+    clock.now += 5
+
+    # WHEN
+    for _ in range(3):
+        rate_limiter.acquire()
+
+    # THEN
+    assert clock.sleeps == []
+
+
+def test_waiting_callers_reserve_consecutive_slots(clock):
+    """Callers that arrive at the same time, e.g. from different threads, must each
+    wait for their own slot instead of all being released together."""
+    # GIVEN
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=4)
+
+    # WHEN
+    delays = [rate_limiter._reserve() for _ in range(4)]
+
+    # THEN
+    assert delays == pytest.approx([0.0, 0.25, 0.5, 0.75])
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"requests_per_second": 0}, "Requests per second must be greater than 0."),
+        ({"burst": 0}, "Burst must be at least 1."),
+    ],
+)
+def test_invalid_configuration_raises(kwargs, message):
+    # GIVEN / WHEN / THEN
+    with pytest.raises(ValueError, match=message):
+        TokenBucketRateLimiter(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("5", 5.0),
+        (None, None),
+        ("", None),
+        ("soon", None),
+    ],
+)
+def test_parse_retry_after_seconds(value, expected):
+    # GIVEN / WHEN / THEN
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    # GIVEN
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    # WHEN
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    # THEN
+    assert 28 <= seconds <= 30
+
+
+@pytest.fixture
+def no_jitter():
+    """Makes the jittered backoff always take its longest value."""
+    with patch("edgar_tool.rate_limit.random.uniform", side_effect=lambda a, b: b):
+        yield
+
+
+def test_adaptive_rate_limiter_halves_rate_and_pauses_when_throttled(clock, no_jitter):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(requests_per_second=8)
+    rate_limiter.acquire()
+
+    # WHEN
+    rate_limiter.record_throttled(retry_after=5)
+    rate_limiter.acquire()
+
+    # THEN
+    assert rate_limiter.current_rate == 4
+    assert rate_limiter.throttled_count == 1
+    assert clock.now == pytest.approx(5.25)
+
+
+def test_adaptive_rate_limiter_backs_off_exponentially(clock, no_jitter):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(
+        requests_per_second=8, min_requests_per_second=1, backoff_base_seconds=1
+    )
+
+    # WHEN
+    delays = []
+    for _ in range(4):
+        started_at = clock.now
+        rate_limiter.record_throttled()
+        rate_limiter.acquire()
+        delays.append(clock.now - started_at)
+
+    # THEN
+    assert [round(delay) for delay in delays] == [1, 2, 5, 9]
+    assert rate_limiter.current_rate == 1
+
+
+def test_adaptive_rate_limiter_slows_down_once_for_concurrent_throttles(
+    clock, no_jitter
+):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(
+        requests_per_second=8, burst=8, backoff_base_seconds=1
+    )
+    # Eight workers send their requests at once
+    sent_at = [rate_limiter.acquire() for _ in range(8)]
+
+    # WHEN
+    # Every request is throttled, the last ones answered after the pause ended
+    for i, request_sent_at in enumerate(sent_at):
+        clock.now = 0.1 + 0.5 * i
+        rate_limiter.record_throttled(sent_at=request_sent_at)
+    started_at = clock.now
+    rate_limiter.acquire()
+
+    # THEN
+    assert rate_limiter.current_rate == 4
+    assert rate_limiter.throttled_count == 8
+    assert clock.now - started_at < 0.5
+
+
+def test_adaptive_rate_limiter_extends_pause_for_longer_retry_after_of_same_burst(
+    clock, no_jitter
+):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(requests_per_second=8, backoff_base_seconds=1)
+    rate_limiter.record_throttled(retry_after=2)
+
+    # WHEN
+    rate_limiter.record_throttled(retry_after=5)
+    rate_limiter.acquire()
+
+    # THEN
+    assert rate_limiter.current_rate == 4
+    assert clock.now == pytest.approx(5.25)
+
+
+def test_adaptive_rate_limiter_increases_rate_after_successes(clock, no_jitter):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(requests_per_second=4, increase_step=1)
+    rate_limiter.record_throttled()
+    assert rate_limiter.current_rate == 2
+
+    # WHEN
+    for _ in range(SUCCESSES_BEFORE_INCREASE * 5):
+        rate_limiter.record_success()
+
+    # THEN
+    assert rate_limiter.current_rate == 4
+
+
+def test_adaptive_rate_limiter_prefers_longer_backoff_over_short_retry_after(
+    clock, no_jitter
+):
+    # GIVEN
+    rate_limiter = AdaptiveRateLimiter(requests_per_second=10, backoff_base_seconds=3)
+
+    # WHEN
+    rate_limiter.record_throttled(retry_after=1)
+    rate_limiter.acquire()
+
+    # THEN
+    assert clock.now == pytest.approx(3.2)
+
+
+def test_adaptive_rate_limiter_rejects_invalid_minimum():
+    # GIVEN / WHEN / THEN
+    with pytest.raises(ValueError, match="Minimum requests per second"):
+        AdaptiveRateLimiter(requests_per_second=2, min_requests_per_second=3)
+
+
+def test_default_rate_limiter_is_adaptive():
+    # GIVEN
+    with patch.object(rate_limit, "_default_rate_limiter", None):
+        # WHEN
+        rate_limiter = get_default_rate_limiter()
+
+    # THEN
+    assert isinstance(rate_limiter, AdaptiveRateLimiter)
+
+
+def test_shared_rate_limiters_share_one_bucket(clock, tmp_path):
+    """Rate limiters using the same state file, like ones in separate processes, must
+    each wait for their own slot."""
+    # GIVEN
+    path = tmp_path / "rate_limit.sqlite"
+    first = SharedRateLimiter(path, requests_per_second=4)
+    second = SharedRateLimiter(path, requests_per_second=4)
+
+    # WHEN
+    delays = [limiter._reserve() for limiter in (first, second, first, second)]
+
+    # THEN
+    assert delays == pytest.approx([0.0, 0.25, 0.5, 0.75])
+
+
+def test_shared_rate_limiters_slow_down_together(clock, tmp_path, no_jitter):
+    # GIVEN
+    path = tmp_path / "rate_limit.sqlite"
+    first = SharedRateLimiter(path, requests_per_second=8)
+    second = SharedRateLimiter(path, requests_per_second=8)
+
+    # WHEN
+    first.record_throttled(retry_after=2)
+
+    # THEN
+    assert second.current_rate == 4
+    assert second._reserve() == pytest.approx(2.25)
+
+
+def test_shared_rate_limiter_upgrades_state_files_of_older_versions(clock, tmp_path):
+    # GIVEN
+    path = tmp_path / "rate_limit.sqlite"
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE bucket (id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "requests_per_second REAL NOT NULL)"
+        )
+        connection.execute("INSERT INTO bucket VALUES (0, 1, 0, 2)")
+    connection.close()
+
+    # WHEN
+    rate_limiter = SharedRateLimiter(path, requests_per_second=8)
+    rate_limiter.record_throttled(retry_after=1)
+
+    # THEN
+    assert rate_limiter.current_rate == 1
+    assert rate_limiter._reserve() == pytest.approx(2)
+
+
+def _acquire_from_process(path, count):
+    rate_limiter = SharedRateLimiter(path, requests_per_second=20)
+    for _ in range(count):
+        rate_limiter.acquire()
+
+
+def test_shared_rate_limiter_limits_aggregate_rate_of_processes(tmp_path):
+    # GIVEN
+    path = tmp_path / "rate_limit.sqlite"
+    SharedRateLimiter(path, requests_per_second=20)
+    processes = [
+        multiprocessing.Process(target=_acquire_from_process, args=(path, 5))
+        for _ in range(3)
+    ]
+
+    # WHEN
+    started_at = time.monotonic()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.monotonic() - started_at
+
+    # THEN
+    assert all(process.exitcode == 0 for process in processes)
+    # 15 requests at 20 per second, the first one without waiting
+    assert elapsed >= 14 / 20
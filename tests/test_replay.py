@@ -0,0 +1,162 @@
+import gzip
+import io
+import json
+
+import requests
+import urllib3
+
+from edgar_tool.rate_limit import TokenBucketRateLimiter
+from edgar_tool.replay import (
+    RecordingTransport,
+    ReplayTransport,
+    build_response,
+    iter_archive,
+)
+from edgar_tool.text_search import fetch_page
+
+URL = "https://efts.sec.gov/LATEST/search-index?q=test&startdt=2020-01-01"
+
+
+def _record(archive_path, responses):
+    transport = RecordingTransport(
+        archive_path, rate_limiter=TokenBucketRateLimiter(1000)
+    )
+
+    def fake_session_get(url, headers=None, **kwargs):
+        return responses.pop(0)
+
+    transport.session.get = fake_session_get
+    return transport
+
+
+def test_recording_transport_saves_responses_to_gzipped_archive(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "search.jsonl.gz"
+    response = build_response(
+        URL, 200, json.dumps({"hits": 1}).encode(), "application/json"
+    )
+
+    # WHEN
+    with _record(archive_path, [response]) as transport:
+        result = fetch_page(URL, transport=transport)
+
+    # THEN
+    assert result == {"hits": 1}
+    with gzip.open(archive_path, "rt") as f:
+        assert len(f.readlines()) == 1
+    [entry] = iter_archive(archive_path)
+    assert entry["status"] == 200
+    assert entry["content_type"] == "application/json"
+    assert json.loads(entry["body"]) == {"hits": 1}
+
+
+def test_replay_transport_replays_recorded_responses(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "search.jsonl.gz"
+    responses = [
+        build_response(URL, 500, b"error"),
+        build_response(URL, 200, b'{"hits": 1}', "application/json"),
+    ]
+    with _record(archive_path, responses) as transport:
+        transport.get(URL)
+        transport.get(URL)
+
+    # WHEN
+    with ReplayTransport(archive_path) as transport:
+        # Query parameters in a different order still match the recording
+        first = transport.get(
+            URL.replace("q=test&startdt=2020-01-01", "startdt=2020-01-01&q=test")
+        )
+        second = transport.get(URL)
+        third = transport.get(URL)
+
+    # THEN
+    assert first.status_code == 500
+    assert second.json() == third.json() == {"hits": 1}
+
+
+def test_replay_transport_returns_404_for_unrecorded_urls(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "empty.jsonl.gz"
+    with _record(archive_path, []):
+        pass
+
+    # WHEN
+    with ReplayTransport(archive_path) as transport:
+        response = transport.get(URL)
+
+    # THEN
+    assert response.status_code == 404
+    assert isinstance(response, requests.Response)
+
+
+def test_recording_into_existing_archive_appends(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "search.jsonl.gz"
+    for body in (b"1", b"2"):
+        with _record(archive_path, [build_response(URL, 200, body)]) as transport:
+            transport.get(URL)
+
+    # WHEN
+    entries = list(iter_archive(archive_path))
+
+    # THEN
+    assert [entry["body"] for entry in entries] == ["1", "2"]
+
+
+def _streamed_response(body, chunks_read):
+    """Builds a streamed response whose raw body counts the chunks read from it."""
+
+    class CountingBody(io.BytesIO):
+        def read(self, *args):
+            chunk = super().read(*args)
+            if chunk:
+                chunks_read.append(chunk)
+            return chunk
+
+    response = requests.Response()
+    response.url = URL
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/rss+xml"
+    response.raw = urllib3.HTTPResponse(
+        body=CountingBody(body), preload_content=False, status=200
+    )
+    return response
+
+
+def test_recording_transport_streams_bodies_while_recording(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "feed.jsonl.gz"
+    body = "<item>é</item>".encode() * 1000
+    chunks_read = []
+    received = []
+
+    # WHEN
+    with _record(archive_path, [_streamed_response(body, chunks_read)]) as transport:
+        with transport.get(URL, stream=True) as response:
+            # Nothing is read from the network before the caller asks for it
+            assert chunks_read == []
+            for chunk in response.iter_content(chunk_size=1000):
+                received.append(chunk)
+                assert len(chunks_read) == len(received)
+
+    # THEN
+    assert b"".join(received) == body
+    [entry] = iter_archive(archive_path)
+    assert entry["body"] == body.decode()
+    assert entry["content_type"] == "application/rss+xml"
+
+
+def test_recording_transport_saves_whole_body_when_caller_stops_early(tmp_path):
+    # GIVEN
+    archive_path = tmp_path / "feed.jsonl.gz"
+    body = b"<item></item>" * 1000
+
+    # WHEN
+    with _record(archive_path, [_streamed_response(body, [])]) as transport:
+        with transport.get(URL, stream=True) as response:
+            next(response.iter_content(chunk_size=100))
+
+    # THEN
+    [entry] = iter_archive(archive_path)
+    assert entry["body"] == body.decode()
@@ -0,0 +1,510 @@
+import csv
+import gzip
+import json
+import sqlite3
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+import pytest
+import xmltodict
+from requests.exceptions import ChunkedEncodingError
+
+from edgar_tool import rss
+from edgar_tool.feed_state import RssFeedState
+from edgar_tool.replay import ReplayTransport, build_response
+from edgar_tool.rss import (
+    backfill_rss_feed,
+    fetch_rss_feed,
+    iter_months,
+    iter_rss_items,
+    parse_rss_feed_data,
+)
+from edgar_tool.ticker_index import TickerIndex
+
+RSS_FEED_PATH = Path(__file__).parent / "responses" / "rss_feed.xml"
+TICKERS_MAPPING = {"1652044": ["GOOGL", "GOOG"], "320193": ["AAPL"]}
+
+
+@pytest.fixture
+def rss_feed():
+    return RSS_FEED_PATH.read_bytes()
+
+
+def _chunks(body, size):
+    return (body[offset : offset + size] for offset in range(0, len(body), size))
+
+
+def _feed_with_items(rss_feed, number_of_items):
+    """Yields an RSS feed repeating the first item of the fixture feed."""
+    head, rest = rss_feed.split(b"<item>", 1)
+    item = b"<item>" + rest.split(b"</item>", 1)[0] + b"</item>"
+    yield head
+    for _ in range(number_of_items):
+        yield item
+    yield b"</channel></rss>"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024, 1_000_000])
+def test_iter_rss_items_parses_items_like_xmltodict(rss_feed, chunk_size):
+    # GIVEN
+    expected_items = xmltodict.parse(rss_feed)["rss"]["channel"]["item"]
+
+    # WHEN
+    items = list(iter_rss_items(_chunks(rss_feed, chunk_size)))
+
+    # THEN
+    assert items == expected_items
+
+
+def test_iter_rss_items_yields_items_before_the_feed_is_fully_read(rss_feed):
+    # GIVEN
+    chunks_read = []
+
+    def chunks():
+        for chunk in _chunks(rss_feed, 256):
+            chunks_read.append(chunk)
+            yield chunk
+
+    # WHEN
+    first_item = next(iter_rss_items(chunks()))
+
+    # THEN
+    assert first_item["edgar:xbrlFiling"]["edgar:companyName"] == "ALPHABET INC."
+    assert len(chunks_read) < len(rss_feed) / 256 / 2
+
+
+def test_iter_rss_items_memory_does_not_grow_with_the_number_of_items(rss_feed):
+    # GIVEN
+    def peak_memory(number_of_items):
+        tracemalloc.start()
+        try:
+            for _ in iter_rss_items(_feed_with_items(rss_feed, number_of_items)):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # WHEN
+    small_feed_peak = peak_memory(50)
+    large_feed_peak = peak_memory(1000)
+
+    # THEN
+    assert large_feed_peak < small_feed_peak * 2
+
+
+def test_iter_rss_items_parses_feed_with_a_single_item(rss_feed):
+    # GIVEN
+    feed = b"".join(_feed_with_items(rss_feed, 1))
+
+    # WHEN
+    items = list(iter_rss_items([feed]))
+
+    # THEN
+    assert len(items) == 1
+    assert items[0]["edgar:xbrlFiling"]["@xmlns:edgar"] == (
+        "https://www.sec.gov/Archives/edgar"
+    )
+
+
+def test_parse_rss_feed_data_filters_items_by_ticker(rss_feed):
+    # GIVEN
+    response = build_response(rss.RSS_FEED_URL, 200, rss_feed)
+
+    # WHEN
+    parsed_items = list(parse_rss_feed_data(response, ["AAPL"], TICKERS_MAPPING))
+
+    # THEN
+    assert parsed_items == [
+        {
+            "company_name": "Apple Inc.",
+            "cik": "0000320193",
+            "trimmed_cik": "320193",
+            "ticker": "AAPL",
+            "published_date": "Fri, 31 Jan 2025 06:01:36 EST",
+            "title": "Apple Inc. (0000320193) (Filer)",
+            "link": "https://www.sec.gov/Archives/edgar/data/320193/000032019325000008/0000320193-25-000008-index.htm",
+            "description": "10-Q",
+            "form": "10-Q",
+            "filing_date": "01/31/2025",
+            "file_number": "001-36743",
+            "accession_number": "0000320193-25-000008",
+            "acceptance_date": "20250131060136",
+            "period": "20241228",
+            "assistant_director": "Office of Technology",
+            "assigned_sic": "3571",
+            "fiscal_year_end": "0927",
+            "xbrl_files": "https://www.sec.gov/Archives/edgar/data/320193/000032019325000008/aapl-20241228.htm",
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    "tickers_mapping",
+    [TICKERS_MAPPING, TickerIndex.from_mapping(TICKERS_MAPPING)],
+    ids=["dict", "index"],
+)
+def test_parse_rss_feed_data_uses_the_first_matching_ticker_of_a_company(
+    rss_feed, tickers_mapping
+):
+    # GIVEN
+    response = build_response(rss.RSS_FEED_URL, 200, rss_feed)
+    # A large watchlist, mostly of tickers missing from the mapping
+    tickers = [f"T{n}" for n in range(5_000)] + ["GOOG", "AAPL", "GOOGL"]
+
+    # WHEN
+    parsed_items = list(parse_rss_feed_data(response, tickers, tickers_mapping))
+
+    # THEN
+    assert [(item["trimmed_cik"], item["ticker"]) for item in parsed_items] == [
+        ("1652044", "GOOGL"),
+        ("320193", "AAPL"),
+    ]
+
+
+def test_parse_rss_feed_data_without_tickers_keeps_every_item(rss_feed):
+    # GIVEN
+    response = build_response(rss.RSS_FEED_URL, 200, rss_feed)
+
+    # WHEN
+    parsed_items = list(parse_rss_feed_data(response, [], TICKERS_MAPPING))
+
+    # THEN
+    assert [item["ticker"] for item in parsed_items] == [
+        "GOOGL/GOOG",
+        "AAPL",
+        rss.UNKNOWN_TICKER_PLACEHOLDER,
+    ]
+    assert parsed_items[0]["xbrl_files"] == [
+        "https://www.sec.gov/Archives/edgar/data/1652044/000165204425000014/goog-20241231.htm",
+        "https://www.sec.gov/Archives/edgar/data/1652044/000165204425000014/goog-20241231.xsd",
+    ]
+    assert parsed_items[2]["company_name"] == "Small Fund Trust & Co"
+    assert parsed_items[2]["period"] is None
+
+
+def test_fetch_rss_feed_saves_items_of_the_streamed_feed(
+    rss_feed, tmp_path, monkeypatch
+):
+    # GIVEN
+    monkeypatch.setattr(rss, "RSS_FEED_DATA_DIRECTORY", tmp_path)
+    monkeypatch.setattr(
+        rss, "RSS_COMPANY_TICKERS_FILE_PATH", tmp_path / "company_tickers.json"
+    )
+    monkeypatch.setattr(
+        rss, "RSS_COMPANY_TICKERS_INDEX_PATH", tmp_path / "company_tickers.idx"
+    )
+    company_tickers = {
+        "0": {"cik_str": 1652044, "ticker": "GOOGL", "title": "Alphabet Inc."},
+        "1": {"cik_str": 1652044, "ticker": "GOOG", "title": "Alphabet Inc."},
+        "2": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+    }
+    archive_path = tmp_path / "rss.jsonl.gz"
+    with gzip.open(archive_path, "wt", encoding="utf-8") as f:
+        for url, body in [
+            (rss.RSS_COMPANY_TICKERS_URL, json.dumps(company_tickers)),
+            (rss.RSS_FEED_URL, rss_feed.decode("utf-8")),
+        ]:
+            entry = {"url": url, "status": 200, "content_type": None, "body": body}
+            f.write(json.dumps(entry) + "\n")
+    output = tmp_path / "rss_feed.csv"
+
+    # WHEN
+    with ReplayTransport(archive_path) as transport:
+        fetch_rss_feed(["goog", "aapl"], str(output), False, transport=transport)
+
+    # THEN
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["company_name"], row["ticker"]) for row in rows] == [
+        ("ALPHABET INC.", "GOOG"),
+        ("Apple Inc.", "AAPL"),
+    ]
+
+
+class _FakeFeedTransport:
+    """Answers the RSS feed with the given responses, and records the headers sent."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.sent_headers = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def tickers_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(rss, "RSS_FEED_DATA_DIRECTORY", tmp_path)
+    path = tmp_path / "company_tickers.idx"
+    TickerIndex.from_mapping(TICKERS_MAPPING).save(path)
+    monkeypatch.setattr(rss, "RSS_COMPANY_TICKERS_INDEX_PATH", path)
+    return path
+
+
+def _feed_response(body, status=200, etag='"v1"'):
+    response = build_response(rss.RSS_FEED_URL, status, body)
+    response.headers["ETag"] = etag
+    return response
+
+
+def test_polling_the_feed_only_saves_new_filings(rss_feed, tmp_path, tickers_file):
+    # GIVEN
+    output = tmp_path / "rss_feed.csv"
+    state = RssFeedState.for_output(str(output))
+    first_feed = b"".join(_feed_with_items(rss_feed, 1))
+    transport = _FakeFeedTransport(
+        [_feed_response(first_feed), _feed_response(rss_feed, etag='"v2"')]
+    )
+
+    # WHEN
+    fetch_rss_feed([], str(output), False, transport=transport, state=state)
+    fetch_rss_feed([], str(output), False, transport=transport, state=state)
+
+    # THEN
+    with open(output, newline="") as f:
+        accession_numbers = [row["accession_number"] for row in csv.DictReader(f)]
+    assert accession_numbers == [
+        "0001652044-25-000014",
+        "0000320193-25-000008",
+        "0009999999-25-000001",
+    ]
+    assert transport.sent_headers[1]["If-None-Match"] == '"v1"'
+    assert RssFeedState.for_output(str(output)).etag == '"v2"'
+
+
+def _interrupted_feed_response(body, items_before_interruption):
+    response = _feed_response(body)
+    end = 0
+    for _ in range(items_before_interruption):
+        end = body.index(b"</item>", end) + len(b"</item>")
+
+    def iter_content(chunk_size=1):
+        yield body[:end]
+        raise ChunkedEncodingError("Connection broken")
+
+    response.iter_content = iter_content
+    return response
+
+
+def test_polling_again_after_an_interrupted_download_saves_every_filing(
+    rss_feed, tmp_path, tickers_file
+):
+    # GIVEN
+    output = tmp_path / "rss_feed.sqlite"
+    state = RssFeedState.for_output(str(output))
+    transport = _FakeFeedTransport(
+        [_interrupted_feed_response(rss_feed, 2), _feed_response(rss_feed)]
+    )
+    with pytest.raises(ChunkedEncodingError):
+        fetch_rss_feed([], str(output), False, transport=transport, state=state)
+
+    # WHEN
+    fetch_rss_feed([], str(output), False, transport=transport, state=state)
+
+    # THEN
+    with sqlite3.connect(output) as connection:
+        accession_numbers = [
+            row[0]
+            for row in connection.execute(
+                "SELECT accession_number FROM results ORDER BY accession_number"
+            )
+        ]
+    assert accession_numbers == [
+        "0000320193-25-000008",
+        "0001652044-25-000014",
+        "0009999999-25-000001",
+    ]
+    assert len(RssFeedState.for_output(str(output))) == 3
+    assert "If-None-Match" not in transport.sent_headers[1]
+
+
+def test_polling_an_unchanged_feed_skips_it(rss_feed, tmp_path, tickers_file):
+    # GIVEN
+    output = tmp_path / "rss_feed.csv"
+    state = RssFeedState.for_output(str(output))
+    transport = _FakeFeedTransport(
+        [_feed_response(rss_feed), _feed_response(b"", status=304)]
+    )
+    fetch_rss_feed([], str(output), False, transport=transport, state=state)
+    saved_feed = output.read_text()
+
+    # WHEN
+    fetch_rss_feed([], str(output), False, transport=transport, state=state)
+
+    # THEN
+    assert output.read_text() == saved_feed
+    assert not transport.responses
+
+
+def test_iter_months_includes_both_months_across_years():
+    # GIVEN / WHEN
+    months = list(iter_months(date(2023, 11, 15), date(2024, 2, 3)))
+
+    # THEN
+    assert months == [
+        date(2023, 11, 1),
+        date(2023, 12, 1),
+        date(2024, 1, 1),
+        date(2024, 2, 1),
+    ]
+
+
+class _FakeArchiveTransport:
+    """Answers each monthly archive URL with the given list of responses."""
+
+    def __init__(self, responses_by_month):
+        self.responses = {
+            rss.RSS_MONTHLY_ARCHIVE_URL.format(month): responses
+            for month, responses in responses_by_month.items()
+        }
+        self.requested_urls = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requested_urls.append(url)
+        responses = self.responses.get(url)
+        if not responses:
+            return build_response(url, 404, b"Not Found")
+        return responses.pop(0)
+
+
+def _archive_with_items(rss_feed, indices):
+    """Returns an archive with the given items of the fixture feed."""
+    head, rest = rss_feed.split(b"<item>", 1)
+    items = [
+        b"<item>" + item.split(b"</item>")[0] + b"</item>"
+        for item in rest.split(b"<item>")
+    ]
+    body = head + b"".join(items[index] for index in indices) + b"</channel></rss>"
+    return build_response("https://www.sec.gov/archive.xml", 200, body)
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_backfill_rss_feed_saves_every_month_once_in_order(
+    rss_feed, tmp_path, tickers_file, concurrency
+):
+    # GIVEN
+    output = tmp_path / "backfill.csv"
+    transport = _FakeArchiveTransport(
+        {
+            date(2024, 11, 1): [_archive_with_items(rss_feed, [1])],
+            # December is missing
+            date(2025, 1, 1): [_archive_with_items(rss_feed, [0, 1, 2])],
+        }
+    )
+
+    # WHEN
+    backfill_rss_feed(
+        [],
+        str(output),
+        date(2024, 11, 1),
+        date(2025, 1, 1),
+        concurrency=concurrency,
+        transport=transport,
+    )
+
+    # THEN
+    with open(output, newline="") as f:
+        accession_numbers = [row["accession_number"] for row in csv.DictReader(f)]
+    assert accession_numbers == [
+        "0000320193-25-000008",
+        "0001652044-25-000014",
+        "0009999999-25-000001",
+    ]
+    assert len(transport.requested_urls) == 3
+
+
+@pytest.mark.parametrize("status_code", [429, 500])
+def test_backfill_rss_feed_filters_by_ticker_and_retries_failed_months(
+    rss_feed, tmp_path, tickers_file, status_code
+):
+    # GIVEN
+    output = tmp_path / "backfill.jsonl"
+    transport = _FakeArchiveTransport(
+        {
+            date(2025, 1, 1): [
+                build_response("https://www.sec.gov/archive.xml", status_code, b""),
+                _archive_with_items(rss_feed, [0, 1, 2]),
+            ]
+        }
+    )
+
+    # WHEN
+    backfill_rss_feed(
+        ["goog"], str(output), date(2025, 1, 1), date(2025, 1, 1), transport=transport
+    )
+
+    # THEN
+    with open(output) as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["ticker"] for row in rows] == ["GOOG"]
+    assert len(transport.requested_urls) == 2
+
+
+def test_backfill_rss_feed_retries_months_whose_download_fails(
+    rss_feed, tmp_path, tickers_file
+):
+    # GIVEN
+    output = tmp_path / "backfill.jsonl"
+    failing_response = _archive_with_items(rss_feed, [0, 1, 2])
+    body = failing_response.content
+
+    def iter_content_then_fail(chunk_size=1):
+        # The first item is read before the connection drops
+        yield body[: body.index(b"</item>") + len(b"</item>")]
+        raise ChunkedEncodingError("Connection broken")
+
+    failing_response.iter_content = iter_content_then_fail
+    transport = _FakeArchiveTransport(
+        {
+            date(2025, 1, 1): [
+                failing_response,
+                _archive_with_items(rss_feed, [0, 1, 2]),
+            ]
+        }
+    )
+
+    # WHEN
+    backfill_rss_feed(
+        [], str(output), date(2025, 1, 1), date(2025, 1, 1), transport=transport
+    )
+
+    # THEN
+    with open(output) as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 3
+    assert len(transport.requested_urls) == 2
+
+
+def test_backfill_rss_feed_rejects_months_before_the_first_archive(tmp_path):
+    with pytest.raises(ValueError, match="archives start in 2005-04"):
+        backfill_rss_feed(
+            [], str(tmp_path / "backfill.csv"), date(2001, 1, 1), date(2004, 12, 1)
+        )
+
+
+def test_tickers_file_of_older_versions_is_converted_to_an_index(
+    rss_feed, tmp_path, monkeypatch
+):
+    # GIVEN
+    monkeypatch.setattr(rss, "RSS_FEED_DATA_DIRECTORY", tmp_path)
+    legacy_path = tmp_path / "company_tickers.json"
+    legacy_path.write_text(json.dumps(TICKERS_MAPPING, indent=4))
+    monkeypatch.setattr(rss, "RSS_COMPANY_TICKERS_FILE_PATH", legacy_path)
+    index_path = tmp_path / "company_tickers.idx"
+    monkeypatch.setattr(rss, "RSS_COMPANY_TICKERS_INDEX_PATH", index_path)
+    output = tmp_path / "rss_feed.csv"
+
+    # WHEN
+    fetch_rss_feed(
+        ["aapl"],
+        str(output),
+        False,
+        transport=_FakeFeedTransport([_feed_response(rss_feed)]),
+    )
+
+    # THEN
+    assert dict(TickerIndex.load(index_path)) == TICKERS_MAPPING
+    with open(output, newline="") as f:
+        assert [row["ticker"] for row in csv.DictReader(f)] == ["AAPL"]
@@ -1,17 +1,31 @@
+import asyncio
 import json
+import sqlite3
+import time
+import typing
 from pathlib import Path
 from unittest.mock import MagicMock, patch
+from urllib import parse
 from uuid import UUID
 
 import pytest
 
+from edgar_tool.cache import ResponseCache
+from edgar_tool.checkpoint import CheckpointMismatchError, SearchCheckpoint
+from edgar_tool.constants import PEO_IN_AND_INC_IN_TO_SEC_FORM_ID, FilingLiteral
 from edgar_tool.search_params import SearchParams
 from edgar_tool.text_search import (
     PageCheckFailedError,
+    ThrottledError,
+    _parse_row,
+    aiter_search,
+    async_search,
     fetch_page,
     generate_search_urls,
+    iter_search,
     search,
 )
+from edgar_tool.transport import Transport
 
 
 @pytest.fixture
@@ -37,7 +51,9 @@ def test_fetch_page_success(mock_response, url):
 
     # WHEN
     with (
-        patch("requests.get", return_value=mock_response) as mock_get,
+        patch(
+            "edgar_tool.transport.Transport.get", return_value=mock_response
+        ) as mock_get,
         patch("uuid.uuid4", return_value=static_uuid),
     ):
         result = fetch_page(url)
@@ -54,7 +70,7 @@ def test_fetch_page_http_error(url):
     mock_response.status_code = 404
 
     # WHEN / THEN
-    with patch("requests.get", return_value=mock_response):
+    with patch("edgar_tool.transport.Transport.get", return_value=mock_response):
         with pytest.raises(
             PageCheckFailedError,
             match=f"Error for url {url}, with code {mock_response.status_code}",
@@ -73,7 +89,7 @@ def test_fetch_page_retry_on_failure(url):
     mock_response_failure.status_code = 500
 
     with patch(
-        "requests.get",
+        "edgar_tool.transport.Transport.get",
         side_effect=[
             mock_response_failure,
             mock_response_failure,
@@ -88,6 +104,117 @@ def test_fetch_page_retry_on_failure(url):
         assert result == {"test": "data"}
 
 
+def test_fetch_page_keeps_retrying_throttled_requests(url):
+    """Test that fetch_page retries throttled requests more often than failed ones."""
+    # GIVEN
+    mock_response_success = MagicMock()
+    mock_response_success.status_code = 200
+    mock_response_success.json.return_value = {"test": "data"}
+
+    mock_response_throttled = MagicMock()
+    mock_response_throttled.status_code = 429
+
+    with patch(
+        "edgar_tool.transport.Transport.get",
+        side_effect=[mock_response_throttled] * 5 + [mock_response_success],
+    ) as mock_get:
+        # WHEN
+        result = fetch_page(url)
+
+        # THEN
+        assert mock_get.call_count == 6
+        assert result == {"test": "data"}
+
+
+def test_fetch_page_gives_up_on_throttled_requests_eventually(url):
+    # GIVEN
+    mock_response_throttled = MagicMock()
+    mock_response_throttled.status_code = 503
+
+    with patch(
+        "edgar_tool.transport.Transport.get", return_value=mock_response_throttled
+    ) as mock_get:
+        # WHEN / THEN
+        with pytest.raises(ThrottledError):
+            fetch_page(url)
+        assert mock_get.call_count == 10
+
+
+def test_fetch_page_uses_transport_cache(tmp_path, mock_response):
+    """Test that fetch_page only requests a cached URL once."""
+    # GIVEN
+    url = (
+        "https://efts.sec.gov/LATEST/search-index?q=test"
+        "&dateRange=custom&startdt=2020-01-01&enddt=2020-01-31"
+    )
+    transport = Transport(cache=ResponseCache(tmp_path))
+
+    with patch.object(transport, "get", return_value=mock_response) as mock_get:
+        # WHEN
+        first = fetch_page(url, transport=transport)
+        second = fetch_page(url, transport=transport)
+
+    # THEN
+    assert mock_get.call_count == 1
+    assert first == second == {"test": "data"}
+
+
+def test_fetch_page_does_not_cache_errors(tmp_path):
+    """Test that failed requests are not added to the cache."""
+    # GIVEN
+    url = "https://efts.sec.gov/LATEST/search-index?q=test"
+    cache = ResponseCache(tmp_path)
+    transport = Transport(cache=cache)
+    mock_response = MagicMock()
+    mock_response.status_code = 500
+
+    with patch.object(transport, "get", return_value=mock_response):
+        # WHEN
+        with pytest.raises(PageCheckFailedError):
+            fetch_page(url, transport=transport)
+
+    # THEN
+    assert cache.get(url) is None
+
+
+with open(Path(__file__).parent / "responses" / "parsed_rows_snapshot.json") as f:
+    PARSED_ROWS_SNAPSHOT = json.load(f)
+
+
+def _parse_row_outcome(row):
+    try:
+        return {"output": _parse_row(row)}
+    except Exception as e:
+        return {"error": type(e).__name__}
+
+
+@pytest.mark.parametrize("case", sorted(PARSED_ROWS_SNAPSHOT["edge_cases"]))
+def test_parse_row_matches_snapshot_for_edge_cases(case):
+    """The snapshot was generated with the original implementation of _parse_row, which
+    every optimisation must keep giving the same output as, errors included."""
+    # GIVEN
+    expected = PARSED_ROWS_SNAPSHOT["edge_cases"][case]
+
+    # WHEN
+    outcome = _parse_row_outcome(expected["input"])
+
+    # THEN
+    assert outcome == {k: v for k, v in expected.items() if k != "input"}
+
+
+@pytest.mark.parametrize("response_file", sorted(PARSED_ROWS_SNAPSHOT["responses"]))
+def test_parse_row_matches_snapshot_for_responses(response_file):
+    # GIVEN
+    with open(Path(__file__).parent / "responses" / response_file) as f:
+        hits = json.load(f)["hits"]["hits"]
+
+    # WHEN
+    outcomes = [_parse_row_outcome(hit) for hit in hits]
+
+    # THEN
+    assert outcomes == PARSED_ROWS_SNAPSHOT["responses"][response_file]
+
+
 @pytest.mark.parametrize(
     "response_file, expected_url_count",
     [
@@ -145,12 +272,33 @@ def test_generate_search_urls_yields_correct_paginated_urls():
         side_effect=mock_responses,
     ):
         # WHEN
-        urls = list(str(url) for url in generate_search_urls(search_params))
+        urls = list(str(url) for url, _ in generate_search_urls(search_params))
 
         # THEN
         assert urls == expected_urls
 
 
+def test_generate_search_urls_yields_first_page_response():
+    """Test that generate_search_urls hands over the first page it already downloaded
+    to count the results, so the caller does not need to request it again.
+    """
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "101_hits.json") as f:
+        mock_response = json.load(f)
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        return_value=mock_response,
+    ) as mock_fetch_page:
+        # WHEN
+        pages = list(generate_search_urls(search_params))
+
+        # THEN
+        assert [response for _, response in pages] == [mock_response, None]
+        assert mock_fetch_page.call_count == 1
+
+
 def test_generate_search_urls_more_than_10_000_results():
     """Test that generate_search_urls yields the correct number of URLs when it needs to split
     the date range in half.
@@ -182,16 +330,21 @@ def test_generate_search_urls_more_than_10_000_results():
         assert len(urls) == expected_url_count
 
 
-def test_generate_search_urls_10_000_results_for_single_day():
-    """Test that generate_search_urls yields 100 URLs when the SEC returns 10,000 results for a single day.
+def test_generate_search_urls_10_000_results_for_single_day_that_cannot_be_split():
+    """Test that generate_search_urls yields 100 URLs when the SEC returns 10,000 results for a
+    single day, for a single form and a single location.
 
-    If the SEC returns 10,000 results for a single day, `generate_search_urls` should yield 100 URLs and not
-    try to split the date range in half. This is because the SEC API does not allow us to search a date range
-    that is smaller than 1 day.
+    The SEC API does not allow us to search a date range that is smaller than 1 day, and
+    the search cannot be split by form type or location any further, so only the first
+    10,000 results can be retrieved.
     """
     # GIVEN
     search_params = SearchParams(
-        keywords=["test"], start_date="2022-01-01", end_date="2022-01-01"
+        keywords=["test"],
+        start_date="2022-01-01",
+        end_date="2022-01-01",
+        single_forms=["8-K"],
+        peo_in="NY",
     )
     with open(Path(__file__).parent / "responses" / "10000_hits.json") as f:
         mock_response = json.load(f)
@@ -209,6 +362,119 @@ def test_generate_search_urls_10_000_results_for_single_day():
         assert len(urls) == expected_url_count
 
 
+def _single_day_response(total, form_counts=None, other_forms=0, location_counts=None):
+    response = {"hits": {"total": {"value": min(total, 10000)}, "hits": []}}
+    if form_counts is not None:
+        response["aggregations"] = {
+            "form_filter": {
+                "buckets": [{"key": k, "doc_count": v} for k, v in form_counts.items()],
+                "sum_other_doc_count": other_forms,
+            },
+            "biz_states_filter": {
+                "buckets": [
+                    {"key": k, "doc_count": v}
+                    for k, v in (location_counts or {}).items()
+                ],
+                "sum_other_doc_count": 0,
+            },
+        }
+    return response
+
+
+def test_generate_search_urls_splits_busy_day_by_form_type():
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-03", end_date="2022-01-03"
+    )
+    day_response = _single_day_response(
+        20000, {"4": 9000, "8-K": 6000, "10-Q": 4000, "SC 13G": 500}, other_forms=500
+    )
+    form_responses = {
+        "4": _single_day_response(9000),
+        "8-K,SC 13G": _single_day_response(6500),
+        "10-Q": _single_day_response(4000),
+    }
+
+    def fake_fetch_page(url, transport=None):
+        if "forms=" not in str(url):
+            return day_response
+        forms = parse.unquote(str(url).split("forms=")[1].split("&")[0])
+        for prefix, response in form_responses.items():
+            if forms.startswith(prefix):
+                return response
+        return _single_day_response(500)
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        urls = [str(url) for url, _ in generate_search_urls(search_params)]
+
+    # THEN
+    first_pages = [url for url in urls if "page=" not in url]
+    searched_forms = [
+        parse.unquote(url.split("forms=")[1]).split(",") for url in first_pages
+    ]
+    assert searched_forms[:3] == [["4"], ["8-K", "SC 13G"], ["10-Q"]]
+    # Every other form the SEC lets us search for is still searched, in a few groups
+    # small enough to keep the URLs short
+    assert set(sum(searched_forms, [])) == set(typing.get_args(FilingLiteral))
+    assert all(len(forms) <= 80 for forms in searched_forms)
+    assert len(urls) == 90 + 65 + 40 + 5 * (len(searched_forms) - 3)
+
+
+def test_generate_search_urls_splits_busy_form_by_location():
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"],
+        start_date="2022-01-03",
+        end_date="2022-01-03",
+        single_forms=["4"],
+    )
+    day_response = _single_day_response(
+        12000, {"4": 12000}, location_counts={"NY": 7000, "CA": 5000}
+    )
+
+    def fake_fetch_page(url, transport=None):
+        if "locationCode" not in str(url):
+            return day_response
+        return _single_day_response(100)
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        urls = [str(url) for url, _ in generate_search_urls(search_params)]
+
+    # THEN
+    locations = [
+        parse.unquote(url.split("locationCode=")[1].split("&")[0]).split(",")
+        for url in urls
+    ]
+    assert locations[0] == ["NY"]
+    assert locations[1] == ["CA"]
+    assert set(sum(locations, [])) == set(PEO_IN_AND_INC_IN_TO_SEC_FORM_ID.values())
+
+
+def test_generate_search_urls_warns_when_split_day_misses_results(capsys):
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-03", end_date="2022-01-03"
+    )
+    day_response = _single_day_response(20000, {"4": 9000, "8-K": 9000})
+
+    def fake_fetch_page(url, transport=None):
+        if "forms=" not in str(url):
+            return day_response
+        if str(url).endswith(("forms=4", "forms=8-K")):
+            # Some filings have a form type we can't search for
+            return _single_day_response(8000)
+        return _single_day_response(0)
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        list(generate_search_urls(search_params))
+
+    # THEN
+    assert "has about 18000 results, but only 16000" in capsys.readouterr().out
+
+
 def test_search_max_results_when_max_results_is_less_than_returned_results():
     # GIVEN
     search_params = SearchParams(keywords=["test"])
@@ -261,13 +527,30 @@ def test_search_does_not_make_more_requests_than_necessary():
 
     # THEN
     assert len(results) == 10
-    # It would be nice if the call count was exactly 1, but right now the implementation
-    # makes 1 request to get get the total number of results and check that it's less than
-    # 10,000. Then it yields URLs for up to 100 results at a time. It's not as efficient
-    # as it could be, but it's not a big deal. We just want to make sure we aren't making
-    # a massive amount of requests and then returning the max_results number of results
-    # from what was returned.
-    assert 1 <= mock_get.call_count <= 2
+    # The request made to count the total number of results is also the first page of
+    # results, so it should be reused instead of being requested a second time.
+    assert mock_get.call_count == 1
+
+
+def test_search_requests_each_page_once():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    response_files = ("101_hits.json", "1_hit.json")
+    mock_responses = []
+    for filename in response_files:
+        with open(Path(__file__).parent / "responses" / filename) as f:
+            mock_responses.append(json.load(f))
+
+    # WHEN
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        side_effect=mock_responses,
+    ) as mock_get:
+        results = search(search_params)
+
+    # THEN
+    assert mock_get.call_count == 2
+    assert len(results) == 101
 
 
 def test_search_when_max_results_is_not_provided():
@@ -287,3 +570,358 @@ def test_search_when_max_results_is_not_provided():
 
     # THEN
     assert len(results) == 100
+
+
+def test_search_with_concurrency_keeps_page_order():
+    """Test that fetching pages concurrently still returns the results in page order."""
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "9999_hits.json") as f:
+        first_page = json.load(f)
+    hits_per_page = len(first_page["hits"]["hits"])
+
+    def fake_fetch_page(url, transport=None):
+        if "page=" not in str(url):
+            return first_page
+        # Tag every hit with the page it came from
+        page = str(url).split("page=")[1].split("&")[0]
+        hits = [
+            {**hit, "_source": {**hit["_source"], "file_date": f"page-{page}"}}
+            for hit in first_page["hits"]["hits"]
+        ]
+        return {"hits": {"total": first_page["hits"]["total"], "hits": hits}}
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        results = search(search_params, concurrency=4)
+
+    # THEN
+    assert len(results) == 100 * hits_per_page
+    expected_pages = [f"page-{page}" for page in range(2, 101)]
+    assert [row["filed_at"] for row in results[hits_per_page::hits_per_page]] == (
+        expected_pages
+    )
+
+
+def test_async_search_returns_same_results_as_search():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "100_hits.json") as f:
+        mock_response = json.load(f)
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        return_value=mock_response,
+    ):
+        # WHEN
+        expected_results = search(search_params)
+        results = asyncio.run(async_search(search_params))
+
+    # THEN
+    assert results == expected_results
+
+
+def test_async_search_max_results():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "100_hits.json") as f:
+        mock_response = json.load(f)
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        return_value=mock_response,
+    ) as mock_get:
+        # WHEN
+        results = asyncio.run(async_search(search_params, max_results=10))
+
+    # THEN
+    assert len(results) == 10
+    assert mock_get.call_count == 1
+
+
+def test_aiter_search_yields_rows_page_by_page():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    response_files = ("101_hits.json", "1_hit.json")
+    mock_responses = []
+    for filename in response_files:
+        with open(Path(__file__).parent / "responses" / filename) as f:
+            mock_responses.append(json.load(f))
+
+    async def collect():
+        return [row async for row in aiter_search(search_params)]
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        side_effect=mock_responses,
+    ):
+        # WHEN
+        results = asyncio.run(collect())
+
+    # THEN
+    assert len(results) == 101
+
+
+def test_async_search_raises_when_timeout_is_exceeded():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+
+    def slow_fetch_page(url, transport=None):
+        time.sleep(0.5)
+        return {}
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=slow_fetch_page):
+        # WHEN / THEN
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(async_search(search_params, timeout=0.05))
+
+
+def test_cancelling_aiter_search_stops_requesting_pages():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "9999_hits.json") as f:
+        mock_response = json.load(f)
+
+    async def consume_then_cancel():
+        first_row = asyncio.Event()
+
+        async def consume():
+            async for _ in aiter_search(search_params):
+                first_row.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(consume())
+        await first_row.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        return_value=mock_response,
+    ) as mock_get:
+        # WHEN
+        asyncio.run(consume_then_cancel())
+
+    # THEN
+    assert mock_get.call_count == 1
+
+
+def test_stopping_aiter_search_early_does_not_block_the_event_loop():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "9999_hits.json") as f:
+        mock_response = json.load(f)
+    fetched_pages = []
+
+    def slow_fetch_page(url, transport=None):
+        fetched_pages.append(url)
+        # Every page after the first one is still being fetched when the search stops
+        if len(fetched_pages) > 1:
+            time.sleep(0.5)
+        return mock_response
+
+    async def stop_after_first_row():
+        loop = asyncio.get_running_loop()
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(loop.time())
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        rows = aiter_search(search_params, concurrency=8)
+        await rows.__anext__()
+        stopped_at = loop.time()
+        await rows.aclose()
+        await asyncio.sleep(0.2)
+        ticker.cancel()
+        ticks_after_stop = [stopped_at] + [t for t in ticks if t > stopped_at]
+        return max(b - a for a, b in zip(ticks_after_stop, ticks_after_stop[1:]))
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=slow_fetch_page):
+        # WHEN
+        longest_stall = asyncio.run(stop_after_first_row())
+
+    # THEN
+    assert longest_stall < 0.1
+
+
+def test_iter_search_only_fetches_pages_as_they_are_consumed():
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    with open(Path(__file__).parent / "responses" / "9999_hits.json") as f:
+        mock_response = json.load(f)
+
+    with patch(
+        "edgar_tool.text_search.fetch_page",
+        return_value=mock_response,
+    ) as mock_get:
+        # WHEN
+        rows = iter_search(search_params)
+        first_row = next(rows)
+
+        # THEN
+        assert first_row["root_form"] is not None
+        assert mock_get.call_count == 1
+
+
+def test_search_with_output_writes_each_page_as_it_arrives(tmp_path):
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    output = tmp_path / "results.jsonl"
+    response_files = ("101_hits.json", "1_hit.json")
+    mock_responses = []
+    for filename in response_files:
+        with open(Path(__file__).parent / "responses" / filename) as f:
+            mock_responses.append(json.load(f))
+    lines_on_disk_when_second_page_requested = []
+
+    def fake_fetch_page(url, transport=None):
+        if "page=2" in str(url):
+            lines_on_disk_when_second_page_requested.append(
+                len(output.read_text().splitlines())
+            )
+        return mock_responses.pop(0)
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        result = search(search_params, output=str(output))
+
+    # THEN
+    assert result is None
+    assert lines_on_disk_when_second_page_requested == [100]
+    assert len(output.read_text().splitlines()) == 101
+
+
+def test_search_resumes_interrupted_search_without_refetching_saved_pages(tmp_path):
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    output = tmp_path / "results.jsonl"
+    with open(Path(__file__).parent / "responses" / "9999_hits.json") as f:
+        mock_response = json.load(f)
+    hits_per_page = len(mock_response["hits"]["hits"])
+    requested_urls = []
+
+    def fetch_page_failing_on_page_3(url, transport=None):
+        requested_urls.append(str(url))
+        if "page=3&" in str(url):
+            raise PageCheckFailedError(f"Error for url {url}, with code 429")
+        return mock_response
+
+    with patch(
+        "edgar_tool.text_search.fetch_page", side_effect=fetch_page_failing_on_page_3
+    ):
+        search(search_params, output=str(output))
+    checkpoint_path = tmp_path / "results.jsonl.checkpoint"
+    assert checkpoint_path.exists()
+    assert len(output.read_text().splitlines()) == 2 * hits_per_page
+
+    # WHEN
+    requested_urls.clear()
+    with patch(
+        "edgar_tool.text_search.fetch_page", return_value=mock_response
+    ) as mock_get:
+        search(search_params, output=str(output), resume=True)
+
+    # THEN
+    requested_pages = [call.args[0] for call in mock_get.call_args_list]
+    # The first page is requested again to count the results, but not written again
+    assert len(requested_pages) == 99
+    assert not any("page=2&" in str(url) for url in requested_pages)
+    assert len(output.read_text().splitlines()) == 100 * hits_per_page
+    assert not checkpoint_path.exists()
+
+
+@pytest.mark.parametrize("extension", ["json", "csv.gz", "parquet"])
+def test_search_resume_rejects_output_that_cannot_be_appended_to(tmp_path, extension):
+    # GIVEN
+    search_params = SearchParams(keywords=["test"])
+    output = tmp_path / f"results.{extension}"
+    output.write_bytes(b"previous results")
+
+    # WHEN / THEN
+    with pytest.raises(ValueError, match="Cannot resume a search"):
+        search(search_params, output=str(output), resume=True)
+    assert output.read_bytes() == b"previous results"
+
+
+def test_search_resume_of_a_different_search_leaves_the_output_untouched(tmp_path):
+    # GIVEN
+    output = tmp_path / "results.sqlite"
+    output.write_bytes(b"")
+    SearchCheckpoint.for_output(str(output)).start("https://other.search", False)
+
+    # WHEN / THEN
+    with pytest.raises(CheckpointMismatchError):
+        search(SearchParams(keywords=["test"]), output=str(output), resume=True)
+    assert output.read_bytes() == b""
+
+
+def test_overlapping_searches_into_a_sqlite_database_do_not_duplicate_filings(
+    tmp_path,
+):
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-01", end_date="2022-01-31"
+    )
+    output = tmp_path / "results.sqlite"
+    with open(Path(__file__).parent / "responses" / "100_hits.json") as f:
+        mock_response = json.load(f)
+    unique_ids = {hit["_id"] for hit in mock_response["hits"]["hits"]}
+
+    # WHEN
+    with patch("edgar_tool.text_search.fetch_page", return_value=mock_response):
+        search(search_params, output=str(output))
+        search(search_params, output=str(output))
+
+    # THEN
+    with sqlite3.connect(output) as connection:
+        (count,) = connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert count == len(unique_ids)
+
+
+def test_generate_search_urls_splits_by_estimated_total_in_one_pass():
+    """Test that a date range with more than 10,000 results is split into enough date
+    ranges to hold the total number of results reported by the form aggregation, instead
+    of being halved again and again.
+    """
+    # GIVEN
+    search_params = SearchParams(
+        keywords=["test"], start_date="2022-01-01", end_date="2022-12-31"
+    )
+    with open(Path(__file__).parent / "responses" / "100_hits.json") as f:
+        small_response = json.load(f)
+    large_response = {
+        "hits": {"total": {"value": 10000, "relation": "gte"}, "hits": []},
+        "aggregations": {
+            "form_filter": {
+                "buckets": [{"key": "10-K", "doc_count": 40000}],
+                "sum_other_doc_count": 5000,
+            }
+        },
+    }
+    requested_urls = []
+
+    def fake_fetch_page(url, transport=None):
+        requested_urls.append(str(url))
+        return large_response if len(requested_urls) == 1 else small_response
+
+    with patch("edgar_tool.text_search.fetch_page", side_effect=fake_fetch_page):
+        # WHEN
+        urls = list(generate_search_urls(search_params))
+
+    # THEN
+    # 45,000 results at 7,500 results per date range
+    assert len(urls) == 6
+    assert len(requested_urls) == 7
+    date_ranges = [
+        (url.split("startdt=")[1][:10], url.split("enddt=")[1][:10])
+        for url in requested_urls[1:]
+    ]
+    assert date_ranges[0][0] == "2022-01-01"
+    assert date_ranges[-1][1] == "2022-12-31"
+    assert all(
+        end < start for (_, end), (start, _) in zip(date_ranges, date_ranges[1:])
+    )
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from edgar_tool.ticker_index import TickerIndex, load_ticker_index
+
+COMPANY_TICKERS = {
+    "0": {"cik_str": 1652044, "ticker": "GOOGL", "title": "Alphabet Inc."},
+    "1": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+    "2": {"cik_str": 1652044, "ticker": "GOOG", "title": "Alphabet Inc."},
+    "3": {"cik_str": 1067983, "ticker": "BRK-B", "title": "Berkshire Hathaway"},
+    "4": {"cik_str": 1067983, "ticker": "BRK-A", "title": "Berkshire Hathaway"},
+}
+
+
+def test_index_maps_ciks_to_tickers_and_back():
+    # WHEN
+    index = TickerIndex.from_company_tickers(COMPANY_TICKERS)
+
+    # THEN
+    assert dict(index) == {
+        "320193": ["AAPL"],
+        "1067983": ["BRK-B", "BRK-A"],
+        "1652044": ["GOOGL", "GOOG"],
+    }
+    assert index.get("0001652044") == ["GOOGL", "GOOG"]
+    assert index.get("123", []) == []
+    assert index.ciks_for_ticker("goog") == ["1652044"]
+    assert index.ciks_for_ticker("MSFT") == []
+
+
+def test_index_is_saved_and_loaded(tmp_path):
+    # GIVEN
+    index = TickerIndex.from_company_tickers(COMPANY_TICKERS)
+    path = tmp_path / "company_tickers.idx"
+
+    # WHEN
+    index.save(path)
+    loaded = TickerIndex.load(path)
+
+    # THEN
+    assert dict(loaded) == dict(index)
+    assert loaded.ciks_for_ticker("BRK-A") == ["1067983"]
+    assert os.listdir(tmp_path) == ["company_tickers.idx"]
+
+
+def test_empty_index_is_saved_and_loaded(tmp_path):
+    # GIVEN
+    path = tmp_path / "company_tickers.idx"
+
+    # WHEN
+    TickerIndex.from_mapping({}).save(path)
+
+    # THEN
+    assert len(TickerIndex.load(path)) == 0
+
+
+@pytest.mark.parametrize("content", [b"", b"{}", b"EDGARTI1\x05\x00\x00\x00"])
+def test_loading_an_invalid_file_fails(tmp_path, content):
+    # GIVEN
+    path = tmp_path / "company_tickers.idx"
+    path.write_bytes(content)
+
+    # WHEN / THEN
+    with pytest.raises(Exception):
+        TickerIndex.load(path)
+
+
+def test_loaded_index_is_cached_until_the_file_changes(tmp_path):
+    # GIVEN
+    path = tmp_path / "company_tickers.idx"
+    TickerIndex.from_mapping({"320193": ["AAPL"]}).save(path)
+
+    # WHEN
+    first = load_ticker_index(path)
+    second = load_ticker_index(path)
+    TickerIndex.from_mapping({"320193": ["AAPL"], "789019": ["MSFT"]}).save(path)
+    third = load_ticker_index(path)
+
+    # THEN
+    assert second is first
+    assert third is not first
+    assert third.ciks_for_ticker("MSFT") == ["789019"]
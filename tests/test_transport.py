@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from edgar_tool import transport as transport_module
+from edgar_tool.transport import Transport, get_default_transport
+
+
+def test_transport_mounts_pooled_adapter_with_configured_size():
+    # GIVEN / WHEN
+    transport = Transport(pool_size=4)
+
+    # THEN
+    adapter = transport.session.get_adapter("https://efts.sec.gov/LATEST/search-index")
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_connections == 4
+
+
+def test_transport_rejects_empty_pool():
+    # GIVEN / WHEN / THEN
+    with pytest.raises(ValueError, match="Connection pool size must be at least 1."):
+        Transport(pool_size=0)
+
+
+def test_transport_reuses_one_session_for_every_request():
+    # GIVEN
+    transport = Transport()
+    response = MagicMock()
+
+    # WHEN
+    with patch.object(transport.session, "get", return_value=response) as mock_get:
+        transport.get("https://example.com/a", headers={"User-Agent": "test"})
+        transport.get("https://example.com/b", headers={"User-Agent": "test"})
+
+    # THEN
+    assert mock_get.call_count == 2
+    mock_get.assert_called_with("https://example.com/b", headers={"User-Agent": "test"})
+
+
+def test_get_default_transport_returns_shared_instance():
+    # GIVEN
+    with patch.object(transport_module, "_default_transport", None):
+        # WHEN
+        first = get_default_transport()
+        second = get_default_transport()
+
+    # THEN
+    assert first is second
+
+
+def test_transport_waits_for_rate_limiter_before_each_request():
+    # GIVEN
+    rate_limiter = MagicMock()
+    transport = Transport(rate_limiter=rate_limiter)
+
+    # WHEN
+    with patch.object(transport.session, "get"):
+        transport.get("https://example.com/a")
+        transport.get("https://example.com/b")
+
+    # THEN
+    assert rate_limiter.acquire.call_count == 2
+
+
+@pytest.mark.parametrize("status_code", [429, 503])
+def test_transport_reports_throttled_responses_to_rate_limiter(status_code):
+    # GIVEN
+    rate_limiter = MagicMock()
+    transport = Transport(rate_limiter=rate_limiter)
+    response = MagicMock(status_code=status_code, headers={"Retry-After": "7"})
+
+    # WHEN
+    with patch.object(transport.session, "get", return_value=response):
+        transport.get("https://example.com/a")
+
+    # THEN
+    rate_limiter.record_throttled.assert_called_once_with(
+        7.0, sent_at=rate_limiter.acquire.return_value
+    )
+    rate_limiter.record_success.assert_not_called()
+
+
+def test_transport_reports_successful_responses_to_rate_limiter():
+    # GIVEN
+    rate_limiter = MagicMock()
+    transport = Transport(rate_limiter=rate_limiter)
+    response = MagicMock(status_code=200, headers={})
+
+    # WHEN
+    with patch.object(transport.session, "get", return_value=response):
+        transport.get("https://example.com/a")
+
+    # THEN
+    rate_limiter.record_success.assert_called_once_with()
+    rate_limiter.record_throttled.assert_not_called()
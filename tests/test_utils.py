@@ -2,7 +2,7 @@ import datetime
 
 import pytest
 
-from edgar_tool.utils import split_date_range_in_half
+from edgar_tool.utils import split_date_range_by_density, split_date_range_in_half
 
 
 def test_split_date_range_in_half_when_dates_are_beginning_and_end_of_month():
@@ -59,3 +59,59 @@ def test_split_date_range_in_half_when_dates_are_same():
     # WHEN / THEN
     with pytest.raises(ValueError, match=expected_error_message):
         next(split_date_range_in_half(start_date, end_date))
+
+
+def test_split_date_range_by_density_without_sample_splits_evenly():
+    # GIVEN
+    start_date = datetime.date(2024, 1, 1)
+    end_date = datetime.date(2024, 1, 31)
+
+    # WHEN
+    ranges = split_date_range_by_density(start_date, end_date, 4)
+
+    # THEN
+    assert ranges == [
+        (datetime.date(2024, 1, 1), datetime.date(2024, 1, 8)),
+        (datetime.date(2024, 1, 9), datetime.date(2024, 1, 16)),
+        (datetime.date(2024, 1, 17), datetime.date(2024, 1, 24)),
+        (datetime.date(2024, 1, 25), datetime.date(2024, 1, 31)),
+    ]
+
+
+def test_split_date_range_by_density_cuts_dense_periods_smaller():
+    # GIVEN
+    start_date = datetime.date(2024, 1, 1)
+    end_date = datetime.date(2024, 12, 31)
+    # Almost every result was filed in December
+    sample_dates = [datetime.date(2024, 12, day) for day in range(1, 31)]
+
+    # WHEN
+    ranges = split_date_range_by_density(
+        start_date, end_date, 4, sample_dates, sample_weight=0.9
+    )
+
+    # THEN
+    assert len(ranges) == 4
+    assert ranges[0][1] > datetime.date(2024, 11, 1)
+    assert ranges[-1][0] >= datetime.date(2024, 12, 1)
+
+
+@pytest.mark.parametrize("number_of_ranges", [1, 2, 7, 31, 100])
+def test_split_date_range_by_density_covers_range_without_overlap(number_of_ranges):
+    # GIVEN
+    start_date = datetime.date(2024, 1, 1)
+    end_date = datetime.date(2024, 1, 31)
+    sample_dates = [datetime.date(2024, 1, 3)] * 10 + [datetime.date(2023, 1, 1)]
+
+    # WHEN
+    ranges = split_date_range_by_density(
+        start_date, end_date, number_of_ranges, sample_dates
+    )
+
+    # THEN
+    assert len(ranges) == min(number_of_ranges, 31)
+    assert ranges[0][0] == start_date
+    assert ranges[-1][1] == end_date
+    for (_, previous_end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert next_start == previous_end + datetime.timedelta(days=1)
+    assert all(start <= end for start, end in ranges)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from edgar_tool import watch as watch_module
+from edgar_tool.watch import Watchlist, _next_run_time, load_watchlists, watch
+
+
+def _write_config(tmp_path, watchlists):
+    path = tmp_path / "watch.json"
+    path.write_text(json.dumps({"watchlists": watchlists}))
+    return path
+
+
+def test_load_watchlists_reads_every_watchlist(tmp_path):
+    # GIVEN
+    path = _write_config(
+        tmp_path,
+        {
+            "big-tech": {
+                "tickers": ["AAPL", "GOOG"],
+                "every_n_mins": 10,
+                "output": "big_tech.csv",
+            },
+            "banks": {"tickers": ["JPM"], "every_n_mins": 0.5, "output": "banks.db"},
+        },
+    )
+
+    # WHEN
+    watchlists = load_watchlists(path)
+
+    # THEN
+    assert watchlists == [
+        Watchlist("big-tech", ["AAPL", "GOOG"], 10, "big_tech.csv"),
+        Watchlist("banks", ["JPM"], 0.5, "banks.db"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "watchlists",
+    [
+        {},
+        {"a": ["AAPL"]},
+        {"a": {"tickers": [], "every_n_mins": 10, "output": "a.csv"}},
+        {"a": {"tickers": "AAPL", "every_n_mins": 10, "output": "a.csv"}},
+        {"a": {"tickers": ["AAPL"], "every_n_mins": 0, "output": "a.csv"}},
+        {"a": {"tickers": ["AAPL"], "every_n_mins": True, "output": "a.csv"}},
+        {"a": {"tickers": ["AAPL"], "every_n_mins": 10, "output": "a.parquet"}},
+        {"a": {"tickers": ["AAPL"], "every_n_mins": 10, "output": "a.csv", "x": 1}},
+        {
+            "a": {"tickers": ["AAPL"], "every_n_mins": 10, "output": "same.csv"},
+            "b": {"tickers": ["GOOG"], "every_n_mins": 5, "output": "same.csv"},
+        },
+    ],
+)
+def test_load_watchlists_rejects_invalid_configs(tmp_path, watchlists):
+    # GIVEN
+    path = _write_config(tmp_path, watchlists)
+
+    # WHEN / THEN
+    with pytest.raises(ValueError):
+        load_watchlists(path)
+
+
+@pytest.mark.parametrize(
+    "scheduled, now, expected",
+    [
+        # The run took less than the interval
+        (0, 3, 10),
+        # The run took longer than the interval, the missed run is skipped
+        (0, 12, 20),
+        (0, 31, 40),
+    ],
+)
+def test_next_run_time_stays_on_the_schedule(scheduled, now, expected):
+    # GIVEN/WHEN
+    next_run = _next_run_time(scheduled, now, 10)
+
+    # THEN
+    assert next_run == expected
+
+
+def test_watch_fetches_every_watchlist_at_its_own_interval(tmp_path, monkeypatch):
+    # GIVEN
+    fetches = []
+
+    def fake_fetch_rss_feed(tickers, output, refresh, transport, state):
+        fetches.append(output)
+        if output == "failing.csv":
+            raise ConnectionError("SEC website is down")
+        # Slow fetches don't delay the next runs
+        time.sleep(0.05)
+
+    monkeypatch.setattr(watch_module, "fetch_rss_feed", fake_fetch_rss_feed)
+    monkeypatch.setattr(watch_module, "load_tickers_mapping", lambda *a, **k: None)
+    monkeypatch.chdir(tmp_path)
+    watchlists = [
+        Watchlist("fast", ["AAPL"], 0.2 / 60, "fast.csv"),
+        Watchlist("slow", ["GOOG"], 10, "slow.csv"),
+        Watchlist("failing", ["JPM"], 0.2 / 60, "failing.csv"),
+    ]
+
+    # WHEN
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(watch(watchlists, transport=object()), 0.5))
+
+    # THEN
+    assert fetches.count("fast.csv") == 3
+    assert fetches.count("slow.csv") == 1
+    assert fetches.count("failing.csv") == 3